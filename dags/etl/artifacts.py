@@ -0,0 +1,241 @@
+import json
+import os
+import re
+import shutil
+import time
+from typing import Any, Dict, Iterable, Iterator, NamedTuple, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DEFAULT_ARTIFACT_DIR = os.path.join(PROJECT_ROOT, "data", "artifacts")
+# Run directories older than this are pruned at the end of a successful run
+ARTIFACT_RETENTION_DAYS = 7
+
+# "arrow" (IPC file) or "parquet"; LZ4 keeps the IPC handoff close to memory speed
+DEFAULT_FORMAT = "arrow"
+DEFAULT_COMPRESSION = "lz4"
+# Rows per record batch (row group for parquet): a compressed batch is
+# decompressed as a whole, so this bounds the memory of reading any chunk
+BATCH_ROWS = 64 * 1024
+
+_SUFFIXES = {"arrow": ".arrow", "parquet": ".parquet"}
+_ATTRS_KEY = b"marketing.attrs"
+_CATEGORICAL_KEY = b"marketing.categorical"
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+class ArtifactHandle(NamedTuple):
+    """
+    Small, JSON-serializable reference to a task output, passed through XCom
+    in place of the data itself.
+    """
+    path: str
+    format: str
+    rows: int
+    bytes: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._asdict()
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ArtifactHandle":
+        return cls(**data)
+
+
+def artifact_root() -> str:
+    return os.getenv("MARKETING_ARTIFACT_DIR", DEFAULT_ARTIFACT_DIR)
+
+
+def run_dir(run_id: str) -> str:
+    """
+    Returns the shared directory holding one DAG run's artifacts.
+    """
+    return os.path.join(artifact_root(), _UNSAFE_CHARS.sub("_", run_id))
+
+
+def write_artifact(df: pd.DataFrame, run_id: str, name: str, format: str = DEFAULT_FORMAT,
+                   compression: Optional[str] = DEFAULT_COMPRESSION) -> Dict[str, Any]:
+    """
+    Writes a task's DataFrame to the run directory and returns its handle.
+
+    The file is written under a temporary name and renamed into place, so a
+    retried task never leaves a half-written artifact for downstream tasks.
+
+    Parameters:
+        df (pd.DataFrame): Task output.
+        run_id (str): Airflow run id (ti.run_id).
+        name (str): Artifact name, unique within the run (e.g. the task id).
+        format (str): "arrow" (IPC file) or "parquet".
+        compression (str): Buffer/column codec, e.g. "lz4" or "zstd" (None = uncompressed,
+                           which lets Arrow readers map columns without copying).
+
+    Returns:
+        dict: ArtifactHandle as a dict, ready to return through XCom.
+    """
+    return write_artifact_chunks([df], run_id, name, format, compression)
+
+
+def write_artifact_chunks(chunks: Iterable[pd.DataFrame], run_id: str, name: str,
+                          format: str = DEFAULT_FORMAT,
+                          compression: Optional[str] = DEFAULT_COMPRESSION) -> Dict[str, Any]:
+    """
+    Same as write_artifact for a stream of DataFrames with the same columns,
+    written as they arrive so the whole output is never held in memory.
+    DataFrame.attrs are taken from the first chunk.
+    """
+    if format not in _SUFFIXES:
+        raise ValueError(f"Unsupported artifact format: {format}")
+    directory = run_dir(run_id)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name + _SUFFIXES[format])
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+
+    writer = sink = None
+    rows = 0
+    try:
+        for df in chunks:
+            table = _decode_dictionaries(pa.Table.from_pandas(df, preserve_index=False))
+            if writer is None:
+                # Keep DataFrame.attrs (e.g. coercion counts), as XCom pickling did,
+                # and which columns to re-categorize on read
+                metadata = dict(table.schema.metadata or {})
+                metadata[_ATTRS_KEY] = json.dumps(df.attrs, default=str).encode()
+                categorical = [c for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)]
+                metadata[_CATEGORICAL_KEY] = json.dumps(categorical).encode()
+                schema = table.schema.with_metadata(metadata)
+                if format == "arrow":
+                    sink = pa.OSFile(tmp_path, "wb")
+                    options = pa.ipc.IpcWriteOptions(compression=compression)
+                    writer = pa.ipc.new_file(sink, schema, options=options)
+                else:
+                    writer = pq.ParquetWriter(tmp_path, schema, compression=compression or "none")
+            if format == "arrow":
+                writer.write_table(table.cast(schema), max_chunksize=BATCH_ROWS)
+            else:
+                writer.write_table(table.cast(schema), row_group_size=BATCH_ROWS)
+            rows += table.num_rows
+        if writer is None:
+            raise ValueError(f"No data to write for artifact {name}")
+        writer.close()
+        writer = None
+        if sink is not None:
+            sink.close()
+            sink = None
+        os.replace(tmp_path, path)
+    finally:
+        if writer is not None:
+            writer.close()
+        if sink is not None:
+            sink.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    handle = ArtifactHandle(path, format, rows, os.path.getsize(path))
+    print(f"💾 Wrote {handle.rows} rows to {path} ({handle.bytes / 1e6:,.1f} MB)")
+    return handle.to_dict()
+
+
+def read_artifact(handle: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Memory-maps an artifact written by write_artifact and returns it as a DataFrame.
+    """
+    handle = ArtifactHandle.from_dict(handle)
+    if handle.format == "arrow":
+        with pa.memory_map(handle.path, "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+    else:
+        table = pq.read_table(handle.path, memory_map=True)
+
+    return _restore(table.to_pandas(), table.schema)
+
+
+def iter_artifact_chunks(handle: Dict[str, Any], chunksize: int) -> Iterator[pd.DataFrame]:
+    """
+    Streams an artifact as DataFrames of at most `chunksize` rows, so a stage
+    can process it without materializing the whole table at once: only the
+    record batches (of BATCH_ROWS) backing the current chunk are decompressed.
+    """
+    handle = ArtifactHandle.from_dict(handle)
+    if handle.format == "arrow":
+        with pa.memory_map(handle.path, "r") as source:
+            reader = pa.ipc.open_file(source)
+            pending, rows = [], 0
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                offset = 0
+                while offset < batch.num_rows:
+                    piece = batch.slice(offset, chunksize - rows)
+                    pending.append(piece)
+                    rows += piece.num_rows
+                    offset += piece.num_rows
+                    if rows == chunksize:
+                        yield _restore(pa.Table.from_batches(pending).to_pandas(), reader.schema)
+                        pending, rows = [], 0
+            if pending:
+                yield _restore(pa.Table.from_batches(pending).to_pandas(), reader.schema)
+    else:
+        parquet = pq.ParquetFile(handle.path, memory_map=True)
+        for batch in parquet.iter_batches(batch_size=chunksize):
+            yield _restore(batch.to_pandas(), parquet.schema_arrow)
+
+
+def estimate_memory_bytes(handle: Dict[str, Any], sample_rows: int = 10_000) -> int:
+    """
+    Estimates the memory an artifact takes once loaded as a DataFrame, from
+    the pandas size of its first rows; the file itself is compressed.
+    """
+    handle = ArtifactHandle.from_dict(handle)
+    if handle.rows == 0:
+        return 0
+    head = next(iter_artifact_chunks(handle.to_dict(), sample_rows), None)
+    if head is None or head.empty:
+        return 0
+    return int(head.memory_usage(index=False, deep=True).sum() / len(head) * handle.rows)
+
+
+def _decode_dictionaries(table: pa.Table) -> pa.Table:
+    # Category dictionaries differ between chunks (e.g. of a chunked transform),
+    # which the IPC file format cannot express; store plain values instead
+    for i, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(field.type.value_type))
+    return table
+
+
+def _metadata(schema: pa.Schema, key: bytes, default: Any) -> Any:
+    raw = (schema.metadata or {}).get(key)
+    return json.loads(raw) if raw else default
+
+
+def _restore(df: pd.DataFrame, schema: pa.Schema) -> pd.DataFrame:
+    # Re-categorize the columns written from categoricals and restore DataFrame.attrs
+    for column in _metadata(schema, _CATEGORICAL_KEY, []):
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    df.attrs = _metadata(schema, _ATTRS_KEY, {})
+    return df
+
+
+def remove_run(run_id: str) -> None:
+    """
+    Deletes a run's artifacts once they are no longer needed.
+    """
+    shutil.rmtree(run_dir(run_id), ignore_errors=True)
+
+
+def prune_artifacts(max_age_days: float = ARTIFACT_RETENTION_DAYS) -> None:
+    """
+    Deletes run directories (e.g. from failed runs) older than max_age_days.
+    """
+    root = artifact_root()
+    if not os.path.isdir(root):
+        return
+    cutoff = time.time() - max_age_days * 86400
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if os.path.isdir(path) and os.path.getmtime(path) < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
+            print(f"🧹 Pruned artifacts of {name}")
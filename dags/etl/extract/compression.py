@@ -0,0 +1,285 @@
+import gzip
+import io
+import mmap
+import os
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+# Compression detected from the file extension, or else from the magic bytes
+COMPRESSION_EXTENSIONS = {".gz": "gzip", ".gzip": "gzip", ".zst": "zstd", ".zstd": "zstd"}
+GZIP_MAGIC = b"\x1f\x8b\x08"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+_ZSTD_FRAME_MAGIC = 0xFD2FB528
+_ZSTD_SKIPPABLE_MIN, _ZSTD_SKIPPABLE_MAX = 0x184D2A50, 0x184D2A5F
+_STREAM_BUFFER_SIZE = 1 << 20
+# Members/frames are decoded in parallel only while each is at most this
+# large, compressed and decompressed, so the decode window holds at most
+# 2 x threads x PARALLEL_MEMBER_BYTES; larger ones are streamed serially
+PARALLEL_MEMBER_BYTES = 4 << 20
+
+
+def strip_compression_suffix(file_path: str) -> str:
+    """
+    Removes a compression extension, e.g. "events.ndjson.zst" -> "events.ndjson".
+    """
+    root, extension = os.path.splitext(file_path)
+    return root if extension.lower() in COMPRESSION_EXTENSIONS else file_path
+
+
+class InMemoryFile(NamedTuple):
+    """
+    A raw file that is already in memory, such as an object-store download.
+    The name (key) is used for reader and compression detection.
+    """
+    name: str
+    data: bytes
+
+
+def is_empty_input(source: Union[str, InMemoryFile]) -> bool:
+    """
+    Returns True for a zero-length raw file, e.g. an export with no records.
+    """
+    return len(source.data) == 0 if isinstance(source, InMemoryFile) else os.path.getsize(source) == 0
+
+
+def detect_compression(source: Union[str, InMemoryFile]) -> Optional[str]:
+    """
+    Returns "gzip", "zstd" or None, by extension first and magic bytes second.
+    """
+    name = source if isinstance(source, str) else source.name
+    extension = os.path.splitext(name)[1].lower()
+    if extension in COMPRESSION_EXTENSIONS:
+        return COMPRESSION_EXTENSIONS[extension]
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            head = f.read(4)
+    else:
+        head = bytes(source.data[:4])
+    if head.startswith(GZIP_MAGIC):
+        return "gzip"
+    if head.startswith(ZSTD_MAGIC):
+        return "zstd"
+    return None
+
+
+class _ChunkStream(io.RawIOBase):
+    """Read-only file object over an iterator of byte chunks."""
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._view = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not len(self._view):
+            try:
+                self._view = memoryview(next(self._chunks))
+            except StopIteration:
+                return 0
+        n = min(len(buffer), len(self._view))
+        buffer[:n] = self._view[:n]
+        self._view = self._view[n:]
+        return n
+
+
+class _BufferReader(io.RawIOBase):
+    """Read-only file object over a buffer (bytes or mmap), without copying it."""
+
+    def __init__(self, data, start: int = 0):
+        self._data = data
+        self._pos = start
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        chunk = self._data[self._pos:self._pos + len(buffer)]
+        buffer[:len(chunk)] = chunk
+        self._pos += len(chunk)
+        return len(chunk)
+
+
+def _decode_in_order(segments: List[Tuple[int, int]], decode: Callable[[int, int], Optional[bytes]],
+                     threads: int) -> Iterator[Tuple[Tuple[int, int], Optional[bytes]]]:
+    # Decodes independent segments in a thread pool, at most 2 x threads ahead
+    # of the consumer, and yields them in file order. `decode` returns None
+    # (and the consumer streams the rest serially) for a segment that is not
+    # a whole member or decodes to more than PARALLEL_MEMBER_BYTES
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        window = deque()
+        remaining = iter(segments)
+        for segment in remaining:
+            window.append((segment, pool.submit(decode, *segment)))
+            if len(window) >= 2 * threads:
+                break
+        while window:
+            segment, future = window.popleft()
+            following = next(remaining, None)
+            if following is not None:
+                window.append((following, pool.submit(decode, *following)))
+            yield segment, future.result()
+
+
+# ---------------------------------------------------------------- gzip ----
+
+def _gzip_member_offsets(data) -> List[int]:
+    # Candidate member headers; the flag/XFL/OS checks make false positives
+    # inside compressed data vanishingly rare, and decoding validates the rest
+    offsets = []
+    pos = data.find(GZIP_MAGIC)
+    while pos != -1:
+        header = data[pos:pos + 10]
+        if (len(header) == 10 and header[3] & 0xE0 == 0 and header[8] in (0, 2, 4)
+                and (header[9] <= 13 or header[9] == 255)):
+            offsets.append(pos)
+        pos = data.find(GZIP_MAGIC, pos + 1)
+    return offsets
+
+
+def _parallel_segments(segments: List[Tuple[int, int]], threads: int) -> bool:
+    return len(segments) > 1 and threads > 1 and all(end - start <= PARALLEL_MEMBER_BYTES
+                                                     for start, end in segments)
+
+
+def _iter_gzip(data, threads: int) -> Iterator[bytes]:
+    offsets = _gzip_member_offsets(data)
+    segments = list(zip(offsets, offsets[1:] + [len(data)]))
+    if not offsets or offsets[0] != 0 or not _parallel_segments(segments, threads):
+        yield from _iter_gzip_serial(data, 0)
+        return
+
+    def decode(start: int, end: int) -> Optional[bytes]:
+        decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            out = decoder.decompress(data[start:end], PARALLEL_MEMBER_BYTES)
+        except zlib.error:
+            return None
+        # A real member ends exactly at the next member header (and a longer
+        # output stops at the cap with input left over)
+        return out if decoder.eof and not decoder.unused_data else None
+
+    for (start, _), out in _decode_in_order(segments, decode, threads):
+        if out is None:
+            # A false boundary or an oversized member: finish the file sequentially
+            yield from _iter_gzip_serial(data, start)
+            return
+        yield out
+
+
+def _iter_gzip_serial(data, start: int) -> Iterator[bytes]:
+    stream = gzip.GzipFile(fileobj=io.BufferedReader(_BufferReader(data, start), _STREAM_BUFFER_SIZE))
+    for block in iter(lambda: stream.read(_STREAM_BUFFER_SIZE), b""):
+        yield block
+
+
+# ---------------------------------------------------------------- zstd ----
+
+def _zstd_frames(data) -> List[Tuple[int, int]]:
+    # Walks frame and block headers (no decompression) to find frame boundaries
+    frames = []
+    pos = 0
+    size = len(data)
+    while pos < size:
+        magic, = struct.unpack_from("<I", data, pos)
+        if _ZSTD_SKIPPABLE_MIN <= magic <= _ZSTD_SKIPPABLE_MAX:
+            pos += 8 + struct.unpack_from("<I", data, pos + 4)[0]
+            continue
+        if magic != _ZSTD_FRAME_MAGIC:
+            raise ValueError(f"Invalid zstd frame at byte {pos}")
+
+        descriptor = data[pos + 4]
+        single_segment = (descriptor >> 5) & 1
+        header = 1 + (0 if single_segment else 1) + (0, 1, 2, 4)[descriptor & 3]
+        header += (1 if single_segment else 0, 2, 4, 8)[descriptor >> 6]
+        end = pos + 4 + header
+        while True:
+            block = int.from_bytes(data[end:end + 3], "little")
+            block_type = (block >> 1) & 3
+            end += 3 + (1 if block_type == 1 else block >> 3)
+            if block & 1:
+                break
+        if (descriptor >> 2) & 1:
+            end += 4
+        frames.append((pos, end))
+        pos = end
+    return frames
+
+
+def _iter_zstd(data, threads: int) -> Iterator[bytes]:
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError("Reading .zst inputs requires the 'zstandard' package") from e
+
+    frames = _zstd_frames(data)
+    if not _parallel_segments(frames, threads):
+        yield from _iter_zstd_serial(zstandard, data, 0)
+        return
+
+    def decode(start: int, end: int) -> Optional[bytes]:
+        # Decompressor objects are not thread-safe; one per frame is cheap
+        reader = zstandard.ZstdDecompressor().stream_reader(data[start:end])
+        out = reader.read(PARALLEL_MEMBER_BYTES + 1)
+        return out if len(out) <= PARALLEL_MEMBER_BYTES else None
+
+    for (start, _), out in _decode_in_order(frames, decode, threads):
+        if out is None:
+            # An oversized frame: finish the file sequentially
+            yield from _iter_zstd_serial(zstandard, data, start)
+            return
+        yield out
+
+
+def _iter_zstd_serial(zstandard, data, start: int) -> Iterator[bytes]:
+    reader = zstandard.ZstdDecompressor().stream_reader(_BufferReader(data, start), read_across_frames=True)
+    for block in iter(lambda: reader.read(_STREAM_BUFFER_SIZE), b""):
+        yield block
+
+
+def _iter_decompressed(data, compression: str, threads: int) -> Iterator[bytes]:
+    return _iter_gzip(data, threads) if compression == "gzip" else _iter_zstd(data, threads)
+
+
+def _iter_mapped(file_path: str, compression: str, threads: int) -> Iterator[bytes]:
+    # The compressed file is memory-mapped for the lifetime of the stream
+    with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        yield from _iter_decompressed(data, compression, threads)
+
+
+def open_input(source: Union[str, InMemoryFile], threads: Optional[int] = None) -> BinaryIO:
+    """
+    Opens a raw input (a path or an InMemoryFile) for binary reading,
+    decompressing .gz/.zst on the fly.
+
+    Nothing is written to disk. Multi-member gzip files (pigz, bgzip, or
+    concatenated exports) and multi-frame zstd files are decoded member by
+    member in `threads` threads, a bounded window ahead of the reader;
+    single-member files, and files with a member larger than
+    PARALLEL_MEMBER_BYTES, are streamed sequentially.
+
+    Parameters:
+        source (str | InMemoryFile): Raw input file, compressed or not.
+        threads (int): Decompression threads (defaults to the CPU count).
+
+    Returns:
+        BinaryIO: Buffered stream of the decompressed bytes.
+    """
+    compression = detect_compression(source)
+    if compression is None:
+        return open(source, "rb") if isinstance(source, str) else io.BytesIO(source.data)
+
+    if is_empty_input(source):
+        # Holds no data, and a zero-length file cannot be memory-mapped
+        return io.BytesIO()
+    threads = threads or os.cpu_count() or 1
+    if isinstance(source, str):
+        chunks = _iter_mapped(source, compression, threads)
+    else:
+        chunks = _iter_decompressed(source.data, compression, threads)
+    return io.BufferedReader(_ChunkStream(chunks), buffer_size=_STREAM_BUFFER_SIZE)
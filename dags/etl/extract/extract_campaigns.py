@@ -1,21 +1,89 @@
+from functools import partial
+from typing import Iterator, Optional
+
 import pandas as pd
 
-def extract_campaign_data(file_path: str) -> pd.DataFrame:
+from .object_store import is_object_uri, iter_object_chunks
+from .partitions import extract_files, is_multi_file, resolve_input_files
+from .pushdown import Pushdown, project_schema
+from .readers import get_reader
+from .sampling import Sample, sample_chunks
+from .schema import CAMPAIGNS_SCHEMA, apply_schema, concat_typed
+from .staging import staged_chunks
+
+# Rows per parsed or staged chunk; campaign extracts are concatenated anyway
+CHUNKSIZE = 1_000_000
+
+def _parse_campaigns(file_path: str, workers: Optional[int],
+                     pushdown: Optional[Pushdown]) -> Iterator[pd.DataFrame]:
+    # The reader is chosen by file extension; NDJSON byte ranges are parsed in parallel
+    return get_reader(file_path)(file_path, CAMPAIGNS_SCHEMA, CHUNKSIZE, workers, pushdown)
+
+def extract_campaign_data(file_path: str, workers: Optional[int] = None,
+                          use_staging: bool = True, since: Optional[pd.Timestamp] = None,
+                          max_in_flight: Optional[int] = None, ordered: bool = True,
+                          pushdown: Optional[Pushdown] = None, sample: Optional[Sample] = None,
+                          modified_since: Optional[float] = None) -> pd.DataFrame:
     """
-    Extracts campaign data from a JSON file.
+    Extracts campaign data from a JSON, NDJSON or CSV file, or from every file
+    matching a glob/partition spec (parsed concurrently in `workers` processes).
 
     Parameters:
-        file_path (str): Path to the JSON file.
+        file_path (str): Path to a JSON, NDJSON (.ndjson/.jsonl) or CSV file,
+                         a glob/partition spec such as "dt=2025-07-10/hour=*",
+                         or an object-store prefix such as "s3://bucket/marketing_raw/".
+        workers (int): Worker processes for NDJSON input or multiple files (None = CPU count).
+        use_staging (bool): Read through the content-addressed staging cache.
+        since (pd.Timestamp): If set, only keep clicks with clicked_at after it.
+        max_in_flight (int): Cap on files parsed or buffered at once (multiple files).
+        ordered (bool): Concatenate files in partition order rather than completion order.
+        pushdown (Pushdown): Columns to materialize and null keys to reject while parsing.
+        sample (Sample): Development-mode sample to keep; recorded in df.attrs["sample"].
+        modified_since (float): Object-store prefixes only: skip objects last modified
+                                before it (epoch seconds).
 
     Returns:
-        pd.DataFrame: Campaign data as a DataFrame.
+        pd.DataFrame: Campaign data typed per CAMPAIGNS_SCHEMA.
     """
+    # Empty inputs still have the (projected) schema's columns
+    empty = apply_schema(pd.DataFrame(), project_schema(CAMPAIGNS_SCHEMA, pushdown))
     try:
-        df = pd.read_json(file_path)
-        df["clicked_at"] = pd.to_datetime(df["clicked_at"])
-        
-        print(f"✅ Successfully loaded {len(df)} campaign records from JSON.")
+        if is_multi_file(file_path):
+            # Hash sampling is per row, so workers apply it; a reservoir spans all files
+            worker_sample = sample if sample is not None and sample.method == "hash" else None
+            extract_one = partial(extract_campaign_data, workers=1, use_staging=use_staging,
+                                  since=since, pushdown=pushdown, sample=worker_sample)
+            chunks = extract_files(resolve_input_files(file_path), extract_one,
+                                   workers, max_in_flight, ordered)
+            if sample is not None and worker_sample is None:
+                chunks = sample_chunks(chunks, sample)
+            df = concat_typed([chunk for chunk in chunks if not chunk.empty] or [empty])
+            print(f"✅ Successfully loaded {len(df)} campaign records from {file_path}.")
+            return df
+
+        if is_object_uri(file_path):
+            # Objects are parsed from memory; the staging cache covers local files only
+            chunks = iter_object_chunks(file_path, CAMPAIGNS_SCHEMA, CHUNKSIZE, pushdown=pushdown,
+                                        modified_since=modified_since)
+        else:
+            chunks = _parse_campaigns(file_path, workers, pushdown)
+            if use_staging:
+                namespace = pushdown.namespace("campaigns") if pushdown else "campaigns"
+                chunks = staged_chunks(file_path, namespace, CAMPAIGNS_SCHEMA, chunks, CHUNKSIZE)
+        df = concat_typed(list(chunks) or [empty])
+        if since is not None:
+            df = df[df["clicked_at"] > since].reset_index(drop=True)
+        if sample is not None:
+            df = concat_typed(list(sample_chunks([df], sample))).reset_index(drop=True)
+            print(f"🎲 Sampled campaigns: {df.attrs.get('sample')}")
+
+        n_coerced = df.attrs.get("coerced_timestamps", {}).get("clicked_at", 0)
+        if n_coerced:
+            print(f"⚠️ Coerced {n_coerced} empty/invalid clicked_at values to NaT.")
+        print(f"✅ Successfully loaded {len(df)} campaign records from {file_path}.")
         return df
     except Exception as e:
-        print(f"❌ Error reading campaign JSON data: {e}")
-        return pd.DataFrame()
\ No newline at end of file
+        # Re-raised: an empty result would let the incremental extract move
+        # the file watermark past the unread file and skip it for good
+        print(f"❌ Error reading campaign data: {e}")
+        raise
@@ -1,23 +1,145 @@
+from functools import partial
+from typing import Iterator, Optional
+
 import pandas as pd
 
-def extract_game_events(file_path: str) -> pd.DataFrame:
- 
+from .object_store import is_object_uri, iter_object_chunks
+from .partitions import extract_files, is_multi_file, resolve_input_files
+from .pushdown import Pushdown, project_schema
+from .readers import get_reader
+from .sampling import Sample, sample_chunks
+from .schema import GAME_EVENTS_SCHEMA, apply_schema, concat_typed
+from .staging import staged_chunks
+
+# Rows per DataFrame chunk when streaming; bounds peak memory independently of file size
+DEFAULT_CHUNKSIZE = 100_000
+
+
+def _parse_game_event_chunks(file_path: str, chunksize: int, workers: Optional[int],
+                             pushdown: Optional[Pushdown]) -> Iterator[pd.DataFrame]:
+    # The reader is chosen by file extension (.json, .ndjson/.jsonl, .csv, ...)
+    return get_reader(file_path)(file_path, GAME_EVENTS_SCHEMA, chunksize, workers, pushdown)
+
+
+def iter_game_event_chunks(file_path: str, chunksize: int = DEFAULT_CHUNKSIZE,
+                           workers: Optional[int] = 1, use_staging: bool = True,
+                           since: Optional[pd.Timestamp] = None, max_in_flight: Optional[int] = None,
+                           ordered: bool = True, pushdown: Optional[Pushdown] = None,
+                           sample: Optional[Sample] = None,
+                           modified_since: Optional[float] = None) -> Iterator[pd.DataFrame]:
+    """
+    Streams game event data from a JSON, NDJSON or CSV file as DataFrame chunks.
+
+    The reader is picked from the reader registry by file extension. A
+    top-level JSON array is parsed incrementally, so only one chunk of
+    records is held in memory at a time. NDJSON files (.ndjson/.jsonl) are
+    streamed line by line, or split into newline-aligned byte ranges parsed by
+    `workers` processes, in which case each chunk is one range. CSV files go
+    through Arrow's multithreaded CSV engine. With staging
+    enabled, a file that was parsed before is read from the memory-mapped
+    staging cache instead.
+
+    A glob, directory or partition spec (e.g. "data/raw/dt=2025-07-10/hour=*")
+    fans the matching files out over `workers` processes; each chunk is then
+    one file. An object-store prefix (e.g. "s3://bucket/marketing_raw/")
+    is downloaded concurrently and parsed from memory.
+
+    A pushdown (e.g. transform_data.GAME_EVENTS_PUSHDOWN) limits parsing to
+    the columns the consumer uses and drops null-key events during parsing.
+    A sample (development mode) keeps a hash-on-user_id or reservoir sample.
+
+    Parameters:
+        file_path (str): Path to the JSON, NDJSON or CSV file, a glob/partition spec,
+                         or an object-store prefix.
+        chunksize (int): Maximum number of rows per chunk (single-process reads).
+        workers (int): Worker processes for NDJSON input or multiple files (None = CPU count).
+        use_staging (bool): Read through the content-addressed staging cache.
+        since (pd.Timestamp): If set, only keep events with event_time after it.
+        max_in_flight (int): Cap on files parsed or buffered at once (multiple files).
+        ordered (bool): Yield files in partition order rather than completion order.
+        pushdown (Pushdown): Columns to materialize and null keys to reject while parsing.
+        sample (Sample): Development-mode sample to keep (see sampling.py).
+        modified_since (float): Object-store prefixes only: skip objects last modified
+                                before it (epoch seconds).
+
+    Returns:
+        Iterator[pd.DataFrame]: Game event chunks typed per GAME_EVENTS_SCHEMA.
+    """
+    if is_multi_file(file_path):
+        # Hash sampling is per row, so workers apply it; a reservoir spans all files
+        worker_sample = sample if sample is not None and sample.method == "hash" else None
+        extract_one = partial(extract_game_events, chunksize=chunksize, workers=1, use_staging=use_staging,
+                              since=since, pushdown=pushdown, sample=worker_sample)
+        frames = extract_files(resolve_input_files(file_path), extract_one,
+                               workers, max_in_flight, ordered)
+        if sample is not None and worker_sample is None:
+            frames = sample_chunks(frames, sample)
+        return frames
+
+    if is_object_uri(file_path):
+        # Objects are parsed from memory; the staging cache covers local files only
+        chunks = iter_object_chunks(file_path, GAME_EVENTS_SCHEMA, chunksize, pushdown=pushdown,
+                                    modified_since=modified_since)
+    else:
+        chunks = _parse_game_event_chunks(file_path, chunksize, workers, pushdown)
+        if use_staging:
+            namespace = pushdown.namespace("game_events") if pushdown else "game_events"
+            chunks = staged_chunks(file_path, namespace, GAME_EVENTS_SCHEMA, chunks, chunksize)
+    if since is not None:
+        # Filter chunk by chunk so old events are dropped before concatenation
+        chunks = (chunk[chunk["event_time"] > since] for chunk in chunks)
+    if sample is not None:
+        chunks = sample_chunks(chunks, sample)
+    return chunks
+
+
+def extract_game_events(file_path: str, chunksize: int = DEFAULT_CHUNKSIZE,
+                        workers: Optional[int] = None, use_staging: bool = True,
+                        since: Optional[pd.Timestamp] = None, max_in_flight: Optional[int] = None,
+                        ordered: bool = True, pushdown: Optional[Pushdown] = None,
+                        sample: Optional[Sample] = None,
+                        modified_since: Optional[float] = None) -> pd.DataFrame:
+
     """
-    Extracts game event data from a JSON file.
+    Extracts game event data from a JSON, NDJSON or CSV file, or from every
+    file matching a glob/partition spec (formats may be mixed).
 
     Parameters:
-        file_path (str): Path to the JSON file.
+        file_path (str): Path to the JSON, NDJSON or CSV file, a glob/partition spec,
+                         or an object-store prefix.
+        chunksize (int): Rows parsed per chunk before concatenation.
+        workers (int): Worker processes for NDJSON input or multiple files (None = CPU count).
+        use_staging (bool): Read through the content-addressed staging cache.
+        since (pd.Timestamp): If set, only keep events with event_time after it.
+        max_in_flight (int): Cap on files parsed or buffered at once (multiple files).
+        ordered (bool): Concatenate files in partition order rather than completion order.
+        pushdown (Pushdown): Columns to materialize and null keys to reject while parsing.
+        sample (Sample): Development-mode sample to keep; recorded in df.attrs["sample"].
+        modified_since (float): Object-store prefixes only: skip objects last modified
+                                before it (epoch seconds).
 
     Returns:
         pd.DataFrame: Cleaned game event DataFrame.
     """
     try:
-        # Load JSON into DataFrame and parse event_time column
-        df = pd.read_json(file_path)
-        df["event_time"] = pd.to_datetime(df["event_time"])
-        
-        print(f"✅ Successfully loaded {len(df)} game event records from JSON.")
+        # Stream the JSON array in chunks and stitch them back together
+        chunks = list(iter_game_event_chunks(file_path, chunksize, workers, use_staging,
+                                             since, max_in_flight, ordered, pushdown, sample,
+                                             modified_since))
+        if not chunks:
+            # Empty inputs still have the (projected) schema's columns
+            chunks = [apply_schema(pd.DataFrame(), project_schema(GAME_EVENTS_SCHEMA, pushdown))]
+        df = concat_typed(chunks)
+
+        n_coerced = df.attrs.get("coerced_timestamps", {}).get("event_time", 0)
+        if n_coerced:
+            print(f"⚠️ Coerced {n_coerced} empty/invalid event_time values to NaT.")
+        if sample is not None:
+            print(f"🎲 Sampled game events: {df.attrs.get('sample')}")
+        print(f"✅ Successfully loaded {len(df)} game event records from {file_path}.")
         return df
     except Exception as e:
-        print(f"❌ Error reading game event JSON data: {e}")
-        return pd.DataFrame()
\ No newline at end of file
+        # Re-raised: an empty result would let the incremental extract move
+        # the file watermark past the unread file and skip it for good
+        print(f"❌ Error reading game event data: {e}")
+        raise
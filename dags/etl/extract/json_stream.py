@@ -0,0 +1,105 @@
+import json
+import re
+from typing import Any, Iterator, List, TextIO
+
+# Read raw text in 1 MiB blocks; only the current block plus one partially
+# decoded record is ever held in memory.
+DEFAULT_BLOCK_SIZE = 1 << 20
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def iter_json_array(fp: TextIO, block_size: int = DEFAULT_BLOCK_SIZE) -> Iterator[Any]:
+    """
+    Incrementally parses a top-level JSON array, yielding one element at a time.
+
+    Parameters:
+        fp (TextIO): Open text file positioned at the start of the array.
+        block_size (int): Number of characters read from the file per refill.
+
+    Returns:
+        Iterator[Any]: The decoded array elements, in file order.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def refill() -> bool:
+        # Drop everything already consumed and append the next block
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        block = fp.read(block_size)
+        if not block:
+            eof = True
+            return False
+        buf = buf[pos:] + block
+        pos = 0
+        return True
+
+    def peek() -> str:
+        # Skip whitespace and return the next significant character ("" at EOF)
+        nonlocal pos
+        while True:
+            pos = _WHITESPACE.match(buf, pos).end()
+            if pos < len(buf):
+                return buf[pos]
+            if not refill():
+                return ""
+
+    if peek() != "[":
+        raise ValueError("Expected a top-level JSON array")
+    pos += 1
+    if peek() == "]":
+        return
+
+    while True:
+        if not peek():
+            raise ValueError("Unterminated JSON array")
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            # The element is cut off by the end of the buffer; read more and retry
+            if refill():
+                continue
+            raise
+        if end == len(buf) and refill():
+            # A bare number/literal may continue in the next block
+            continue
+        pos = end
+        yield item
+
+        token = peek()
+        if token == ",":
+            pos += 1
+        elif token == "]":
+            return
+        else:
+            raise ValueError(f"Malformed JSON array: unexpected {token!r} after element")
+
+
+def iter_json_array_chunks(fp: TextIO, chunksize: int,
+                           block_size: int = DEFAULT_BLOCK_SIZE) -> Iterator[List[Any]]:
+    """
+    Groups the elements of a top-level JSON array into lists of at most `chunksize`.
+
+    Parameters:
+        fp (TextIO): Open text file positioned at the start of the array.
+        chunksize (int): Maximum number of elements per chunk.
+        block_size (int): Number of characters read from the file per refill.
+
+    Returns:
+        Iterator[List[Any]]: Consecutive chunks of array elements.
+    """
+    if chunksize < 1:
+        raise ValueError("chunksize must be a positive integer")
+
+    chunk = []
+    for item in iter_json_array(fp, block_size):
+        chunk.append(item)
+        if len(chunk) >= chunksize:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,175 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from .pushdown import Pushdown, read_json_table, records_to_frame
+
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+
+# Ranges smaller than this are not worth shipping to another process
+MIN_RANGE_BYTES = 16 << 20
+
+
+def is_ndjson(file_path: str) -> bool:
+    """
+    Returns True if the file extension marks a JSON Lines (NDJSON) file.
+    """
+    return file_path.lower().endswith(NDJSON_EXTENSIONS)
+
+
+def split_byte_ranges(file_path: str, n_ranges: int) -> List[Tuple[int, int]]:
+    """
+    Cuts a file into at most `n_ranges` contiguous byte ranges aligned to newlines.
+
+    Every range starts at the beginning of a line and ends just after a newline
+    (or at end of file), so each one can be parsed independently.
+
+    Parameters:
+        file_path (str): Path to the NDJSON file.
+        n_ranges (int): Desired number of ranges.
+
+    Returns:
+        List[Tuple[int, int]]: (start, end) byte offsets, end exclusive.
+    """
+    size = os.path.getsize(file_path)
+    if size == 0:
+        return []
+
+    n_ranges = max(1, min(n_ranges, size))
+    boundaries = [0]
+    with open(file_path, "rb") as f:
+        for i in range(1, n_ranges):
+            target = size * i // n_ranges
+            if target <= boundaries[-1]:
+                continue
+            # Move to the first line that starts after the target offset
+            f.seek(target - 1)
+            f.readline()
+            offset = f.tell()
+            if boundaries[-1] < offset < size:
+                boundaries.append(offset)
+    boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def parse_ndjson_lines(data: bytes) -> List[dict]:
+    """
+    Decodes a block of newline-delimited JSON, skipping blank lines.
+    """
+    # One json.loads over the joined lines is ~2x faster than a call per line
+    lines = [line for line in data.splitlines() if line.strip()]
+    return json.loads(b"[" + b",".join(lines) + b"]")
+
+
+def frame_from_ndjson(data: bytes, pushdown: Optional[Pushdown] = None,
+                      schema: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """
+    Decodes a block of NDJSON into a DataFrame.
+
+    With a pushdown and the extract schema, Arrow's JSON reader decodes only
+    the pushed-down fields; blocks it cannot type fall back to json.loads.
+    """
+    if pushdown is not None and schema is not None:
+        table = read_json_table(data, schema, pushdown)
+        if table is not None:
+            return table.to_pandas()
+    return records_to_frame(parse_ndjson_lines(data), pushdown)
+
+
+def read_ndjson_range(file_path: str, start: int, end: int, pushdown: Optional[Pushdown] = None,
+                      schema: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """
+    Parses the records in one newline-aligned byte range of an NDJSON file.
+
+    Parameters:
+        file_path (str): Path to the NDJSON file.
+        start (int): First byte of the range.
+        end (int): Byte offset just past the range.
+        pushdown (Pushdown): Columns to keep and null keys to reject while parsing.
+        schema (dict): Extract schema; lets a pushdown use Arrow's JSON reader.
+
+    Returns:
+        pd.DataFrame: Records from the range, in file order.
+    """
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return frame_from_ndjson(data, pushdown, schema)
+
+
+def iter_ndjson_blocks(fp: BinaryIO, chunksize: int) -> Iterator[bytes]:
+    """
+    Streams an NDJSON file as byte blocks of at most `chunksize` non-blank lines.
+    """
+    if chunksize < 1:
+        raise ValueError("chunksize must be a positive integer")
+
+    lines = []
+    for line in fp:
+        if not line.strip():
+            continue
+        lines.append(line if line.endswith(b"\n") else line + b"\n")
+        if len(lines) >= chunksize:
+            yield b"".join(lines)
+            lines = []
+    if lines:
+        yield b"".join(lines)
+
+
+def iter_ndjson_chunks(fp: BinaryIO, chunksize: int) -> Iterator[List[dict]]:
+    """
+    Streams an NDJSON file as lists of at most `chunksize` decoded records.
+    """
+    for block in iter_ndjson_blocks(fp, chunksize):
+        yield parse_ndjson_lines(block)
+
+
+def _iter_range_frames(file_path: str, ranges: List[Tuple[int, int]], workers: int,
+                       pushdown: Optional[Pushdown],
+                       schema: Optional[Dict[str, str]]) -> Iterator[pd.DataFrame]:
+    if workers <= 1 or len(ranges) <= 1:
+        for start, end in ranges:
+            yield read_ndjson_range(file_path, start, end, pushdown, schema)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        starts, ends = zip(*ranges)
+        # map() yields results in submission order, i.e. file order
+        yield from pool.map(read_ndjson_range, [file_path] * len(ranges), starts, ends,
+                            [pushdown] * len(ranges), [schema] * len(ranges))
+
+
+def read_ndjson(file_path: str, workers: Optional[int] = None, iterator: bool = False,
+                min_range_bytes: int = MIN_RANGE_BYTES, pushdown: Optional[Pushdown] = None,
+                schema: Optional[Dict[str, str]] = None) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    """
+    Reads an NDJSON file by parsing newline-aligned byte ranges in parallel processes.
+
+    Parameters:
+        file_path (str): Path to the NDJSON file.
+        workers (int): Number of worker processes (defaults to the CPU count).
+        iterator (bool): If True, return an iterator of per-range DataFrames in
+                         file order instead of one concatenated DataFrame.
+        min_range_bytes (int): Smallest byte range handed to a worker.
+        pushdown (Pushdown): Columns to keep and null keys to reject while parsing.
+        schema (dict): Extract schema; lets a pushdown use Arrow's JSON reader.
+
+    Returns:
+        pd.DataFrame | Iterator[pd.DataFrame]: Parsed records, in file order.
+    """
+    workers = workers or os.cpu_count() or 1
+    size = os.path.getsize(file_path)
+    n_ranges = max(1, min(workers, size // max(min_range_bytes, 1)))
+    ranges = split_byte_ranges(file_path, n_ranges)
+
+    frames = _iter_range_frames(file_path, ranges, workers, pushdown, schema)
+    if iterator:
+        return frames
+
+    frames = list(frames)
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
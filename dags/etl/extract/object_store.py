@@ -0,0 +1,210 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+import pandas as pd
+
+from .compression import InMemoryFile, strip_compression_suffix
+from .pushdown import Pushdown
+from .readers import get_reader, registered_extensions
+
+# Objects larger than this are fetched as concurrent ranged GETs of RANGE_BYTES
+MULTIPART_THRESHOLD = 16 << 20
+RANGE_BYTES = 8 << 20
+# Concurrent requests (and pooled HTTP connections); downloads are I/O bound
+DEFAULT_THREADS = 16
+
+OBJECT_URI_SCHEMES = ("s3://", "file://")
+
+
+class ObjectInfo(NamedTuple):
+    key: str
+    size: int
+    last_modified: float
+
+
+class LocalObjectStore:
+    """
+    Filesystem stand-in for S3: object keys are paths relative to `root`.
+
+    `latency` adds a fixed delay to every request, to benchmark concurrency
+    offline as if each GET were a network round trip.
+    """
+
+    def __init__(self, root: str, latency: float = 0.0):
+        self.root = root
+        self.latency = latency
+
+    def list(self, prefix: str = "") -> List[ObjectInfo]:
+        objects = []
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(directory, name)
+                key = os.path.relpath(path, self.root).replace(os.sep, "/")
+                if key.startswith(prefix):
+                    stat = os.stat(path)
+                    objects.append(ObjectInfo(key, stat.st_size, stat.st_mtime))
+        return sorted(objects)
+
+    def get_range(self, key: str, start: int, end: int) -> bytes:
+        if self.latency:
+            time.sleep(self.latency)
+        with open(os.path.join(self.root, key), "rb") as f:
+            f.seek(start)
+            return f.read(end - start)
+
+
+class S3ObjectStore:
+    """
+    S3 bucket accessed through one boto3 client whose connection pool is
+    sized for `max_connections` concurrent requests (boto3 clients are
+    thread-safe; sessions are not).
+    """
+
+    def __init__(self, bucket: str, max_connections: int = DEFAULT_THREADS, client=None):
+        import boto3
+        from botocore.config import Config
+
+        self.bucket = bucket
+        self.client = client or boto3.client(
+            "s3",
+            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+            region_name=os.getenv("AWS_DEFAULT_REGION", "us-west-2"),
+            config=Config(max_pool_connections=max_connections, retries={"mode": "adaptive"}),
+        )
+
+    def list(self, prefix: str = "") -> List[ObjectInfo]:
+        objects = []
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for item in page.get("Contents", []):
+                objects.append(ObjectInfo(item["Key"], item["Size"], item["LastModified"].timestamp()))
+        return sorted(objects)
+
+    def get_range(self, key: str, start: int, end: int) -> bytes:
+        response = self.client.get_object(Bucket=self.bucket, Key=key, Range=f"bytes={start}-{end - 1}")
+        return response["Body"].read()
+
+
+ObjectStore = Union[LocalObjectStore, S3ObjectStore]
+
+
+def is_object_uri(spec: str) -> bool:
+    """
+    Returns True for object-store prefixes such as "s3://bucket/marketing_raw/".
+    """
+    return spec.startswith(OBJECT_URI_SCHEMES)
+
+
+def open_object_store(uri: str, threads: int = DEFAULT_THREADS) -> Tuple[ObjectStore, str]:
+    """
+    Resolves "s3://bucket/prefix" or "file:///local/root" into a store and key prefix.
+    """
+    if uri.startswith("s3://"):
+        bucket, _, prefix = uri[len("s3://"):].partition("/")
+        return S3ObjectStore(bucket, max_connections=threads), prefix
+    if uri.startswith("file://"):
+        return LocalObjectStore(uri[len("file://"):]), ""
+    raise ValueError(f"Unsupported object store URI: {uri}")
+
+
+def _byte_ranges(size: int, range_bytes: int) -> List[Tuple[int, int]]:
+    if size <= MULTIPART_THRESHOLD:
+        return [(0, size)]
+    return [(start, min(start + range_bytes, size)) for start in range(0, size, range_bytes)]
+
+
+def iter_objects(store: ObjectStore, objects: List[ObjectInfo], threads: int = DEFAULT_THREADS,
+                 max_in_flight: Optional[int] = None,
+                 range_bytes: int = RANGE_BYTES) -> Iterator[InMemoryFile]:
+    """
+    Downloads objects concurrently and yields them, in order, as in-memory files.
+
+    Every GET (whole small objects, or byte ranges of large ones) runs in one
+    pool of `threads` threads, so downloads overlap with the caller parsing
+    the previous object. At most `max_in_flight` objects are downloaded or
+    buffered ahead of the caller.
+
+    Parameters:
+        store (ObjectStore): S3 bucket or local stand-in.
+        objects (list): Objects to download, e.g. from store.list(prefix).
+        threads (int): Concurrent GET requests.
+        max_in_flight (int): Objects fetched ahead of the consumer (defaults to threads).
+        range_bytes (int): Ranged GET size for objects above MULTIPART_THRESHOLD.
+
+    Returns:
+        Iterator[InMemoryFile]: Object bytes named by key.
+    """
+    max_in_flight = max(1, max_in_flight or threads)
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        window = deque()
+        remaining = iter(objects)
+
+        def submit(info: ObjectInfo) -> None:
+            window.append((info, [pool.submit(store.get_range, info.key, start, end)
+                                  for start, end in _byte_ranges(info.size, range_bytes)]))
+
+        for info in remaining:
+            submit(info)
+            if len(window) >= max_in_flight:
+                break
+        while window:
+            info, parts = window.popleft()
+            following = next(remaining, None)
+            if following is not None:
+                submit(following)
+            data = parts[0].result() if len(parts) == 1 else b"".join(part.result() for part in parts)
+            yield InMemoryFile(info.key, data)
+
+
+def list_readable_objects(store: ObjectStore, prefix: str,
+                          modified_since: Optional[float] = None) -> List[ObjectInfo]:
+    """
+    Lists the objects under a prefix that have a registered reader, optionally
+    only those last modified at or after `modified_since` (epoch seconds).
+
+    The bound is inclusive because S3 reports LastModified to the second: an
+    object landing in the same second as the newest one already read would
+    otherwise be skipped for good.
+    """
+    extensions = registered_extensions()
+    return [info for info in store.list(prefix)
+            if strip_compression_suffix(info.key).lower().endswith(extensions)
+            and (modified_since is None or info.last_modified >= modified_since)]
+
+
+def iter_object_chunks(uri: str, schema: Dict[str, str], chunksize: int,
+                       threads: int = DEFAULT_THREADS, store: Optional[ObjectStore] = None,
+                       pushdown: Optional[Pushdown] = None,
+                       modified_since: Optional[float] = None) -> Iterator[pd.DataFrame]:
+    """
+    Streams every raw object under an object-store prefix as typed chunks.
+
+    Objects are parsed straight from memory (decompressing .gz/.zst on the
+    fly) by the reader registered for their extension; nothing is written
+    to local disk. Keys without a registered reader are skipped.
+
+    Parameters:
+        uri (str): Prefix such as "s3://bucket/marketing_raw/game_events/".
+        schema (dict): Extract schema passed to the readers.
+        chunksize (int): Maximum rows per chunk.
+        threads (int): Concurrent downloads.
+        store (ObjectStore): Store to read from instead of resolving `uri`;
+                             `uri` is then the key prefix.
+        pushdown (Pushdown): Columns to materialize and null keys to reject while parsing.
+        modified_since (float): If set, skip objects last modified before it (epoch seconds).
+
+    Returns:
+        Iterator[pd.DataFrame]: Typed chunks, in key order.
+    """
+    if store is None:
+        store, prefix = open_object_store(uri, threads)
+    else:
+        prefix = uri
+    objects = list_readable_objects(store, prefix, modified_since)
+    print(f"☁️ {len(objects)} objects, {sum(o.size for o in objects) / 1e6:,.1f} MB under {uri}")
+    for obj in iter_objects(store, objects, threads):
+        yield from get_reader(obj.name)(obj, schema, chunksize, 1, pushdown)
@@ -0,0 +1,153 @@
+import glob
+import os
+import re
+import statistics
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from .compression import strip_compression_suffix
+from .object_store import is_object_uri
+from .readers import registered_extensions
+
+# A file is a straggler when it takes this many times the median file time
+STRAGGLER_FACTOR = 3.0
+
+_GLOB_CHARS = re.compile(r"[*?\[]")
+_DIGITS = re.compile(r"(\d+)")
+
+
+def is_multi_file(spec: str) -> bool:
+    """
+    Returns True if `spec` is a local glob, partition spec or directory rather
+    than one file (object-store prefixes are listed by the object store).
+    """
+    if is_object_uri(spec):
+        return False
+    return bool(_GLOB_CHARS.search(spec)) or os.path.isdir(spec)
+
+
+def _natural_key(path: str) -> List[object]:
+    # hour=2 sorts before hour=10
+    return [int(part) if part.isdigit() else part for part in _DIGITS.split(path)]
+
+
+def resolve_input_files(spec: str, base_dir: Optional[str] = None,
+                        extensions: Optional[Tuple[str, ...]] = None) -> List[str]:
+    """
+    Expands a file path, glob or partition spec into a sorted list of raw files.
+
+    Partition specs are globs over directories, e.g. "dt=2025-07-10/hour=*";
+    every raw file below a matched directory is included.
+
+    Parameters:
+        spec (str): File, directory, glob or partition spec.
+        base_dir (str): Directory relative specs are resolved against.
+        extensions (tuple): File extensions collected from matched directories
+                            (defaults to every extension with a registered reader;
+                            compressed variants such as .json.gz are included).
+
+    Returns:
+        List[str]: Matching files in natural (partition) order.
+    """
+    pattern = os.path.join(base_dir, spec) if base_dir else spec
+    extensions = extensions or registered_extensions()
+    files = set()
+    for match in glob.glob(pattern, recursive=True):
+        if os.path.isfile(match):
+            files.add(match)
+            continue
+        for root, _, names in os.walk(match):
+            files.update(os.path.join(root, name) for name in names
+                         if strip_compression_suffix(name).lower().endswith(extensions))
+    return sorted(files, key=_natural_key)
+
+
+def _timed_extract(extract_fn: Callable[[str], pd.DataFrame], file_path: str) -> Tuple[pd.DataFrame, float]:
+    start = time.perf_counter()
+    df = extract_fn(file_path)
+    return df, time.perf_counter() - start
+
+
+def _report_stragglers(timings: Dict[str, float]) -> None:
+    if len(timings) < 3:
+        return
+    median = statistics.median(timings.values())
+    slow = {path: seconds for path, seconds in timings.items()
+            if median > 0 and seconds > STRAGGLER_FACTOR * median}
+    for path, seconds in sorted(slow.items(), key=lambda item: -item[1]):
+        print(f"🐢 Straggler: {path} took {seconds:.2f}s ({seconds / median:.1f}x the median {median:.2f}s)")
+
+
+def extract_files(file_paths: List[str], extract_fn: Callable[[str], pd.DataFrame],
+                  workers: Optional[int] = None, max_in_flight: Optional[int] = None,
+                  ordered: bool = True) -> Iterator[pd.DataFrame]:
+    """
+    Runs an extractor over many files concurrently in a process pool.
+
+    At most `max_in_flight` files are being parsed or waiting to be consumed at
+    any time, so memory stays bounded regardless of the number of files.
+    Per-file throughput is logged, followed by any stragglers.
+
+    Parameters:
+        file_paths (list): Files to extract.
+        extract_fn (callable): Picklable single-file extractor (e.g. a
+                               functools.partial of extract_game_events).
+        workers (int): Worker processes (defaults to the CPU count).
+        max_in_flight (int): Cap on files parsed or buffered at once
+                             (defaults to 2 x workers).
+        ordered (bool): Yield frames in file order; otherwise in completion order.
+
+    Returns:
+        Iterator[pd.DataFrame]: One DataFrame per file.
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, len(file_paths) or 1))
+    max_in_flight = max(1, max_in_flight or 2 * workers)
+    timings = {}
+
+    def log(path: str, df: pd.DataFrame, seconds: float) -> None:
+        timings[path] = seconds
+        size_mb = os.path.getsize(path) / 1e6 if os.path.isfile(path) else 0.0
+        rate = len(df) / seconds if seconds > 0 else float("inf")
+        print(f"📄 {path}: {len(df)} rows, {size_mb:,.1f} MB in {seconds:.2f}s ({rate:,.0f} rows/s)")
+
+    if workers == 1:
+        for path in file_paths:
+            df, seconds = _timed_extract(extract_fn, path)
+            log(path, df, seconds)
+            yield df
+        _report_stragglers(timings)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {}    # future -> file index
+        done = {}       # file index -> DataFrame waiting for its turn (ordered mode)
+        next_submit = 0
+        next_yield = 0
+
+        while next_yield < len(file_paths):
+            # Top up the pool without exceeding the in-flight cap
+            while next_submit < len(file_paths) and len(pending) + len(done) < max_in_flight:
+                future = pool.submit(_timed_extract, extract_fn, file_paths[next_submit])
+                pending[future] = next_submit
+                next_submit += 1
+
+            if ordered and next_yield in done:
+                yield done.pop(next_yield)
+                next_yield += 1
+                continue
+
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index = pending.pop(future)
+                df, seconds = future.result()
+                log(file_paths[index], df, seconds)
+                if ordered:
+                    done[index] = df
+                else:
+                    next_yield += 1
+                    yield df
+
+    _report_stragglers(timings)
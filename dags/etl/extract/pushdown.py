@@ -0,0 +1,104 @@
+from itertools import compress
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.json as pajson
+
+# Arrow types the C++ JSON reader decodes pushed-down fields into; apply_schema
+# then casts them exactly as it casts values decoded by json.loads
+_JSON_FIELD_TYPES = {
+    "Int32": pa.int64(),
+    "Int64": pa.int64(),
+    "float32": pa.float64(),
+    "cents": pa.float64(),
+    "category": pa.string(),
+    "string[pyarrow]": pa.string(),
+    "datetime64[ns]": pa.string(),
+}
+
+
+class Pushdown(NamedTuple):
+    """
+    Columns and null-key filter a consumer needs from an extract.
+
+    The readers apply both while parsing: only `columns` are materialized
+    (other raw fields are never turned into DataFrame columns), and records
+    with a null or missing value in any `not_null` field are rejected before
+    a DataFrame is built.
+
+    columns:  raw field names to keep, e.g. "revenue" rather than "revenue_cents"
+    not_null: raw fields that must be present and non-null
+    """
+    columns: Tuple[str, ...]
+    not_null: Tuple[str, ...] = ()
+
+    def namespace(self, name: str) -> str:
+        # Staged extracts are projected and filtered, so the pushdown is part of the key
+        return f"{name}[{','.join(self.columns)}|{','.join(self.not_null)}]"
+
+
+def project_schema(schema: Dict[str, str], pushdown: Optional[Pushdown]) -> Dict[str, str]:
+    """
+    Restricts a schema to the pushed-down columns (unchanged without a pushdown).
+    """
+    if pushdown is None:
+        return schema
+    return {column: dtype for column, dtype in schema.items() if column in pushdown.columns}
+
+
+def records_to_frame(records: List[dict], pushdown: Optional[Pushdown]) -> pd.DataFrame:
+    """
+    Builds a DataFrame from decoded records, keeping only the pushed-down
+    columns and rows whose not_null fields are set.
+    """
+    if pushdown is None:
+        return pd.DataFrame.from_records(records)
+
+    data = {column: [record.get(column) for record in records] for column in pushdown.columns}
+    if pushdown.not_null:
+        keep = np.ones(len(records), dtype=bool)
+        for column in pushdown.not_null:
+            values = data[column] if column in data else [record.get(column) for record in records]
+            keep &= np.fromiter((value is not None for value in values), dtype=bool, count=len(records))
+        if not keep.all():
+            mask = keep.tolist()
+            data = {column: list(compress(values, mask)) for column, values in data.items()}
+    return pd.DataFrame(data)
+
+
+def filter_table(table: pa.Table, pushdown: Optional[Pushdown]) -> pa.Table:
+    """
+    Drops rows of an Arrow table whose not_null columns are null or missing.
+    """
+    if pushdown is None or not pushdown.not_null:
+        return table
+    if any(column not in table.column_names for column in pushdown.not_null):
+        return table.slice(0, 0)
+    mask = pc.is_valid(table[pushdown.not_null[0]])
+    for column in pushdown.not_null[1:]:
+        mask = pc.and_(mask, pc.is_valid(table[column]))
+    return table.filter(mask)
+
+
+def read_json_table(data: bytes, schema: Dict[str, str], pushdown: Pushdown) -> Optional[pa.Table]:
+    """
+    Decodes a block of NDJSON with Arrow's C++ reader, materializing only the
+    pushed-down columns (other fields are skipped by the parser) and rejecting
+    null-key rows.
+
+    Returns None when a pushed-down column has no declared type or the raw
+    values do not match it (e.g. ids sent as strings), so the caller can fall
+    back to json.loads.
+    """
+    if any(column not in schema for column in pushdown.columns):
+        return None
+    fields = [pa.field(column, _JSON_FIELD_TYPES[schema[column]]) for column in pushdown.columns]
+    parse_options = pajson.ParseOptions(explicit_schema=pa.schema(fields), unexpected_field_behavior="ignore")
+    try:
+        table = pajson.read_json(pa.BufferReader(data), parse_options=parse_options)
+    except pa.ArrowInvalid:
+        return None
+    return filter_table(table, pushdown)
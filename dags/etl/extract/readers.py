@@ -0,0 +1,126 @@
+import io
+from typing import Callable, Dict, Iterator, Optional, Tuple, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+from .compression import (InMemoryFile, detect_compression, is_empty_input, open_input,
+                          strip_compression_suffix)
+from .json_stream import iter_json_array_chunks
+from .ndjson import frame_from_ndjson, iter_ndjson_blocks, read_ndjson
+from .pushdown import Pushdown, filter_table, project_schema, records_to_frame
+from .schema import apply_schema
+
+# A reader turns one raw file (a path, or an InMemoryFile such as an
+# object-store download) into typed DataFrame chunks, applying an optional
+# projection/null-key pushdown while parsing:
+#   reader(file_path, schema, chunksize, workers, pushdown=None) -> Iterator[pd.DataFrame]
+# A zero-length file (e.g. an export with no records) yields no chunks, in any format
+Source = Union[str, InMemoryFile]
+Reader = Callable[..., Iterator[pd.DataFrame]]
+
+_READERS: Dict[str, Reader] = {}
+
+# Arrow types the CSV engine parses each declared column into; timestamps and
+# money stay raw and go through the same casts as the JSON readers
+_CSV_COLUMN_TYPES = {
+    "Int32": pa.int32(),
+    "Int64": pa.int64(),
+    "float32": pa.float32(),
+    "cents": pa.float64(),
+    "category": pa.dictionary(pa.int32(), pa.string()),
+    "string[pyarrow]": pa.string(),
+    "datetime64[ns]": pa.string(),
+}
+
+
+def register_reader(*extensions: str) -> Callable[[Reader], Reader]:
+    """
+    Registers a reader for one or more file extensions (e.g. ".csv").
+    """
+    def decorator(reader: Reader) -> Reader:
+        for extension in extensions:
+            _READERS[extension.lower()] = reader
+        return reader
+    return decorator
+
+
+def registered_extensions() -> Tuple[str, ...]:
+    return tuple(_READERS)
+
+
+def get_reader(file_path: str) -> Reader:
+    """
+    Picks the reader for a file by its (longest matching) extension, ignoring
+    a compression suffix: "events.ndjson.zst" is read by the NDJSON reader.
+    """
+    name = strip_compression_suffix(file_path).lower()
+    for extension in sorted(_READERS, key=len, reverse=True):
+        if name.endswith(extension):
+            return _READERS[extension]
+    raise ValueError(f"No reader registered for {file_path} "
+                     f"(supported: {', '.join(sorted(_READERS))})")
+
+
+@register_reader(".json")
+def read_json_array(file_path: Source, schema: Dict[str, str], chunksize: int,
+                    workers: Optional[int] = 1, pushdown: Optional[Pushdown] = None) -> Iterator[pd.DataFrame]:
+    """
+    Streams a top-level JSON array in chunks of at most `chunksize` typed rows.
+    """
+    if is_empty_input(file_path):
+        return
+    schema = project_schema(schema, pushdown)
+    with io.TextIOWrapper(open_input(file_path), encoding="utf-8") as fp:
+        for records in iter_json_array_chunks(fp, chunksize):
+            yield apply_schema(records_to_frame(records, pushdown), schema)
+
+
+@register_reader(".ndjson", ".jsonl")
+def read_json_lines(file_path: Source, schema: Dict[str, str], chunksize: int,
+                    workers: Optional[int] = 1, pushdown: Optional[Pushdown] = None) -> Iterator[pd.DataFrame]:
+    """
+    Streams NDJSON line by line (workers=1), or parses newline-aligned byte
+    ranges in `workers` processes, yielding one typed chunk per range.
+    Compressed and in-memory files are always streamed. With a pushdown,
+    only the pushed-down fields are decoded (by Arrow's JSON reader).
+    """
+    if is_empty_input(file_path):
+        return
+    schema = project_schema(schema, pushdown)
+    if workers != 1 and isinstance(file_path, str) and detect_compression(file_path) is None:
+        for df in read_ndjson(file_path, workers=workers, iterator=True, pushdown=pushdown, schema=schema):
+            yield apply_schema(df, schema)
+        return
+
+    with open_input(file_path) as fp:
+        for block in iter_ndjson_blocks(fp, chunksize):
+            yield apply_schema(frame_from_ndjson(block, pushdown, schema), schema)
+
+
+@register_reader(".csv")
+def read_csv(file_path: Source, schema: Dict[str, str], chunksize: int,
+             workers: Optional[int] = 1, pushdown: Optional[Pushdown] = None) -> Iterator[pd.DataFrame]:
+    """
+    Reads a CSV file with Arrow's multithreaded columnar CSV engine.
+
+    Declared columns are parsed straight into their Arrow types; timestamps
+    are then decoded on the ISO-8601 fast path by apply_schema. With a
+    pushdown, other columns are skipped by the CSV engine and null-key rows
+    are filtered out of the Arrow table.
+    """
+    if is_empty_input(file_path):
+        return
+    schema = project_schema(schema, pushdown)
+    convert_options = pacsv.ConvertOptions(
+        column_types={column: _CSV_COLUMN_TYPES[dtype] for column, dtype in schema.items()},
+        strings_can_be_null=True,
+        include_columns=list(pushdown.columns) if pushdown else None,
+        include_missing_columns=pushdown is not None,
+    )
+    with open_input(file_path) as fp:
+        table = pacsv.read_csv(fp, read_options=pacsv.ReadOptions(use_threads=True),
+                               convert_options=convert_options)
+    for batch in filter_table(table, pushdown).to_batches(max_chunksize=chunksize):
+        yield apply_schema(batch.to_pandas(), schema)
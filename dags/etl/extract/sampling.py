@@ -0,0 +1,123 @@
+from typing import Any, Dict, Iterable, Iterator, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from .schema import concat_typed, count_coerced_timestamps
+
+SAMPLE_METHODS = ("hash", "reservoir")
+
+_PRIORITY = "_sample_priority"
+_ORDER = "_sample_order"
+
+
+class Sample(NamedTuple):
+    """
+    Development-mode sampling of an extract, applied in one streaming pass.
+
+    method "hash":      keep rows whose `key` hashes below `rate`. Deterministic,
+                        so game events and campaign clicks of the same users are
+                        kept together and joins stay consistent.
+    method "reservoir": uniform random sample of exactly `size` rows (or all
+                        rows if there are fewer).
+    """
+    method: str = "hash"
+    rate: Optional[float] = None
+    size: Optional[int] = None
+    key: str = "user_id"
+    seed: int = 0
+
+    def metadata(self, rows_seen: Optional[int] = None, rows_kept: Optional[int] = None) -> Dict[str, Any]:
+        if self.method == "hash":
+            return {"method": "hash", "rate": self.rate, "key": self.key, "seed": self.seed}
+        rate = rows_kept / rows_seen if rows_seen else 1.0
+        return {"method": "reservoir", "rate": rate, "size": self.size,
+                "rows_seen": rows_seen, "seed": self.seed}
+
+
+def sample_from_config(method: str = "hash", rate: Optional[float] = None,
+                       size: Optional[int] = None, seed: int = 0) -> Optional[Sample]:
+    """
+    Builds a Sample from CLI/DAG parameters, or None when sampling is off.
+    """
+    if method not in SAMPLE_METHODS:
+        raise ValueError(f"Unknown sample method {method!r} (expected one of {SAMPLE_METHODS})")
+    if method == "hash":
+        if rate is None:
+            return None
+        if not 0 < rate <= 1:
+            raise ValueError("sample rate must be in (0, 1]")
+        return Sample("hash", rate=float(rate), seed=int(seed))
+    if size is None:
+        return None
+    if size < 1:
+        raise ValueError("reservoir sample size must be a positive integer")
+    return Sample("reservoir", size=int(size), seed=int(seed))
+
+
+def hash_sample_mask(values: pd.Series, rate: float, seed: int = 0) -> np.ndarray:
+    """
+    Returns a boolean mask keeping ~`rate` of the distinct values, the same
+    ones on every run and in every extract; null values are dropped.
+    """
+    present = values.notna().to_numpy()
+    ids = values.astype("Int64").fillna(0).to_numpy("int64")
+    hashes = pd.util.hash_array(ids, hash_key=f"{seed:016d}"[-16:], categorize=False)
+    threshold = np.uint64(min(int(rate * 2 ** 64), 2 ** 64 - 1))
+    return present & (hashes < threshold)
+
+
+def _hash_sample(chunks: Iterable[pd.DataFrame], sample: Sample) -> Iterator[pd.DataFrame]:
+    for chunk in chunks:
+        attrs = dict(chunk.attrs)
+        if sample.key in chunk.columns:
+            chunk = chunk[hash_sample_mask(chunk[sample.key], sample.rate, sample.seed)]
+        chunk.attrs = {**attrs, "sample": sample.metadata()}
+        yield chunk
+
+
+def _reservoir_sample(chunks: Iterable[pd.DataFrame], sample: Sample) -> Iterator[pd.DataFrame]:
+    # Bottom-k by random priority is a uniform sample of size k, and lets whole
+    # chunks be filtered against the current k-th priority without a row loop
+    rng = np.random.default_rng(sample.seed)
+    reservoir = None
+    rows_seen = 0
+    coerced = {}
+    for chunk in chunks:
+        # Coercion counts describe the whole input, not just the sampled rows
+        for column, n in count_coerced_timestamps([chunk]).items():
+            coerced[column] = coerced.get(column, 0) + n
+        chunk = chunk.assign(**{_PRIORITY: rng.random(len(chunk)),
+                                _ORDER: np.arange(rows_seen, rows_seen + len(chunk))})
+        rows_seen += len(chunk)
+        if reservoir is not None and len(reservoir) >= sample.size:
+            chunk = chunk[chunk[_PRIORITY] < reservoir[_PRIORITY].max()]
+        reservoir = chunk if reservoir is None else concat_typed([reservoir, chunk])
+        if len(reservoir) > sample.size:
+            reservoir = reservoir.nsmallest(sample.size, _PRIORITY)
+
+    if reservoir is None:
+        return
+    df = reservoir.sort_values(_ORDER).drop(columns=[_PRIORITY, _ORDER]).reset_index(drop=True)
+    df.attrs = {"coerced_timestamps": coerced, "sample": sample.metadata(rows_seen, len(df))}
+    yield df
+
+
+def sample_chunks(chunks: Iterable[pd.DataFrame], sample: Sample) -> Iterator[pd.DataFrame]:
+    """
+    Samples a stream of extracted chunks in a single pass.
+
+    Hash sampling filters chunk by chunk; reservoir sampling holds at most
+    `size` rows and yields one DataFrame when the stream ends. The sampling
+    parameters (and the realized rate) are recorded in df.attrs["sample"].
+
+    Parameters:
+        chunks (Iterable[pd.DataFrame]): Typed extract chunks.
+        sample (Sample): Sampling method and rate/size.
+
+    Returns:
+        Iterator[pd.DataFrame]: The sampled chunks.
+    """
+    if sample.method == "hash":
+        return _hash_sample(chunks, sample)
+    return _reservoir_sample(chunks, sample)
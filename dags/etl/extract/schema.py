@@ -0,0 +1,160 @@
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from .timestamps import parse_iso_timestamps
+
+# Declared column types for the raw extracts. Columns not listed here are
+# passed through untouched.
+#   Int32            ids (nullable, 4 bytes instead of int64/float64)
+#   category         low-cardinality labels stored as a dictionary + int codes
+#   string[pyarrow]  high-cardinality strings in one contiguous Arrow buffer
+#   float32          measures where 7 significant digits are plenty
+#   cents            money as exact integer cents in a `<name>_cents` Int64 column
+#   datetime64[ns]   timestamps
+GAME_EVENTS_SCHEMA = {
+    "user_id": "Int32",
+    "session_id": "string[pyarrow]",
+    "playtime_minutes": "float32",
+    "revenue": "cents",
+    "event_time": "datetime64[ns]",
+}
+
+CAMPAIGNS_SCHEMA = {
+    "user_id": "Int32",
+    "campaign_name": "category",
+    "source": "category",
+    "clicked_at": "datetime64[ns]",
+}
+
+CENTS_PER_UNIT = 100
+
+
+def to_cents(values: pd.Series) -> pd.Series:
+    """
+    Converts a money column in currency units to exact integer cents (nullable Int64).
+    """
+    amount = pd.to_numeric(values, errors="coerce").astype("float64")
+    return pd.Series(np.round(amount * CENTS_PER_UNIT), index=values.index).astype("Int64")
+
+
+def revenue_cents(df: pd.DataFrame) -> pd.Series:
+    """
+    Returns revenue in integer cents from either a typed or an untyped frame.
+    """
+    if "revenue_cents" in df.columns:
+        return df["revenue_cents"]
+    return to_cents(df["revenue"])
+
+
+def _cast(values: pd.Series, dtype: str) -> pd.Series:
+    if dtype in ("Int32", "Int64"):
+        return pd.to_numeric(values, errors="coerce").astype(dtype)
+    if dtype == "float32":
+        return pd.to_numeric(values, errors="coerce").astype("float32")
+    return values.astype(dtype)
+
+
+def apply_schema(df: pd.DataFrame, schema: Dict[str, str]) -> pd.DataFrame:
+    """
+    Casts a freshly parsed DataFrame to a declared schema.
+
+    Missing schema columns are added as all-null columns so every chunk of an
+    extract has the same layout. Timestamps go through the ISO-8601 fast path;
+    the number of values coerced to NaT per column is recorded in
+    df.attrs["coerced_timestamps"].
+
+    Parameters:
+        df (pd.DataFrame): Raw parsed records.
+        schema (dict): Column name -> declared type (see GAME_EVENTS_SCHEMA).
+
+    Returns:
+        pd.DataFrame: The typed DataFrame.
+    """
+    coerced = {}
+    for column, dtype in schema.items():
+        values = df[column] if column in df.columns else pd.Series(np.nan, index=df.index)
+        if dtype == "cents":
+            df[f"{column}_cents"] = to_cents(values)
+            if column in df.columns:
+                df = df.drop(columns=column)
+        elif dtype == "datetime64[ns]":
+            df[column], coerced[column] = parse_iso_timestamps(values)
+        else:
+            df[column] = _cast(values, dtype)
+    df.attrs["coerced_timestamps"] = coerced
+    return df
+
+
+def count_coerced_timestamps(frames: List[pd.DataFrame]) -> Dict[str, int]:
+    """
+    Sums the per-column timestamp coercion counts recorded by apply_schema.
+    """
+    totals = {}
+    for f in frames:
+        for column, n in f.attrs.get("coerced_timestamps", {}).items():
+            totals[column] = totals.get(column, 0) + n
+    return totals
+
+
+def concat_typed(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenates typed chunks, keeping categorical columns categorical.
+
+    pd.concat falls back to object dtype when chunk categories differ, so the
+    category dictionaries are unified first.
+    """
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+
+    for column in frames[0].columns:
+        if isinstance(frames[0][column].dtype, pd.CategoricalDtype):
+            present = [f[column] for f in frames if column in f.columns]
+            categories = union_categoricals(present, ignore_order=True).categories
+            for f in frames:
+                if column in f.columns:
+                    f[column] = f[column].cat.set_categories(categories)
+    coerced = count_coerced_timestamps(frames)
+    sample = frames[0].attrs.get("sample")
+    df = pd.concat(frames, ignore_index=True)
+    df.attrs["coerced_timestamps"] = coerced
+    if sample is not None:
+        # Development-mode sampling metadata (see sampling.py) is the same for every chunk
+        df.attrs["sample"] = sample
+    return df
+
+
+def bytes_per_row(df: pd.DataFrame) -> pd.Series:
+    """
+    Returns the deep in-memory size of each column divided by the row count.
+    """
+    rows = max(len(df), 1)
+    return df.memory_usage(deep=True, index=False) / rows
+
+
+def schema_report(raw_df: pd.DataFrame, typed_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compares bytes per row of a pandas-inferred frame and its typed equivalent.
+
+    Parameters:
+        raw_df (pd.DataFrame): Frame with pandas-inferred dtypes.
+        typed_df (pd.DataFrame): The same data after apply_schema.
+
+    Returns:
+        pd.DataFrame: Per-column dtypes and bytes/row before and after, with a TOTAL row.
+    """
+    before = bytes_per_row(raw_df)
+    after = bytes_per_row(typed_df)
+    report = pd.DataFrame({
+        "dtype_before": raw_df.dtypes.astype(str),
+        "bytes_before": before,
+    }).join(pd.DataFrame({
+        "dtype_after": typed_df.dtypes.astype(str),
+        "bytes_after": after,
+    }), how="outer")
+    report.loc["TOTAL", ["bytes_before", "bytes_after"]] = [before.sum(), after.sum()]
+    return report
@@ -0,0 +1,257 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, Iterator, Optional
+
+import pandas as pd
+import pyarrow as pa
+
+# Bump when the on-disk layout or the parsing logic changes to invalidate old entries
+STAGING_FORMAT_VERSION = 1
+
+DEFAULT_STAGING_DIR = os.path.join(tempfile.gettempdir(), "marketing_staging")
+DEFAULT_STAGING_MAX_BYTES = 20 << 30
+
+_HASH_BLOCK_SIZE = 8 << 20
+_SUFFIX = ".arrow"
+
+
+class StagingCache:
+    """
+    Content-addressed cache of parsed raw extracts stored as Arrow IPC files.
+
+    Entries are keyed by a hash of the raw file contents plus the extract's
+    namespace and schema, so an unchanged file is parsed only once. Cached
+    files are memory-mapped on read. When the cache grows past `max_bytes`,
+    the least recently used entries are evicted.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir or os.getenv("MARKETING_STAGING_DIR", DEFAULT_STAGING_DIR)
+        self.max_bytes = max_bytes if max_bytes is not None else int(
+            os.getenv("MARKETING_STAGING_MAX_BYTES", DEFAULT_STAGING_MAX_BYTES))
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._index_path = os.path.join(self.cache_dir, "index.json")
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + _SUFFIX)
+
+    def _load_index(self) -> Dict[str, Dict[str, str]]:
+        # "files": file fingerprint -> content hash, "entries": cache key -> content hash
+        try:
+            with open(self._index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        if not isinstance(index.get("files"), dict) or not isinstance(index.get("entries"), dict):
+            return {"files": {}, "entries": {}}
+        return index
+
+    def _save_index(self, index: Dict[str, Dict[str, str]]) -> None:
+        tmp_path = f"{self._index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self._index_path)
+
+    def content_hash(self, file_path: str) -> str:
+        """
+        Returns the BLAKE2b hash of a file's contents.
+
+        The hash is remembered per (path, size, mtime) so an unchanged file is
+        not read twice just to compute its key.
+        """
+        stat = os.stat(file_path)
+        fingerprint = f"{os.path.abspath(file_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+        files = self._load_index()["files"]
+        if fingerprint in files:
+            return files[fingerprint]
+
+        digest = hashlib.blake2b(digest_size=20)
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+        index = self._load_index()
+        index["files"][fingerprint] = digest.hexdigest()
+        self._save_index(index)
+        return index["files"][fingerprint]
+
+    def key(self, file_path: str, namespace: str, schema: Dict[str, str]) -> str:
+        """
+        Builds the cache key for a raw file parsed under a given namespace and schema.
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"{STAGING_FORMAT_VERSION}:{namespace}:".encode())
+        digest.update(json.dumps(schema, sort_keys=True).encode())
+        content_hash = self.content_hash(file_path)
+        digest.update(content_hash.encode())
+        key = digest.hexdigest()
+        index = self._load_index()
+        if index["entries"].get(key) != content_hash:
+            # Keeps the file's hash indexed for as long as an entry may use it
+            index["entries"][key] = content_hash
+            self._save_index(index)
+        return key
+
+    def contains(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def read_chunks(self, key: str, schema: Dict[str, str], chunksize: int) -> Iterator[pd.DataFrame]:
+        """
+        Memory-maps a cached entry and yields it as DataFrame chunks.
+
+        Parameters:
+            key (str): Cache key from StagingCache.key.
+            schema (dict): Schema the entry was written with; restores categoricals.
+            chunksize (int): Maximum number of rows per chunk.
+
+        Returns:
+            Iterator[pd.DataFrame]: The cached rows, in original order.
+        """
+        path = self._path(key)
+        # Touch the entry so eviction sees it as recently used
+        os.utime(path)
+        with pa.memory_map(path, "r") as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                for offset in range(0, batch.num_rows, chunksize):
+                    yield _restore_frame(batch.slice(offset, chunksize).to_pandas(), schema)
+
+    def write_through(self, key: str, chunks: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """
+        Passes chunks through while appending them to a new cache entry.
+
+        The entry only becomes visible once every chunk has been written, so a
+        failed or abandoned parse never leaves a partial file behind.
+
+        Parameters:
+            key (str): Cache key from StagingCache.key.
+            chunks (Iterator[pd.DataFrame]): Freshly parsed, typed chunks.
+
+        Returns:
+            Iterator[pd.DataFrame]: The same chunks, unchanged.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        writer = None
+        schema = None
+        committed = False
+        try:
+            with pa.OSFile(tmp_path, "wb") as sink:
+                for chunk in chunks:
+                    table = _decode_dictionaries(pa.Table.from_pandas(chunk, preserve_index=False))
+                    if writer is None:
+                        schema = table.schema
+                        writer = pa.ipc.new_file(sink, schema)
+                    writer.write_table(table.cast(schema))
+                    yield chunk
+                if writer is not None:
+                    writer.close()
+            if writer is not None:
+                os.replace(tmp_path, self._path(key))
+                committed = True
+                self.evict()
+        finally:
+            if not committed and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def evict(self) -> None:
+        """
+        Deletes least recently used entries until the cache fits in max_bytes,
+        and drops index records that no longer describe a cached entry.
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(_SUFFIX):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.cache_dir, name))
+            total -= size
+            print(f"🧹 Evicted staged extract {name} ({size / 1e6:,.1f} MB)")
+        self._prune_index()
+
+    def _prune_index(self) -> None:
+        # Entries whose file was evicted (or never committed) go, and with them
+        # the hashes of files no cached entry was parsed from
+        index = self._load_index()
+        entries = {key: content_hash for key, content_hash in index["entries"].items()
+                   if os.path.exists(self._path(key))}
+        live = set(entries.values())
+        files = {fingerprint: content_hash for fingerprint, content_hash in index["files"].items()
+                 if content_hash in live and _is_current(fingerprint)}
+        if entries != index["entries"] or files != index["files"]:
+            self._save_index({"files": files, "entries": entries})
+
+
+def _is_current(fingerprint: str) -> bool:
+    # Whether "path:size:mtime_ns" still describes the file at path
+    path, size, mtime_ns = fingerprint.rsplit(":", 2)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    return f"{stat.st_size}:{stat.st_mtime_ns}" == f"{size}:{mtime_ns}"
+
+
+def _decode_dictionaries(table: pa.Table) -> pa.Table:
+    # Category dictionaries differ between chunks, which the IPC file format
+    # cannot express; store plain values and re-categorize on read
+    for i, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(field.type.value_type))
+    return table
+
+
+def _restore_frame(df: pd.DataFrame, schema: Dict[str, str]) -> pd.DataFrame:
+    # Parse-time attrs (e.g. coercion counts) belong to the first write, not to reads
+    df.attrs.clear()
+    for column, dtype in schema.items():
+        if dtype == "category" and column in df.columns:
+            df[column] = df[column].astype("category")
+    return df
+
+
+_default_cache = None
+
+
+def default_staging_cache() -> StagingCache:
+    """
+    Returns the process-wide cache configured by MARKETING_STAGING_DIR and
+    MARKETING_STAGING_MAX_BYTES.
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = StagingCache()
+    return _default_cache
+
+
+def staged_chunks(file_path: str, namespace: str, schema: Dict[str, str],
+                  parse_chunks: Iterator[pd.DataFrame], chunksize: int,
+                  cache: Optional[StagingCache] = None) -> Iterator[pd.DataFrame]:
+    """
+    Reads a raw file through the staging cache.
+
+    Parameters:
+        file_path (str): Raw input file.
+        namespace (str): Extract name, e.g. "game_events".
+        schema (dict): Schema the parser applies (part of the cache key).
+        parse_chunks (Iterator[pd.DataFrame]): Lazy parser over the raw file;
+                                               only consumed on a cache miss.
+        chunksize (int): Maximum rows per chunk on a cache hit.
+        cache (StagingCache): Cache to use (defaults to default_staging_cache()).
+
+    Returns:
+        Iterator[pd.DataFrame]: Typed chunks, from the cache when possible.
+    """
+    cache = cache or default_staging_cache()
+    key = cache.key(file_path, namespace, schema)
+    if cache.contains(key):
+        print(f"📦 Using staged extract for {file_path}")
+        return cache.read_chunks(key, schema, chunksize)
+    return cache.write_through(key, parse_chunks)
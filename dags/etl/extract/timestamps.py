@@ -0,0 +1,132 @@
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Fixed layout of the raw timestamps: YYYY-MM-DDTHH:MM:SS (a space is accepted
+# in place of the "T", as written by CSV exports)
+ISO_LAYOUT = "%Y-%m-%dT%H:%M:%S"
+_LAYOUT_LENGTH = 19
+_SEPARATORS = {4: b"-", 7: b"-", 13: b":", 16: b":"}
+_DATE_TIME_SEPARATORS = (ord("T"), ord(" "))
+_DIGIT_POSITIONS = [i for i in range(_LAYOUT_LENGTH) if i not in _SEPARATORS and i != 10]
+_DAYS_IN_MONTH = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31], dtype=np.int64)
+
+# Rows decoded per vectorized block; keeps the temporary character matrix cache-sized
+_BLOCK_ROWS = 1 << 16
+
+
+class ParsedTimestamps(NamedTuple):
+    """
+    Result of parse_iso_timestamps.
+
+    values:    datetime64[ns] Series aligned with the input, NaT where unparseable
+    n_coerced: non-null inputs (empty strings included) that were turned into NaT
+    """
+    values: pd.Series
+    n_coerced: int
+
+
+def _days_from_civil(year: np.ndarray, month: np.ndarray, day: np.ndarray) -> np.ndarray:
+    # Days since 1970-01-01 for proleptic Gregorian dates (H. Hinnant's algorithm)
+    year = year - (month <= 2)
+    era = np.floor_divide(year, 400)
+    year_of_era = year - era * 400
+    day_of_year = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def _parse_fixed_layout(chars: np.ndarray) -> np.ndarray:
+    """
+    Decodes an (n, 19) uint8 matrix of fixed-layout timestamps to int64 epoch
+    seconds, with np.iinfo(np.int64).min where the text is not a valid timestamp.
+    """
+    valid = np.isin(chars[:, 10], _DATE_TIME_SEPARATORS)
+    for position, separator in _SEPARATORS.items():
+        valid &= chars[:, position] == separator[0]
+
+    digits = chars[:, _DIGIT_POSITIONS].astype(np.int64) - ord("0")
+    valid &= ((digits >= 0) & (digits <= 9)).all(axis=1)
+
+    year = digits[:, 0:4] @ np.array([1000, 100, 10, 1])
+    month, day, hour, minute, second = (
+        digits[:, i] * 10 + digits[:, i + 1] for i in range(4, 14, 2)
+    )
+
+    valid &= (month >= 1) & (month <= 12)
+    month = np.where(valid, month, 1)
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    month_length = _DAYS_IN_MONTH[month] + ((month == 2) & leap)
+    valid &= (day >= 1) & (day <= month_length) & (hour < 24) & (minute < 60) & (second < 60)
+    # Stay inside the datetime64[ns] range
+    valid &= (year >= 1678) & (year <= 2261)
+
+    seconds = _days_from_civil(year, month, day) * 86400 + hour * 3600 + minute * 60 + second
+    return np.where(valid, seconds, np.iinfo(np.int64).min)
+
+
+def _as_arrow_strings(values: pd.Series) -> pa.Array:
+    array = pa.array(values, from_pandas=True)
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    if pa.types.is_large_string(array.type):
+        array = array.cast(pa.string())
+    elif not pa.types.is_string(array.type):
+        raise TypeError(f"Expected timestamp strings, got {array.type}")
+    return array
+
+
+def parse_iso_timestamps(values: pd.Series) -> ParsedTimestamps:
+    """
+    Parses ISO-8601 timestamps without per-call format inference.
+
+    Strings in the fixed YYYY-MM-DDTHH:MM:SS layout are validated and decoded
+    with vectorized arithmetic straight from the Arrow string buffer. Empty
+    strings become NaT in bulk; the rare values in any other layout go through
+    pd.to_datetime(format="ISO8601") and become NaT if that fails too; values
+    with a UTC offset are converted to naive UTC.
+
+    Parameters:
+        values (pd.Series): Raw timestamp strings (object or Arrow-backed).
+
+    Returns:
+        ParsedTimestamps: datetime64[ns] values and the number of coerced rows.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        return ParsedTimestamps(values.astype("datetime64[ns]"), 0)
+
+    try:
+        array = _as_arrow_strings(values)
+    except (TypeError, pa.ArrowInvalid, pa.ArrowTypeError):
+        # Not string-like (e.g. epoch numbers); leave it to the general parser
+        parsed = pd.to_datetime(values, errors="coerce").astype("datetime64[ns]")
+        return ParsedTimestamps(parsed, int(parsed.isna().sum() - values.isna().sum()))
+
+    n = len(array)
+    is_null = array.is_null().to_numpy(zero_copy_only=False)
+    offsets = np.frombuffer(array.buffers()[1], dtype=np.int32)[array.offset:array.offset + n + 1]
+    lengths = np.diff(offsets)
+    seconds = np.full(n, np.iinfo(np.int64).min, dtype=np.int64)
+
+    fixed = np.flatnonzero((lengths == _LAYOUT_LENGTH) & ~is_null)
+    if len(fixed):
+        data = np.frombuffer(array.buffers()[2], dtype=np.uint8)
+        columns = np.arange(_LAYOUT_LENGTH)
+        for start in range(0, len(fixed), _BLOCK_ROWS):
+            rows = fixed[start:start + _BLOCK_ROWS]
+            seconds[rows] = _parse_fixed_layout(data[offsets[rows, None] + columns])
+
+    parsed = pd.Series(seconds.view("datetime64[s]").astype("datetime64[ns]"), index=values.index)
+
+    # Other non-empty layouts (fractional seconds, offsets, ...) take the slow path
+    other = np.flatnonzero((lengths != _LAYOUT_LENGTH) & (lengths > 0) & ~is_null)
+    if len(other):
+        # Offsets are normalised to naive UTC like the rest of the column
+        fallback = pd.to_datetime(values.iloc[other], format="ISO8601", errors="coerce", utc=True)
+        fallback = fallback.dt.tz_convert(None)
+        parsed.iloc[other] = fallback.astype("datetime64[ns]").to_numpy()
+
+    n_coerced = int(parsed.isna().sum() - is_null.sum())
+    return ParsedTimestamps(parsed, n_coerced)
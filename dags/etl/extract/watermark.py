@@ -0,0 +1,186 @@
+import json
+import os
+from functools import partial
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+from .object_store import is_object_uri, list_readable_objects, open_object_store
+from .partitions import extract_files
+from .sampling import Sample, sample_chunks
+from .schema import apply_schema, concat_typed
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+DEFAULT_STATE_DIR = os.path.join(PROJECT_ROOT, "data", "state")
+
+
+class Watermark(NamedTuple):
+    """
+    High-water mark of one extract source.
+
+    event_time: latest record timestamp already processed (records at or
+                before it are skipped, including late-arriving ones in new
+                files: there is no lateness allowance, since re-reading a
+                window would append its records to the summary twice)
+    file_mtime: latest raw file modification time already processed (files
+                not modified since are skipped without being opened)
+    """
+    event_time: Optional[pd.Timestamp] = None
+    file_mtime: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Optional[str]]:
+        return {
+            "event_time": self.event_time.isoformat() if self.event_time is not None else None,
+            "file_mtime": self.file_mtime,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Optional[str]]) -> "Watermark":
+        event_time = data.get("event_time")
+        return cls(pd.Timestamp(event_time) if event_time else None, data.get("file_mtime"))
+
+
+class WatermarkStore:
+    """
+    Persists per-source watermarks in a small JSON file.
+
+    Marks only ever move forward, and are meant to be advanced after the run
+    that consumed the data has been loaded, so a failed run is re-read.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        state_dir = os.getenv("MARKETING_STATE_DIR", DEFAULT_STATE_DIR)
+        self.path = path or os.path.join(state_dir, "watermarks.json")
+
+    def _load(self) -> Dict[str, Dict[str, Optional[str]]]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def get(self, source: str) -> Watermark:
+        return Watermark.from_dict(self._load().get(source, {}))
+
+    def advance(self, source: str, mark: Watermark) -> Watermark:
+        """
+        Moves a source's watermark forward to `mark` and persists it.
+
+        Parameters:
+            source (str): Extract source name, e.g. "game_events".
+            mark (Watermark): Candidate watermark from extract_incremental.
+
+        Returns:
+            Watermark: The stored watermark (never earlier than before).
+        """
+        current = self.get(source)
+        merged = Watermark(
+            _latest(current.event_time, mark.event_time),
+            _latest(current.file_mtime, mark.file_mtime),
+        )
+
+        state = self._load()
+        state[source] = merged.to_dict()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.path)
+        print(f"🔖 Watermark for {source}: {merged.to_dict()}")
+        return merged
+
+
+def _latest(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return max(a, b)
+
+
+def select_new_files(file_paths: List[str], mark: Watermark) -> Tuple[List[str], Optional[float]]:
+    """
+    Returns the files and object-store prefixes holding data modified after
+    the watermark's file_mtime, and the latest modification time among them.
+
+    A prefix is kept when any of its objects was last modified at or after
+    file_mtime (see list_readable_objects); the extractor then downloads only
+    those objects, and records it re-reads are dropped by event_time.
+    """
+    selected, mtimes = [], []
+    for path in file_paths:
+        if is_object_uri(path):
+            store, prefix = open_object_store(path)
+            objects = list_readable_objects(store, prefix, mark.file_mtime)
+            if objects:
+                selected.append(path)
+                mtimes.append(max(o.last_modified for o in objects))
+        else:
+            mtime = os.path.getmtime(path)
+            if mark.file_mtime is None or mtime > mark.file_mtime:
+                selected.append(path)
+                mtimes.append(mtime)
+    return selected, max(mtimes) if mtimes else None
+
+
+def extract_incremental(source: str, file_paths: List[str],
+                        extract_fn: Callable[..., pd.DataFrame], time_column: str,
+                        schema: Dict[str, str], store: Optional[WatermarkStore] = None,
+                        workers: Optional[int] = None,
+                        sample: Optional[Sample] = None) -> Tuple[pd.DataFrame, Watermark]:
+    """
+    Extracts only the files and records newer than a source's watermark.
+
+    The stored watermark is not changed; pass the returned candidate to
+    WatermarkStore.advance once the data has been loaded. A file that fails
+    to parse raises instead of counting as read, so the candidate never
+    moves past it. Records at or before the stored event_time are dropped
+    even when they arrive late in a new file (see Watermark).
+
+    A sampled (development) run reads the whole source regardless of the
+    production watermark, and returns the stored watermark unchanged as its
+    candidate, so advancing with it can never move the mark.
+
+    Parameters:
+        source (str): Extract source name, e.g. "game_events".
+        file_paths (list): Raw files of the source.
+        extract_fn (callable): Extractor accepting (file_path, workers=..., since=...,
+                               sample=..., modified_since=...).
+        time_column (str): Record timestamp column, e.g. "event_time".
+        schema (dict): Extract schema; an empty result still has these columns.
+        store (WatermarkStore): Watermark persistence (defaults to WatermarkStore()).
+        workers (int): Processes parsing the new files concurrently (None = CPU count).
+        sample (Sample): Development-mode sample of all records (see sampling.py).
+
+    Returns:
+        Tuple[pd.DataFrame, Watermark]: New records and the candidate watermark.
+    """
+    store = store or WatermarkStore()
+    stored = store.get(source)
+    mark = stored if sample is None else Watermark()
+    files, latest_mtime = select_new_files(file_paths, mark)
+    if not files:
+        print(f"⏭️ No {source} files modified since the last run.")
+        return apply_schema(pd.DataFrame(), schema), stored
+
+    # Hash sampling is per row, so each file applies it; a reservoir spans all files
+    worker_sample = sample if sample is not None and sample.method == "hash" else None
+    extract_one = partial(extract_fn, workers=1, since=mark.event_time, sample=worker_sample,
+                          modified_since=mark.file_mtime)
+    frames = extract_files(files, extract_one, workers)
+    if sample is not None and worker_sample is None:
+        frames = sample_chunks(frames, sample)
+    frames = [f for f in frames if not f.empty]
+    df = concat_typed(frames) if frames else apply_schema(pd.DataFrame(), schema)
+
+    if sample is not None:
+        print(f"🎲 Sampled {len(df)} {source} records from {len(files)} file(s), ignoring the watermark.")
+        return df, stored
+
+    latest_record = df[time_column].max()
+    candidate = Watermark(
+        _latest(mark.event_time, None if pd.isna(latest_record) else latest_record),
+        _latest(mark.file_mtime, latest_mtime),
+    )
+    print(f"✅ {len(df)} new {source} records from {len(files)} file(s) after {mark.event_time}.")
+    return df, candidate
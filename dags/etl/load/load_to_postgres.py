@@ -1,43 +1,162 @@
 import os
+from typing import Iterable, NamedTuple, Optional
+
 import pandas as pd
 import psycopg2  # ✅ You need this import
-from sqlalchemy import create_engine, text
+from sqlalchemy import LargeBinary, create_engine, inspect, text
 from dotenv import load_dotenv
 
-def load_to_postgres(df: pd.DataFrame, table_name: str = "user_campaign_summary"):
+# Column definitions of the tables the pipeline creates
+SUMMARY_COLUMNS = """
+                    user_id INTEGER,
+                    campaign_name TEXT,     
+                    source TEXT,
+                    clicked_at TIMESTAMP,
+                    total_playtime FLOAT,
+                    total_revenue FLOAT
+"""
+SESSION_COLUMNS = """
+                    user_id BIGINT,
+                    session_id TEXT,
+                    session_start TIMESTAMP,
+                    session_end TIMESTAMP,
+                    duration_minutes FLOAT,
+                    event_count BIGINT,
+                    total_playtime FLOAT,
+                    total_revenue FLOAT
+"""
+ATTRIBUTION_COLUMNS = """
+                    user_id INTEGER,
+                    campaign_name TEXT,
+                    source TEXT,
+                    clicked_at TIMESTAMP,
+                    attributed_events FLOAT,
+                    attributed_playtime FLOAT,
+                    attributed_revenue FLOAT,
+                    attribution_model TEXT
+"""
+ROLLUP_COLUMNS = """
+                    day TIMESTAMP,
+                    campaign_name TEXT,
+                    source TEXT,
+                    grouping_id INTEGER,
+                    clicks BIGINT,
+                    unique_users BIGINT,
+                    total_playtime FLOAT,
+                    total_revenue FLOAT
+"""
+SKETCH_COLUMNS = """
+                    day TIMESTAMP,
+                    campaign_name TEXT,
+                    source TEXT,
+                    precision INTEGER,
+                    sketch BYTEA,
+                    revenue_digest BYTEA,
+                    playtime_digest BYTEA
+"""
+# Serialized sketches are bytes, which pandas would otherwise write as TEXT
+SKETCH_DTYPES = {"sketch": LargeBinary(), "revenue_digest": LargeBinary(), "playtime_digest": LargeBinary()}
+
+class TableLoad(NamedTuple):
     """
-    Loads a DataFrame into a PostgreSQL table.
+    One table of a load_tables_to_postgres transaction.
+
+    chunks:  DataFrames appended in order (e.g. an artifact streamed in chunks)
+    replace: replace the table's rows with the first chunk instead of appending
+    columns: table definition used if it does not exist yet (e.g. SESSION_COLUMNS)
+    dtype:   SQLAlchemy types pandas cannot infer (e.g. SKETCH_DTYPES)
     """
-    try:
-        load_dotenv()
+    table_name: str
+    chunks: Iterable[pd.DataFrame]
+    replace: bool = False
+    columns: str = SUMMARY_COLUMNS
+    dtype: Optional[dict] = None
+
+
+def _engine():
+    load_dotenv()
+
+    # ✅ Get credentials from .env (or hardcode temporarily)
+    db_user = os.getenv("MARKETING_DB_USER", "user")
+    db_pass = os.getenv("MARKETING_DB_PASSWORD", "pass")
+    db_host = os.getenv("MARKETING_DB_HOST", "pgdb")  # Important fix!
+    db_port = os.getenv("MARKETING_DB_PORT", "5432")
+    db_name = os.getenv("MARKETING_DB_NAME", "marketingdb")
 
-        # ✅ Get credentials from .env (or hardcode temporarily)
-        db_user = os.getenv("MARKETING_DB_USER", "user")
-        db_pass = os.getenv("MARKETING_DB_PASSWORD", "pass")
-        db_host = os.getenv("MARKETING_DB_HOST", "pgdb")  # Important fix!
-        db_port = os.getenv("MARKETING_DB_PORT", "5432")
-        db_name = os.getenv("MARKETING_DB_NAME", "marketingdb")
+    # ✅ SQLAlchemy connection string
+    conn_str = f"postgresql+psycopg2://{db_user}:{db_pass}@{db_host}:{db_port}/{db_name}"
+    return create_engine(conn_str)
 
-        # ✅ SQLAlchemy connection string
-        conn_str = f"postgresql+psycopg2://{db_user}:{db_pass}@{db_host}:{db_port}/{db_name}"
-        engine = create_engine(conn_str)
+
+def load_to_postgres(df: pd.DataFrame, table_name: str = "user_campaign_summary", if_exists: str = "replace",
+                     columns: str = SUMMARY_COLUMNS, dtype: dict = None):
+    """
+    Loads a DataFrame into a PostgreSQL table.
+
+    Use if_exists="append" for incremental runs that only carry new records.
+    `columns` defines the table if it does not exist yet (e.g. SESSION_COLUMNS);
+    `dtype` maps columns to SQLAlchemy types where pandas cannot infer them
+    (e.g. the bytes of SKETCH_COLUMNS), as "replace" recreates the table.
+    Returns True if the load succeeded.
+    """
+    try:
+        engine = _engine()
 
         # ✅ Create table if not exists
         with engine.begin() as conn:
             conn.execute(text(f"""
-                CREATE TABLE IF NOT EXISTS {table_name} (
-                    user_id INTEGER,
-                    campaign_name TEXT,     
-                    source TEXT,
-                    clicked_at TIMESTAMP,
-                    total_playtime FLOAT,
-                    total_revenue FLOAT
-                )
+                CREATE TABLE IF NOT EXISTS {table_name} ({columns})
             """))
 
         # ✅ Load DataFrame to PostgreSQL
-        df.to_sql(name=table_name, con=engine, if_exists="replace", index=False)
+        df.to_sql(name=table_name, con=engine, if_exists=if_exists, index=False, dtype=dtype)
         print(f"✅ Loaded {len(df)} records into PostgreSQL table: {table_name}")
+        return True
 
     except Exception as e:
-        print(f"❌ Failed to load data to PostgreSQL: {e}")
\ No newline at end of file
+        print(f"❌ Failed to load data to PostgreSQL: {e}")
+        return False
+
+
+def load_tables_to_postgres(loads: Iterable[TableLoad]) -> bool:
+    """
+    Loads several tables in a single transaction: either every table gets
+    all its rows or, on any failure, none does. A retried run therefore
+    never appends the rows of a partially completed load a second time.
+    Returns True if the load succeeded.
+    """
+    try:
+        with _engine().begin() as conn:
+            for load in loads:
+                conn.execute(text(f"""
+                    CREATE TABLE IF NOT EXISTS {load.table_name} ({load.columns})
+                """))
+                rows = 0
+                for i, df in enumerate(load.chunks):
+                    if_exists = "replace" if load.replace and i == 0 else "append"
+                    df.to_sql(name=load.table_name, con=conn, if_exists=if_exists, index=False, dtype=load.dtype)
+                    rows += len(df)
+                print(f"✅ Loaded {rows} records into PostgreSQL table: {load.table_name}")
+        return True
+
+    except Exception as e:
+        print(f"❌ Failed to load data to PostgreSQL (nothing was committed): {e}")
+        return False
+
+
+def read_loaded_clicks(start: pd.Timestamp, end: pd.Timestamp,
+                       table_name: str = "user_campaign_summary") -> pd.DataFrame:
+    """
+    Reads the campaign clicks loaded by earlier runs (one summary row per
+    click) with clicked_at in [start, end], e.g. the clicks an incremental
+    run's events can be attributed to. A table not created yet has no clicks.
+    """
+    with _engine().connect() as conn:
+        if not inspect(conn).has_table(table_name):
+            return pd.DataFrame(columns=["user_id", "campaign_name", "source", "clicked_at"])
+        query = text(f"""
+            SELECT user_id, campaign_name, source, clicked_at
+            FROM {table_name}
+            WHERE clicked_at BETWEEN :start AND :end
+        """)
+        return pd.read_sql(query, conn, params={"start": start.to_pydatetime(), "end": end.to_pydatetime()})
@@ -0,0 +1,179 @@
+import os
+from typing import Iterator, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..extract.schema import CENTS_PER_UNIT, revenue_cents
+from .backends import USER_CAMPAIGN_SUMMARY, USER_TOTALS, not_null_mask
+from .kernels import aggregate_by_key
+
+ATTRIBUTION_MODELS = ("last_click", "first_click", "linear", "time_decay")
+# Only clicks at most this long before an event can be credited with it
+DEFAULT_LOOKBACK_DAYS = float(os.getenv("MARKETING_ATTRIBUTION_LOOKBACK_DAYS", 7))
+# time_decay: a click's weight halves for every half-life between it and the event
+DEFAULT_HALF_LIFE_DAYS = float(os.getenv("MARKETING_ATTRIBUTION_HALF_LIFE_DAYS", 1))
+# time_decay expands (event, click in window) pairs in batches of about this many
+PAIR_BATCH = 5_000_000
+
+_CLICK = "_click"
+_NS_PER_DAY = 86_400 * 10 ** 9
+
+
+def _as_ns(values: pd.Series) -> pd.Series:
+    if not pd.api.types.is_datetime64_dtype(values):
+        values = pd.to_datetime(values, errors="coerce")
+    return values.astype("datetime64[ns]")
+
+
+def _click_windows(events: pd.DataFrame, clicks: pd.DataFrame, lookback: pd.Timedelta) -> Tuple[np.ndarray, np.ndarray]:
+    # -> (first, last): per event, the range of clicks (positions in the
+    # (user_id, clicked_at)-sorted clicks) within [event_time - lookback,
+    # event_time], -1 when there is none. Both ends come from as-of joins,
+    # so no event is ever paired with more than one click here
+    on_time = events.reset_index(drop=True).assign(_event=np.arange(len(events))).sort_values("event_time")
+    # Stable: clicks tied on clicked_at keep their (user_id, clicked_at) order,
+    # so the forward and backward ends never cross
+    right = clicks[["user_id", "clicked_at", _CLICK]].sort_values("clicked_at", kind="stable")
+    last = pd.merge_asof(on_time, right, left_on="event_time", right_on="clicked_at", by="user_id",
+                         direction="backward", tolerance=lookback)
+    on_time = on_time.assign(window_start=on_time["event_time"] - lookback)
+    first = pd.merge_asof(on_time, right, left_on="window_start", right_on="clicked_at", by="user_id",
+                          direction="forward", tolerance=lookback)
+    first_click = np.full(len(events), -1, dtype=np.int64)
+    last_click = np.full(len(events), -1, dtype=np.int64)
+    first_click[on_time["_event"].to_numpy()] = first[_CLICK].fillna(-1).to_numpy("int64")
+    last_click[on_time["_event"].to_numpy()] = last[_CLICK].fillna(-1).to_numpy("int64")
+    return first_click, last_click
+
+
+def _range_add(starts: np.ndarray, stops: np.ndarray, values: np.ndarray, n: int) -> np.ndarray:
+    # Adds values[i] to every slot in [starts[i], stops[i]] with a difference array
+    diff = np.bincount(starts, values, minlength=n + 1) - np.bincount(stops + 1, values, minlength=n + 1)
+    return np.cumsum(diff[:n])
+
+
+def _time_decay_shares(first: np.ndarray, last: np.ndarray, click_ns: np.ndarray,
+                       half_life: float) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    # -> (event, click, share) for every click in each event's window, with
+    # weights 2^(-age / half_life) normalized per event; pairs are expanded
+    # in batches so memory stays bounded by PAIR_BATCH
+    sizes = last - first + 1
+    ends = np.cumsum(sizes)
+    start = 0
+    while start < len(sizes):
+        done = ends[start - 1] if start else 0
+        stop = max(start + 1, int(np.searchsorted(ends, done + PAIR_BATCH, side="right")))
+        batch_sizes = sizes[start:stop]
+        event = np.repeat(np.arange(start, stop), batch_sizes)
+        click = first[event] + np.arange(len(event)) - np.repeat(np.cumsum(batch_sizes) - batch_sizes, batch_sizes)
+        # Ages are taken from the event's newest click, whose weight is then 1:
+        # shares are unchanged and very old clicks underflow harmlessly to 0
+        weight = np.exp2(-(click_ns[last[event]] - click_ns[click]) / half_life)
+        total = np.bincount(event - start, weight, minlength=stop - start)
+        yield event, click, weight / total[event - start]
+        start = stop
+
+
+def attribute(game_df: pd.DataFrame, campaign_df: pd.DataFrame, model: str = "last_click",
+              lookback_days: float = DEFAULT_LOOKBACK_DAYS,
+              half_life_days: float = DEFAULT_HALF_LIFE_DAYS) -> pd.DataFrame:
+    """
+    Credits each event's revenue and playtime to the user's campaign clicks
+    in the lookback window before it, instead of joining every click to the
+    user's lifetime totals.
+
+    Models (for an event with clicks c1..ck in [event_time - lookback, event_time]):
+    - last_click:  all credit to ck
+    - first_click: all credit to c1
+    - linear:      1/k to each click
+    - time_decay:  weights halving every half-life of click age, normalized
+
+    The window ends are found with two merge_asof joins on (user_id, time);
+    linear credit is spread with a difference array over the sorted clicks,
+    and time_decay expands only the (event, click in window) pairs, in
+    batches, so clicks and events are never crossed. Events without a click
+    in their window are credited to one unattributed row per user (null
+    campaign_name, source and clicked_at), so the output sums to the event
+    totals exactly (up to float rounding).
+
+    Parameters:
+        game_df (pd.DataFrame): Game events (user_id, event_time, playtime_minutes, revenue).
+        campaign_df (pd.DataFrame): Campaign clicks (user_id, campaign_name, source, clicked_at).
+        model (str): One of ATTRIBUTION_MODELS.
+        lookback_days (float): Attribution window.
+        half_life_days (float): time_decay half-life.
+
+    Returns:
+        pd.DataFrame: One row per valid click, in click order: the click's
+                      columns plus attributed_events, attributed_playtime,
+                      attributed_revenue and attribution_model; then the
+                      unattributed rows, by user_id.
+    """
+    if model not in ATTRIBUTION_MODELS:
+        raise ValueError(f"Unknown attribution model {model!r} (supported: {', '.join(ATTRIBUTION_MODELS)})")
+    lookback = pd.Timedelta(days=lookback_days)
+
+    clicks = campaign_df.dropna(subset=list(USER_CAMPAIGN_SUMMARY.click_required)).reset_index(drop=True)
+    clicks = clicks.assign(clicked_at=_as_ns(clicks["clicked_at"]))
+    # Clicks sorted by (user_id, clicked_at): a user's window is a contiguous range
+    order = np.lexsort((clicks["clicked_at"].to_numpy(), clicks["user_id"].to_numpy("int64")))
+    sorted_clicks = clicks.iloc[order].assign(**{_CLICK: np.arange(len(clicks))})
+
+    required = [c for c in USER_TOTALS.required if c in game_df.columns]
+    events = game_df[not_null_mask(game_df, required)]
+    events = pd.DataFrame({
+        "user_id": events["user_id"].astype(clicks["user_id"].dtype),
+        "event_time": _as_ns(events["event_time"]),
+        "playtime": pd.to_numeric(events["playtime_minutes"], errors="coerce").to_numpy("float64", na_value=np.nan),
+        "cents": revenue_cents(events).to_numpy("float64", na_value=0),
+    })
+    events["playtime"] = events["playtime"].fillna(0)
+
+    first, last = _click_windows(events, sorted_clicks, lookback)
+    attributed = last >= 0
+    unmatched = events[~attributed]
+    first, last = first[attributed], last[attributed]
+    playtime = events["playtime"].to_numpy()[attributed]
+    cents = events["cents"].to_numpy()[attributed]
+    n = len(clicks)
+
+    credit = {}
+    if model in ("last_click", "first_click"):
+        target = last if model == "last_click" else first
+        for name, values in (("events", np.ones(len(target))), ("playtime", playtime), ("cents", cents)):
+            credit[name] = np.bincount(target, values, minlength=n)
+    elif model == "linear":
+        share = 1.0 / (last - first + 1)
+        for name, values in (("events", share), ("playtime", playtime * share), ("cents", cents * share)):
+            credit[name] = _range_add(first, last, values, n)
+    else:
+        click_ns = sorted_clicks["clicked_at"].to_numpy().view(np.int64)
+        credit = {name: np.zeros(n) for name in ("events", "playtime", "cents")}
+        for event, click, share in _time_decay_shares(first, last, click_ns, half_life_days * _NS_PER_DAY):
+            credit["events"] += np.bincount(click, share, minlength=n)
+            credit["playtime"] += np.bincount(click, playtime[event] * share, minlength=n)
+            credit["cents"] += np.bincount(click, cents[event] * share, minlength=n)
+
+    # Back from (user_id, clicked_at) order to click order
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n)
+    result = clicks.assign(attributed_events=credit["events"][rank],
+                           attributed_playtime=credit["playtime"][rank],
+                           attributed_revenue=credit["cents"][rank] / CENTS_PER_UNIT,
+                           attribution_model=model)
+
+    # Events without a click in their window, per user, with no campaign
+    totals = aggregate_by_key(unmatched.assign(events=1.0), "user_id",
+                              sums={"attributed_events": "events", "attributed_playtime": "playtime",
+                                    "cents": "cents"})
+    unattributed = clicks.iloc[:0].reindex(range(len(totals)))
+    unattributed = unattributed.assign(user_id=totals["user_id"].to_numpy(),
+                                       attributed_events=totals["attributed_events"].to_numpy(),
+                                       attributed_playtime=totals["attributed_playtime"].to_numpy(),
+                                       attributed_revenue=totals["cents"].to_numpy() / CENTS_PER_UNIT,
+                                       attribution_model=model)
+    print(f"🎯 {model} attribution: {int(attributed.sum())} of {len(events)} events credited to clicks "
+          f"within {lookback_days:g} days ({totals['cents'].sum() / CENTS_PER_UNIT:,.2f} revenue "
+          f"unattributed, in {len(totals)} user rows).")
+    return pd.concat([result, unattributed], ignore_index=True)
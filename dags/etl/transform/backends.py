@@ -0,0 +1,261 @@
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from ..extract.schema import CENTS_PER_UNIT
+from .kernels import aggregate_by_key
+
+_ROW = "_row"
+
+
+class AggregateSpec(NamedTuple):
+    """
+    Backend-neutral per-key aggregation: rows with a null in any `required`
+    column are dropped, then rows are grouped by `key`.
+
+    sums:   (output, input) pairs summed per key (nulls count as 0)
+    count:  output column holding the number of rows per key
+    maxes:  (output, input) pairs reduced with max per key
+    """
+    key: str
+    required: Tuple[str, ...]
+    sums: Tuple[Tuple[str, str], ...] = ()
+    count: Optional[str] = None
+    maxes: Tuple[Tuple[str, str], ...] = ()
+
+    def inputs(self) -> Tuple[str, ...]:
+        columns = (self.key,) + self.required + tuple(c for _, c in self.sums) + tuple(c for _, c in self.maxes)
+        return tuple(dict.fromkeys(columns))
+
+    def outputs(self) -> Tuple[str, ...]:
+        return (tuple(name for name, _ in self.sums) + ((self.count,) if self.count else ())
+                + tuple(name for name, _ in self.maxes))
+
+
+class JoinSpec(NamedTuple):
+    """
+    Backend-neutral aggregate-and-join: the events are aggregated per key
+    (`events`), the clicks with a null in any `click_required` column are
+    dropped, and every remaining click is left-joined to its key's
+    aggregates, keeping click order. Aggregates of keys without events are 0.
+
+    money: (output, cents input) pairs converted from integer cents to
+           currency units after the join (the cents column is dropped)
+    """
+    events: AggregateSpec
+    click_required: Tuple[str, ...]
+    money: Tuple[Tuple[str, str], ...] = ()
+
+
+# The per-user totals and campaign join loaded by the pipeline
+USER_TOTALS = AggregateSpec(
+    key="user_id",
+    required=("user_id", "session_id", "event_time"),
+    sums=(("total_playtime", "playtime_minutes"), ("total_revenue_cents", "revenue_cents")),
+)
+USER_CAMPAIGN_SUMMARY = JoinSpec(
+    events=USER_TOTALS,
+    click_required=("user_id", "campaign_name", "source", "clicked_at"),
+    money=(("total_revenue", "total_revenue_cents"),),
+)
+
+
+def event_frame(spec: AggregateSpec, events: pd.DataFrame) -> pd.DataFrame:
+    """
+    Projects events to the spec's input columns, with float measures widened
+    to float64 so every backend sums in double precision. Required columns
+    missing from `events` (e.g. already filtered and projected away) are skipped.
+    """
+    columns = [c for c in spec.inputs() if c in events.columns]
+    events = events[columns]
+    widen = {c: "float64" for c in columns if pd.api.types.is_float_dtype(events[c]) and events[c].dtype != "float64"}
+    return events.astype(widen) if widen else events
+
+
+def _required(spec: AggregateSpec, frame: pd.DataFrame) -> list:
+    return [c for c in spec.required if c in frame.columns]
+
+
+def not_null_mask(frame: pd.DataFrame, columns) -> np.ndarray:
+    """
+    Boolean mask of the rows of `frame` with a value in every one of `columns`
+    (what dropna(subset=columns) keeps), built without copying the rows.
+    """
+    mask = np.ones(len(frame), dtype=bool)
+    for column in columns:
+        mask &= frame[column].notna().to_numpy()
+    return mask
+
+
+def _restore_dtypes(df: pd.DataFrame, like: pd.DataFrame) -> pd.DataFrame:
+    # Engines return their own types for the pass-through columns (e.g. int32
+    # for Int32); give them back the input's so every backend's output matches
+    for column in like.columns:
+        if column in df.columns and df[column].dtype != like[column].dtype:
+            df[column] = df[column].astype(like[column].dtype)
+    return df
+
+
+def _finish_join(spec: JoinSpec, joined: pd.DataFrame) -> pd.DataFrame:
+    for output, cents in spec.money:
+        joined[output] = (joined.pop(cents) / CENTS_PER_UNIT).astype("float64")
+    outputs = [o for o in spec.events.outputs() if o in joined.columns] + [o for o, _ in spec.money]
+    joined[outputs] = joined[outputs].fillna(0)
+    return joined
+
+
+class Backend(NamedTuple):
+    aggregate: Callable[[AggregateSpec, pd.DataFrame], pd.DataFrame]
+    transform: Callable[[JoinSpec, pd.DataFrame, pd.DataFrame], pd.DataFrame]
+
+
+_BACKENDS: Dict[str, Backend] = {}
+
+
+def register_backend(name: str, aggregate: Callable, transform: Callable) -> None:
+    _BACKENDS[name] = Backend(aggregate, transform)
+
+
+def registered_backends() -> Tuple[str, ...]:
+    return tuple(_BACKENDS)
+
+
+def get_backend(name: str) -> Backend:
+    """
+    Returns a registered execution backend ("pandas", "polars" or "duckdb").
+    """
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown transform backend {name!r} (supported: {', '.join(_BACKENDS)})")
+    return _BACKENDS[name]
+
+
+# pandas: the bincount kernel and pd.merge
+
+def pandas_aggregate(spec: AggregateSpec, events: pd.DataFrame) -> pd.DataFrame:
+    events = event_frame(spec, events)
+    # Rows with nulls are masked out of the aggregation rather than dropped into a copy
+    return aggregate_by_key(events, spec.key, sums=dict(spec.sums), count=spec.count, maxes=dict(spec.maxes),
+                            where=not_null_mask(events, _required(spec, events)))
+
+
+def pandas_join(spec: JoinSpec, clicks: pd.DataFrame, totals: pd.DataFrame) -> pd.DataFrame:
+    """
+    Left-joins (already filtered) clicks to per-key aggregates, in click order.
+    """
+    joined = pd.merge(clicks, totals, on=spec.events.key, how="left")
+    return _finish_join(spec, joined)
+
+
+def pandas_transform(spec: JoinSpec, events: pd.DataFrame, clicks: pd.DataFrame) -> pd.DataFrame:
+    clicks = clicks.dropna(subset=list(spec.click_required))
+    return pandas_join(spec, clicks, pandas_aggregate(spec.events, events))
+
+
+register_backend("pandas", pandas_aggregate, pandas_transform)
+
+
+# Polars (optional dependency)
+
+def _import_polars():
+    try:
+        import polars
+    except ImportError as e:
+        raise ImportError("The 'polars' transform backend requires the 'polars' package") from e
+    return polars
+
+
+def _polars_aggregations(pl, spec: AggregateSpec) -> list:
+    exprs = [pl.col(column).sum().alias(name) for name, column in spec.sums]
+    if spec.count:
+        exprs.append(pl.len().cast(pl.Int64).alias(spec.count))
+    exprs += [pl.col(column).max().alias(name) for name, column in spec.maxes]
+    return exprs
+
+
+def polars_aggregate(spec: AggregateSpec, events: pd.DataFrame) -> pd.DataFrame:
+    pl = _import_polars()
+    events = event_frame(spec, events)
+    frame = pl.from_arrow(pa.Table.from_pandas(events, preserve_index=False))
+    out = (frame.drop_nulls(_required(spec, events))
+           .group_by(spec.key).agg(_polars_aggregations(pl, spec))
+           .sort(spec.key))
+    return _restore_dtypes(out.to_arrow().to_pandas(), events[[spec.key]])
+
+
+def polars_transform(spec: JoinSpec, events: pd.DataFrame, clicks: pd.DataFrame) -> pd.DataFrame:
+    pl = _import_polars()
+    key = spec.events.key
+    events = event_frame(spec.events, events)
+    frame = pl.from_arrow(pa.Table.from_pandas(events, preserve_index=False))
+    totals = frame.drop_nulls(_required(spec.events, events)).group_by(key).agg(_polars_aggregations(pl, spec.events))
+    click_frame = pl.from_arrow(pa.Table.from_pandas(clicks.assign(**{_ROW: np.arange(len(clicks))}),
+                                                     preserve_index=False))
+    joined = (click_frame.drop_nulls(list(spec.click_required))
+              .join(totals, on=key, how="left")
+              .sort(_ROW).drop(_ROW))
+    return _finish_join(spec, _restore_dtypes(joined.to_arrow().to_pandas(), clicks))
+
+
+register_backend("polars", polars_aggregate, polars_transform)
+
+
+# DuckDB (optional dependency, in-process)
+
+def _import_duckdb():
+    try:
+        import duckdb
+    except ImportError as e:
+        raise ImportError("The 'duckdb' transform backend requires the 'duckdb' package") from e
+    return duckdb
+
+
+def _quote(column: str) -> str:
+    return '"' + column.replace('"', '""') + '"'
+
+
+def _aggregate_sql(spec: AggregateSpec, events: pd.DataFrame, table: str) -> str:
+    # Integer sums are cast back from HUGEINT so they match the other backends,
+    # and a key whose values are all null sums to 0 as in pandas, not NULL
+    selects = [_quote(spec.key)]
+    for name, column in spec.sums:
+        cast = "BIGINT" if pd.api.types.is_integer_dtype(events[column]) else "DOUBLE"
+        selects.append(f"COALESCE(SUM({_quote(column)}), 0)::{cast} AS {_quote(name)}")
+    if spec.count:
+        selects.append(f"COUNT(*) AS {_quote(spec.count)}")
+    selects += [f"MAX({_quote(column)}) AS {_quote(name)}" for name, column in spec.maxes]
+    where = " AND ".join(f"{_quote(c)} IS NOT NULL" for c in _required(spec, events)) or "TRUE"
+    return f"SELECT {', '.join(selects)} FROM {table} WHERE {where} GROUP BY {_quote(spec.key)}"
+
+
+def duckdb_aggregate(spec: AggregateSpec, events: pd.DataFrame) -> pd.DataFrame:
+    duckdb = _import_duckdb()
+    frame = event_frame(spec, events)
+    with duckdb.connect() as con:
+        # Arrow input turns NaN into NULL, which aggregates skip as pandas does
+        con.register("events", pa.Table.from_pandas(frame, preserve_index=False))
+        sql = f"{_aggregate_sql(spec, frame, 'events')} ORDER BY {_quote(spec.key)}"
+        out = con.execute(sql).to_arrow_table().to_pandas()
+    return _restore_dtypes(out, events[[spec.key]])
+
+
+def duckdb_transform(spec: JoinSpec, events: pd.DataFrame, clicks: pd.DataFrame) -> pd.DataFrame:
+    duckdb = _import_duckdb()
+    key = spec.events.key
+    frame = event_frame(spec.events, events)
+    click_table = pa.Table.from_pandas(clicks.assign(**{_ROW: np.arange(len(clicks))}), preserve_index=False)
+    where = " AND ".join(f"c.{_quote(c)} IS NOT NULL" for c in spec.click_required) or "TRUE"
+    outputs = ", ".join(f"t.{_quote(name)}" for name in spec.events.outputs())
+    sql = (f"WITH totals AS ({_aggregate_sql(spec.events, frame, 'events')}) "
+           f"SELECT c.* EXCLUDE ({_quote(_ROW)}), {outputs} "
+           f"FROM clicks c LEFT JOIN totals t ON c.{_quote(key)} = t.{_quote(key)} "
+           f"WHERE {where} ORDER BY c.{_quote(_ROW)}")
+    with duckdb.connect() as con:
+        con.register("events", pa.Table.from_pandas(frame, preserve_index=False))
+        con.register("clicks", click_table)
+        joined = con.execute(sql).to_arrow_table().to_pandas()
+    return _finish_join(spec, _restore_dtypes(joined, clicks))
+
+
+register_backend("duckdb", duckdb_aggregate, duckdb_transform)
@@ -0,0 +1,343 @@
+import math
+import os
+import shutil
+import sqlite3
+import tempfile
+from typing import Iterable, Iterator, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..extract.watermark import DEFAULT_STATE_DIR
+
+# Distinct keys held in an exact in-memory set before switching to a Bloom filter
+DEFAULT_MAX_EXACT = int(os.getenv("MARKETING_DEDUP_MAX_EXACT", 5_000_000))
+# Bloom filter sizing: false positive rate at `capacity` keys
+DEFAULT_FP_RATE = float(os.getenv("MARKETING_DEDUP_FP_RATE", 0.001))
+DEFAULT_CAPACITY = int(os.getenv("MARKETING_DEDUP_CAPACITY", 50_000_000))
+
+_HASH_KEYS = ("marketing-dedup1", "marketing-dedup2")
+_SQL_BATCH = 500
+
+
+class DedupStats(NamedTuple):
+    rows: int = 0
+    duplicates: int = 0
+    bloom_false_positives: int = 0
+    mode: str = "exact"
+    earlier_run_duplicates: int = 0
+
+
+class BloomFilter:
+    """
+    Bit-packed Bloom filter over string keys, with vectorized NumPy
+    membership tests and inserts (k positions by double hashing).
+    """
+
+    def __init__(self, capacity: int, fp_rate: float):
+        self.capacity = capacity
+        self.n_bits = max(8, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.n_hashes = max(1, round(self.n_bits / capacity * math.log(2)))
+        self.bits = np.zeros((self.n_bits + 7) // 8, dtype=np.uint8)
+        self.count = 0
+
+    def _positions(self, keys: np.ndarray) -> np.ndarray:
+        h1 = pd.util.hash_array(keys, hash_key=_HASH_KEYS[0], categorize=False)
+        h2 = pd.util.hash_array(keys, hash_key=_HASH_KEYS[1], categorize=False) | np.uint64(1)
+        steps = np.arange(self.n_hashes, dtype=np.uint64)
+        return (h1[:, None] + steps * h2[:, None]) % np.uint64(self.n_bits)
+
+    def contains(self, keys: np.ndarray) -> np.ndarray:
+        positions = self._positions(keys)
+        hits = self.bits[positions >> np.uint64(3)] & (1 << (positions & np.uint64(7))).astype(np.uint8)
+        return hits.all(axis=1)
+
+    def add(self, keys: np.ndarray) -> None:
+        positions = self._positions(keys).ravel()
+        np.bitwise_or.at(self.bits, positions >> np.uint64(3),
+                         (1 << (positions & np.uint64(7))).astype(np.uint8))
+        self.count += len(keys)
+
+
+class _DiskKeySet:
+    """Exact key set in a scratch SQLite file, used to verify Bloom filter hits."""
+
+    def __init__(self, directory: str):
+        self.connection = sqlite3.connect(os.path.join(directory, "keys.sqlite"))
+        self.connection.execute("PRAGMA journal_mode = OFF")
+        self.connection.execute("PRAGMA synchronous = OFF")
+        self.connection.execute("CREATE TABLE keys (key TEXT PRIMARY KEY) WITHOUT ROWID")
+
+    def add(self, keys: Iterable[str]) -> None:
+        self.connection.executemany("INSERT OR IGNORE INTO keys VALUES (?)", ((k,) for k in keys))
+        self.connection.commit()
+
+    def existing(self, keys: list) -> set:
+        found = set()
+        for start in range(0, len(keys), _SQL_BATCH):
+            batch = keys[start:start + _SQL_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = self.connection.execute(f"SELECT key FROM keys WHERE key IN ({placeholders})", batch)
+            found.update(row[0] for row in rows)
+        return found
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+class DedupKeyStore:
+    """
+    Keys of earlier runs, persisted next to the watermarks so a record that
+    arrives again in a later incremental run is dropped too.
+
+    The exact key set lives in SQLite (keys.sqlite), tagged with the run
+    that first kept each key; a Bloom filter over the committed keys
+    (bloom.npz) answers most lookups without touching it. Like watermarks,
+    a run's keys only count once commit() is called after its load, so a
+    failed or retried run never drops its own records.
+    """
+
+    def __init__(self, source: str = "game_events", path: Optional[str] = None,
+                 capacity: int = DEFAULT_CAPACITY, fp_rate: float = DEFAULT_FP_RATE):
+        state_dir = os.getenv("MARKETING_STATE_DIR", DEFAULT_STATE_DIR)
+        self.path = path or os.path.join(state_dir, "dedup", source)
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        os.makedirs(self.path, exist_ok=True)
+        self._bloom_path = os.path.join(self.path, "bloom.npz")
+        self.connection = sqlite3.connect(os.path.join(self.path, "keys.sqlite"))
+        self.connection.execute("CREATE TABLE IF NOT EXISTS keys (key TEXT PRIMARY KEY, run_id TEXT NOT NULL) "
+                                "WITHOUT ROWID")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS keys_run_id ON keys (run_id)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS committed_runs (run_id TEXT PRIMARY KEY)")
+        self.connection.commit()
+        self._bloom = None
+
+    def __enter__(self) -> "DedupKeyStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def _committed_keys(self, run_id: Optional[str] = None) -> Iterator[np.ndarray]:
+        query = "SELECT key FROM keys JOIN committed_runs USING (run_id)"
+        cursor = self.connection.execute(query + (" WHERE run_id = ?" if run_id else ""),
+                                         (run_id,) if run_id else ())
+        for rows in iter(lambda: cursor.fetchmany(100_000), []):
+            yield np.array([row[0] for row in rows], dtype=object)
+
+    def _load_bloom(self) -> BloomFilter:
+        if self._bloom is None:
+            try:
+                with np.load(self._bloom_path) as saved:
+                    self._bloom = BloomFilter(int(saved["capacity"]), float(saved["fp_rate"]))
+                    self._bloom.bits = saved["bits"]
+                    self._bloom.count = int(saved["count"])
+            except FileNotFoundError:
+                self._bloom = self._build_bloom(self.capacity)
+        return self._bloom
+
+    def _build_bloom(self, capacity: int) -> BloomFilter:
+        bloom = BloomFilter(capacity, self.fp_rate)
+        for keys in self._committed_keys():
+            bloom.add(keys)
+        return bloom
+
+    def _save_bloom(self) -> None:
+        tmp_path = f"{self._bloom_path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, bits=self._bloom.bits, capacity=self._bloom.capacity,
+                 fp_rate=self.fp_rate, count=self._bloom.count)
+        os.replace(tmp_path, self._bloom_path)
+
+    def existing(self, keys: np.ndarray) -> Tuple[np.ndarray, int]:
+        """
+        Returns which keys a committed run already kept, and how many Bloom
+        filter hits the SQLite check turned out to be false positives.
+        """
+        maybe = self._load_bloom().contains(keys)
+        seen = np.zeros(len(keys), dtype=bool)
+        if not maybe.any():
+            return seen, 0
+        candidates = keys[maybe].tolist()
+        found = set()
+        for start in range(0, len(candidates), _SQL_BATCH):
+            batch = candidates[start:start + _SQL_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = self.connection.execute(f"SELECT key FROM keys JOIN committed_runs USING (run_id) "
+                                           f"WHERE key IN ({placeholders})", batch)
+            found.update(row[0] for row in rows)
+        seen[maybe] = np.fromiter((k in found for k in candidates), dtype=bool, count=len(candidates))
+        return seen, int(maybe.sum() - seen.sum())
+
+    def record(self, keys: np.ndarray, run_id: str) -> None:
+        """
+        Stores the keys a run kept, pending until commit(run_id). A key left
+        pending by a run that never committed is taken over.
+        """
+        self.connection.executemany(
+            "INSERT INTO keys VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET run_id = excluded.run_id "
+            "WHERE keys.run_id NOT IN (SELECT run_id FROM committed_runs)",
+            ((k, run_id) for k in keys.tolist()))
+        self.connection.commit()
+
+    def commit(self, run_id: str) -> None:
+        """
+        Makes a run's recorded keys count for later runs; call it after the
+        run was loaded, together with the watermarks.
+        """
+        self.connection.execute("INSERT OR IGNORE INTO committed_runs VALUES (?)", (run_id,))
+        self.connection.commit()
+        bloom = self._load_bloom()
+        added = sum(len(keys) for keys in self._committed_keys(run_id))
+        if bloom.count + added > bloom.capacity:
+            # Rebuilt at double the capacity to keep the false positive rate
+            self._bloom = self._build_bloom(2 * (bloom.count + added))
+        else:
+            for keys in self._committed_keys(run_id):
+                bloom.add(keys)
+        self._save_bloom()
+
+
+class StreamingDeduplicator:
+    """
+    Drops rows whose key was already seen earlier in a stream of chunks.
+
+    Keys are held in an exact set until `max_exact` distinct keys have been
+    seen. Beyond that they move to a Bloom filter sized for `capacity` keys at
+    `fp_rate`, backed by an on-disk key set: Bloom hits are verified on disk,
+    so a false positive never drops a row. Rows with a null key are kept.
+
+    With a `history` store, rows whose key a committed earlier run kept are
+    dropped as well, and the keys kept now are recorded under `run_id`.
+
+    Use as a context manager so the scratch files are removed.
+    """
+
+    def __init__(self, key: str = "session_id", max_exact: int = DEFAULT_MAX_EXACT,
+                 capacity: int = DEFAULT_CAPACITY, fp_rate: float = DEFAULT_FP_RATE,
+                 spill_dir: Optional[str] = None, history: Optional[DedupKeyStore] = None,
+                 run_id: Optional[str] = None):
+        if history is not None and run_id is None:
+            raise ValueError("Deduplicating against earlier runs requires a run_id")
+        self.key = key
+        self.max_exact = max_exact
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.spill_dir = spill_dir
+        self.history = history
+        self.run_id = run_id
+        self.stats = DedupStats()
+        self._seen = set()
+        self._bloom = None
+        self._disk = None
+        self._scratch = None
+
+    def __enter__(self) -> "StreamingDeduplicator":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+        if self._scratch is not None:
+            shutil.rmtree(self._scratch, ignore_errors=True)
+            self._scratch = None
+
+    def _spill(self) -> None:
+        # Move the exact set into the Bloom filter and the on-disk key set
+        self._scratch = tempfile.mkdtemp(prefix="dedup_", dir=self.spill_dir)
+        self._disk = _DiskKeySet(self._scratch)
+        self._bloom = BloomFilter(max(self.capacity, 2 * len(self._seen)), self.fp_rate)
+        keys = np.array(list(self._seen), dtype=object)
+        self._bloom.add(keys)
+        self._disk.add(keys.tolist())
+        self._seen = set()
+        self.stats = self.stats._replace(mode="bloom")
+        print(f"🌸 Dedup switched to a Bloom filter after {len(keys):,} distinct {self.key} values "
+              f"({self._bloom.n_bits / 8e6:,.1f} MB, {self._bloom.n_hashes} hashes)")
+
+    def _seen_before(self, keys: np.ndarray) -> np.ndarray:
+        if self._bloom is None:
+            return np.fromiter((k in self._seen for k in keys), dtype=bool, count=len(keys))
+
+        maybe = self._bloom.contains(keys)
+        seen = np.zeros(len(keys), dtype=bool)
+        if maybe.any():
+            candidates = keys[maybe]
+            found = self._disk.existing(candidates.tolist())
+            seen[maybe] = np.fromiter((k in found for k in candidates), dtype=bool, count=len(candidates))
+            self.stats = self.stats._replace(
+                bloom_false_positives=self.stats.bloom_false_positives + int(maybe.sum() - seen.sum()))
+        return seen
+
+    def _remember(self, keys: np.ndarray) -> None:
+        if self._bloom is None:
+            self._seen.update(keys.tolist())
+            if len(self._seen) > self.max_exact:
+                self._spill()
+        else:
+            self._bloom.add(keys)
+            self._disk.add(keys.tolist())
+
+    def filter(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """
+        Returns the rows of `chunk` whose key was not seen before (in this
+        chunk or any earlier one), and remembers the new keys.
+        """
+        if self.key not in chunk.columns:
+            return chunk
+        values = chunk[self.key].to_numpy(dtype=object, na_value=None)
+        present = pd.notna(values)
+        # First occurrences within the chunk, then against everything before it
+        duplicate = present & pd.Series(values).duplicated(keep="first").to_numpy()
+        firsts = present & ~duplicate
+        keys = values[firsts]
+        seen = self._seen_before(keys)
+        self._remember(keys[~seen])
+        if self.history is not None and not seen.all():
+            new = np.flatnonzero(~seen)
+            earlier, false_positives = self.history.existing(keys[new])
+            self.history.record(keys[new[~earlier]], self.run_id)
+            seen[new[earlier]] = True
+            self.stats = self.stats._replace(
+                earlier_run_duplicates=self.stats.earlier_run_duplicates + int(earlier.sum()),
+                bloom_false_positives=self.stats.bloom_false_positives + false_positives)
+        duplicate[np.flatnonzero(firsts)[seen]] = True
+
+        self.stats = self.stats._replace(rows=self.stats.rows + len(chunk),
+                                         duplicates=self.stats.duplicates + int(duplicate.sum()))
+        if not duplicate.any():
+            return chunk
+        return chunk[~duplicate]
+
+
+def dedup_chunks(chunks: Iterable[pd.DataFrame], key: str = "session_id",
+                 **options) -> Iterator[pd.DataFrame]:
+    """
+    Streams chunks through a StreamingDeduplicator, keeping the first row per key.
+
+    Parameters:
+        chunks (Iterable[pd.DataFrame]): Extracted chunks, in stream order.
+        key (str): Column identifying a record (e.g. "session_id").
+        **options: max_exact, capacity, fp_rate, spill_dir, history, run_id
+                   (see StreamingDeduplicator).
+
+    Returns:
+        Iterator[pd.DataFrame]: The chunks without duplicate rows; the removed
+                                counts are printed once the stream is exhausted.
+    """
+    with StreamingDeduplicator(key, **options) as deduplicator:
+        for chunk in chunks:
+            yield deduplicator.filter(chunk)
+        stats = deduplicator.stats
+    note = f", {stats.bloom_false_positives} Bloom false positives kept after disk check" \
+        if stats.mode == "bloom" or options.get("history") is not None else ""
+    earlier = f", {stats.earlier_run_duplicates} seen in earlier runs" if options.get("history") is not None else ""
+    print(f"🧹 Removed {stats.duplicates} duplicate {key} rows out of {stats.rows} "
+          f"({stats.mode} mode{earlier}{note}).")
@@ -0,0 +1,185 @@
+import os
+import zlib
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from .rollup import ROLLUP_DIMENSIONS, _codes
+
+# Registers = 2^precision. The relative standard error of a count is
+# 1.04 / sqrt(2^precision): 1.6% at the default 12 (4 KiB per sketch before
+# compression), 0.8% at 14; ~99.7% of counts fall within 3 standard errors
+DEFAULT_PRECISION = int(os.getenv("MARKETING_HLL_PRECISION", 12))
+
+_MAGIC = b"HLL1"
+
+
+def _leading_zeros(values: np.ndarray) -> np.ndarray:
+    # Exact count of leading zero bits of uint64 values, by binary search
+    values = values.copy()
+    zeros = np.zeros(len(values), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        small = values < (np.uint64(1) << np.uint64(64 - shift))
+        zeros[small] += shift
+        values[small] <<= np.uint64(shift)
+    zeros[values == 0] = 64
+    return zeros
+
+
+def hash_users(user_ids) -> np.ndarray:
+    """
+    64-bit hashes of user ids (stable across runs and processes).
+    """
+    values = pd.Series(user_ids).dropna().to_numpy("int64")
+    return pd.util.hash_array(values, categorize=False)
+
+
+def register_updates(hashes: np.ndarray, precision: int):
+    # -> (register index, rank): the top `precision` bits pick the register,
+    # the rank is 1 + the leading zeros of the remaining bits
+    index = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+    rest = hashes << np.uint64(precision)
+    rank = np.minimum(_leading_zeros(rest) + 1, 64 - precision + 1)
+    return index, rank.astype(np.uint8)
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct-count sketch over 64-bit hashes of user ids.
+
+    Sketches are mergeable: the union of any sketches (e.g. of every day,
+    campaign and source matching a dashboard filter) is their element-wise
+    register maximum and estimates the distinct users of the union, with
+    the same error as a sketch built from the raw rows.
+    """
+
+    def __init__(self, precision: int = DEFAULT_PRECISION, registers: Optional[np.ndarray] = None):
+        if not 4 <= precision <= 18:
+            raise ValueError(f"HyperLogLog precision must be between 4 and 18, got {precision}")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8) if registers is None else registers
+
+    @property
+    def relative_error(self) -> float:
+        """Relative standard error of count()."""
+        return 1.04 / np.sqrt(len(self.registers))
+
+    def add(self, user_ids) -> "HyperLogLog":
+        index, rank = register_updates(hash_users(user_ids), self.precision)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.precision != self.precision:
+            raise ValueError(f"Cannot merge HyperLogLog sketches of precision {self.precision} and {other.precision}")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        empty = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and empty:
+            # Small cardinalities: linear counting over the empty registers
+            estimate = m * np.log(m / empty)
+        return int(round(estimate))
+
+    def to_bytes(self) -> bytes:
+        # Sparse sketches are mostly zero registers and compress well
+        return _MAGIC + bytes([self.precision]) + zlib.compress(self.registers.tobytes())
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        data = bytes(data)
+        if data[:len(_MAGIC)] != _MAGIC:
+            raise ValueError("Not a serialized HyperLogLog sketch")
+        precision = data[len(_MAGIC)]
+        registers = np.frombuffer(zlib.decompress(data[len(_MAGIC) + 1:]), dtype=np.uint8).copy()
+        return cls(precision, registers)
+
+
+def merge_sketches(sketches: Iterable[bytes], precision: int = DEFAULT_PRECISION) -> HyperLogLog:
+    """
+    Unions serialized sketches (e.g. the sketch column of the rows matching a
+    filter); an empty selection gives an empty sketch of `precision`.
+    """
+    merged = None
+    for data in sketches:
+        sketch = HyperLogLog.from_bytes(data)
+        merged = sketch if merged is None else merged.merge(sketch)
+    return merged if merged is not None else HyperLogLog(precision)
+
+
+class SketchBuilder:
+    """
+    Builds one HyperLogLog sketch of user_id per day x campaign x source
+    cell of the joined summary, chunk by chunk: every row's register update
+    is applied with a single vectorized np.maximum.at over all cells.
+    """
+
+    def __init__(self, precision: int = DEFAULT_PRECISION):
+        self.precision = precision
+        self._labels = {d: {} for d in ROLLUP_DIMENSIONS}
+        self._cells = {}
+        self._registers = np.zeros((0, 1 << precision), dtype=np.uint8)
+
+    def add(self, df: pd.DataFrame) -> None:
+        df = df.dropna(subset=["user_id", "clicked_at", "campaign_name", "source"])
+        day = _codes(pd.to_datetime(df["clicked_at"]).dt.floor("D"), self._labels["day"])
+        campaign = _codes(df["campaign_name"], self._labels["campaign_name"])
+        source = _codes(df["source"], self._labels["source"])
+        # One integer per (day, campaign, source) cell of this chunk
+        campaigns, sources = len(self._labels["campaign_name"]), len(self._labels["source"])
+        inverse, keys = pd.factorize((day * campaigns + campaign) * sources + source)
+        keys = zip(keys // (campaigns * sources), keys // sources % campaigns, keys % sources)
+        rows = np.array([self._cells.setdefault(key, len(self._cells)) for key in keys], dtype=np.int64)
+        if len(self._cells) > len(self._registers):
+            grown = np.zeros((len(self._cells), self._registers.shape[1]), dtype=np.uint8)
+            grown[:len(self._registers)] = self._registers
+            self._registers = grown
+
+        index, rank = register_updates(hash_users(df["user_id"]), self.precision)
+        cells = rows[inverse]
+        np.maximum.at(self._registers.reshape(-1), cells * self._registers.shape[1] + index, rank)
+
+    def result(self) -> pd.DataFrame:
+        """
+        Returns day, campaign_name, source, precision and the serialized sketch per cell.
+        """
+        labels = {d: list(self._labels[d]) for d in ROLLUP_DIMENSIONS}
+        cells = list(self._cells)
+        return pd.DataFrame({
+            "day": pd.to_datetime(pd.Series([labels["day"][c[0]] for c in cells], dtype=object)).astype("datetime64[ns]"),
+            "campaign_name": pd.Series([labels["campaign_name"][c[1]] for c in cells], dtype="string"),
+            "source": pd.Series([labels["source"][c[2]] for c in cells], dtype="string"),
+            "precision": pd.Series(self.precision, index=range(len(cells)), dtype=np.int64),
+            "sketch": pd.Series([HyperLogLog(self.precision, self._registers[row]).to_bytes()
+                                 for row in range(len(cells))], dtype=object),
+        })
+
+
+def build_user_sketches(chunks: Iterable[pd.DataFrame], precision: int = DEFAULT_PRECISION) -> pd.DataFrame:
+    """
+    Builds a mergeable HyperLogLog sketch of user_id per day x campaign x
+    source of the joined summary (transform_and_join's output, whole or in
+    chunks). Unioning the sketches of any set of cells (merge_sketches)
+    estimates their distinct users within HyperLogLog.relative_error.
+
+    Parameters:
+        chunks (Iterable[pd.DataFrame]): The joined rows, e.g. [final_df].
+        precision (int): log2 of the registers per sketch (see DEFAULT_PRECISION).
+
+    Returns:
+        pd.DataFrame: day, campaign_name, source, precision, sketch (bytes).
+    """
+    builder = SketchBuilder(precision)
+    rows = 0
+    for chunk in chunks:
+        builder.add(chunk)
+        rows += len(chunk)
+    sketches = builder.result()
+    print(f"🧮 Sketched the distinct users of {rows} summary rows into {len(sketches)} HyperLogLog cells "
+          f"(±{1.04 / np.sqrt(1 << precision):.1%} standard error).")
+    return sketches
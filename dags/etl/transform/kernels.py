@@ -0,0 +1,161 @@
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Integer keys spanning at most max(DENSE_SPAN_FACTOR x rows, DENSE_SPAN_MIN)
+# values are used directly as bincount slots, with no hashing at all
+DENSE_SPAN_FACTOR = 4
+DENSE_SPAN_MIN = 1 << 20
+
+# Float64 accumulators are exact for integer sums below this magnitude
+_EXACT_FLOAT_INT = 2 ** 53
+
+
+def _key_codes(keys: pd.Series, where: Optional[np.ndarray]) -> Optional[Tuple[np.ndarray, int, np.ndarray, bool]]:
+    # -> (codes, n_slots, uniques or slot offset, dense); None when pandas must handle the keys.
+    # Rows outside `where` get the overflow code n_slots, which every reduction discards
+    if not pd.api.types.is_integer_dtype(keys):
+        return None
+    nulls = keys.isna().to_numpy()
+    if (nulls if where is None else nulls & where).any():
+        return None
+    values = keys.to_numpy("int64", na_value=0)
+    kept = values if where is None else values[where]
+    if len(kept) == 0:
+        return np.zeros(len(values), dtype=np.intp), 0, np.empty(0, dtype=np.int64), False
+    low = int(kept.min())
+    span = int(kept.max()) - low + 1
+    if span <= max(DENSE_SPAN_FACTOR * len(kept), DENSE_SPAN_MIN):
+        codes = (values - low).astype(np.intp, copy=False)
+        if where is not None:
+            codes[~where] = span
+        return codes, span, np.array([low]), True
+    kept_codes, uniques = pd.factorize(kept, sort=True)
+    if where is None:
+        return kept_codes, len(uniques), uniques, False
+    codes = np.full(len(values), len(uniques), dtype=np.intp)
+    codes[where] = kept_codes
+    return codes, len(uniques), uniques, False
+
+
+def _sum(codes: np.ndarray, n: int, values: pd.Series) -> Optional[np.ndarray]:
+    if pd.api.types.is_float_dtype(values):
+        weights = values.to_numpy("float64", na_value=np.nan)
+        # bincount of no rows is int64 even with weights
+        return np.bincount(codes, np.nan_to_num(weights, nan=0.0), minlength=n + 1)[:n].astype(np.float64, copy=False)
+    if pd.api.types.is_integer_dtype(values):
+        weights = values.to_numpy("int64", na_value=0)
+        if np.abs(weights).sum(dtype=np.float64) < _EXACT_FLOAT_INT:
+            return np.rint(np.bincount(codes, weights, minlength=n + 1)[:n]).astype(np.int64)
+        totals = np.zeros(n + 1, dtype=np.int64)
+        np.add.at(totals, codes, weights)
+        return totals[:n]
+    return None
+
+
+def _max(codes: np.ndarray, n: int, values: pd.Series) -> Optional[np.ndarray]:
+    # NaT is the smallest int64, so it never wins against a real timestamp
+    if pd.api.types.is_datetime64_dtype(values):
+        ints = values.to_numpy().view(np.int64)
+        dtype = values.dtype
+    elif pd.api.types.is_integer_dtype(values) and not values.hasnans:
+        ints = values.to_numpy("int64")
+        dtype = "int64"
+    else:
+        return None
+    totals = np.full(n + 1, np.iinfo(np.int64).min, dtype=np.int64)
+    np.maximum.at(totals, codes, ints)
+    totals = totals[:n]
+    return totals if dtype == "int64" else totals.view(dtype)
+
+
+def aggregate_by_key(df: pd.DataFrame, key: str, sums: Optional[Dict[str, str]] = None,
+                     count: Optional[str] = None, maxes: Optional[Dict[str, str]] = None,
+                     where: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """
+    Per-key sums, row counts and maxima: the same result as
+    df.groupby(key).agg(...).reset_index(), sorted by key.
+
+    Integer keys (e.g. user_id) are turned into group codes once, directly
+    as offsets when they are dense, and every measure is then reduced with
+    np.bincount / np.maximum.at over contiguous arrays. Keys or measures
+    with other dtypes (strings, nulls in the key, ...) go through pandas.
+
+    Null measures are skipped as in pandas: they add 0 to a sum and never
+    win a max. Integer sums are exact; they come back as int64 and float
+    sums as float64.
+
+    `where` restricts the aggregation to a subset of rows without copying
+    them out first: the other rows are given a discarded overflow code.
+
+    Parameters:
+        df (pd.DataFrame): Rows to aggregate.
+        key (str): Grouping column.
+        sums (dict): Output column -> column to sum.
+        count (str): Output column holding the number of rows per key.
+        maxes (dict): Output column -> column to take the maximum of (timestamps or integers).
+        where (np.ndarray): Boolean mask of the rows to aggregate (default: all).
+
+    Returns:
+        pd.DataFrame: One row per key: key, sums, count, maxes.
+    """
+    sums = sums or {}
+    maxes = maxes or {}
+    factorized = _key_codes(df[key], where)
+    if factorized is not None:
+        codes, n, uniques, dense = factorized
+        results = {}
+        for name, column in sums.items():
+            results[name] = _sum(codes, n, df[column])
+        for name, column in maxes.items():
+            results[name] = _max(codes, n, df[column])
+        if all(values is not None for values in results.values()):
+            counts = np.bincount(codes, minlength=n + 1)[:n]
+            if dense:
+                # Keep only the occupied slots; their offsets are the sorted keys
+                occupied = counts > 0
+                keys = np.flatnonzero(occupied) + uniques[0]
+                results = {name: values[occupied] for name, values in results.items()}
+                counts = counts[occupied]
+            else:
+                keys = uniques
+            out = {key: pd.Series(keys).astype(df[key].dtype)}
+            out.update((name, results[name]) for name in sums)
+            if count:
+                out[count] = counts.astype(np.int64)
+            out.update((name, results[name]) for name in maxes)
+            return pd.DataFrame(out)
+
+    if where is not None:
+        df = df[where]
+    grouped = df.groupby(key, sort=True)
+    out = pd.DataFrame(index=grouped.size().index)
+    for name, column in sums.items():
+        out[name] = grouped[column].sum()
+        if pd.api.types.is_integer_dtype(out[name]):
+            # Nullable sums have no nulls left; return int64 as the kernel does
+            out[name] = out[name].astype(np.int64)
+    if count:
+        out[count] = grouped.size().astype(np.int64)
+    for name, column in maxes.items():
+        out[name] = grouped[column].max()
+    return out.reset_index()
+
+
+def key_positions(keys: pd.Series, table_keys: pd.Series) -> np.ndarray:
+    """
+    Returns the row of each of `keys` in `table_keys` (unique, e.g. the key
+    column of aggregate_by_key's output), or -1 where it is absent. Sorted
+    integer tables are probed with a binary search instead of a hash table.
+    """
+    if (pd.api.types.is_integer_dtype(keys) and pd.api.types.is_integer_dtype(table_keys)
+            and not keys.hasnans and not table_keys.hasnans and table_keys.is_monotonic_increasing):
+        table = table_keys.to_numpy("int64")
+        values = keys.to_numpy("int64")
+        positions = np.searchsorted(table, values)
+        positions[positions == len(table)] = 0
+        if len(table):
+            return np.where(table[positions] == values, positions, -1)
+        return np.full(len(values), -1, dtype=np.intp)
+    return pd.Index(table_keys).get_indexer(keys)
@@ -0,0 +1,101 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Inputs smaller than this are transformed in-process; pickling partitions to
+# workers costs more than it saves
+PARALLEL_MIN_ROWS = int(os.getenv("MARKETING_PARALLEL_MIN_ROWS", 1_000_000))
+# A key is hot when it alone would fill this fraction of an average partition
+HOT_KEY_SHARE = 0.5
+# Rows sampled to find hot keys
+HOT_KEY_SAMPLE = 200_000
+
+
+def find_hot_keys(values: pd.Series, partitions: int, share: float = HOT_KEY_SHARE,
+                  sample_size: int = HOT_KEY_SAMPLE, seed: int = 0) -> np.ndarray:
+    """
+    Returns the keys frequent enough to turn their partition into a straggler,
+    estimated from a random sample of `values`.
+    """
+    values = values.dropna()
+    if values.empty or partitions < 2:
+        return np.array([], dtype=object)
+    if len(values) > sample_size:
+        values = values.sample(n=sample_size, random_state=seed)
+    counts = values.value_counts(sort=False)
+    hot_keys = counts.index[counts > share * len(values) / partitions].to_numpy()
+    if len(hot_keys):
+        print(f"🔥 Spreading {len(hot_keys)} hot {values.name or 'key'} value(s) over all partitions")
+    return hot_keys
+
+
+def partition_ids(values: pd.Series, partitions: int, hot_keys: Sequence = ()) -> np.ndarray:
+    """
+    Assigns each row to one of `partitions` buckets by the hash of its key,
+    so all rows of a key land together. Rows of hot keys are instead spread
+    round-robin over every bucket.
+    """
+    if pd.api.types.is_integer_dtype(values):
+        # Hash the int64 value so Int32 events and int64 state rows agree
+        hashes = pd.util.hash_array(values.to_numpy("int64", na_value=-1), categorize=False)
+    else:
+        hashes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+    buckets = (hashes % np.uint64(partitions)).astype(np.int64)
+    if len(hot_keys):
+        hot = values.isin(hot_keys).to_numpy()
+        buckets[hot] = np.arange(int(hot.sum())) % partitions
+    return buckets
+
+
+def partition_frame(df: pd.DataFrame, key: str, partitions: int,
+                    hot_keys: Sequence = ()) -> List[pd.DataFrame]:
+    """
+    Hash-partitions `df` on `key` (see partition_ids) into `partitions` frames.
+    """
+    return split_partitions(df, partition_ids(df[key], partitions, hot_keys), partitions)
+
+
+def split_partitions(df: pd.DataFrame, buckets: np.ndarray, partitions: int) -> List[pd.DataFrame]:
+    """
+    Splits `df` into one frame per bucket, keeping the original row order
+    within each.
+    """
+    order = np.argsort(buckets, kind="stable")
+    bounds = np.searchsorted(buckets[order], np.arange(1, partitions))
+    return [df.iloc[rows] for rows in np.split(order, bounds)]
+
+
+def run_partitions(fn: Callable, partitions: List[tuple], workers: int) -> list:
+    """
+    Calls fn(*args) for every partition's argument tuple in a process pool
+    and returns the results in partition order.
+
+    Parameters:
+        fn (callable): Picklable, top-level function.
+        partitions (list): One argument tuple per partition.
+        workers (int): Worker processes.
+
+    Returns:
+        list: fn's result per partition.
+    """
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(fn, *zip(*partitions)))
+    largest = max(len(args[0]) for args in partitions)
+    print(f"⚡ {len(partitions)} partitions on {workers} workers in {time.perf_counter() - start:.2f}s "
+          f"(largest partition: {largest} rows)")
+    return results
+
+
+def parallel_workers(rows: int, workers: Optional[int]) -> int:
+    """
+    Resolves the number of worker processes for an input of `rows` rows
+    (None = CPU count); 1 means run in-process.
+    """
+    if rows < PARALLEL_MIN_ROWS:
+        return 1
+    return max(1, workers or os.cpu_count() or 1)
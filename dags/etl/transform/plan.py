@@ -0,0 +1,328 @@
+from typing import List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from ..extract.schema import CENTS_PER_UNIT
+from .backends import AggregateSpec, JoinSpec, pandas_aggregate
+from .kernels import key_positions
+
+# Logical operators, recorded by Plan as the transform is described. Nothing
+# is computed until Plan.collect, after optimize has rewritten the tree.
+
+
+class Scan(NamedTuple):
+    name: str
+    frame: pd.DataFrame
+    columns: Optional[Tuple[str, ...]] = None    # None = every column
+    unique: Optional[str] = None                 # A column known to hold no duplicates
+
+    def describe(self) -> str:
+        columns = self.frame.columns if self.columns is None else self.columns
+        unique = f", unique {self.unique}" if self.unique else ""
+        return f"Scan {self.name} [{', '.join(columns)}] ({len(self.frame):,} rows{unique})"
+
+
+class DropNulls(NamedTuple):
+    input: "Node"
+    columns: Tuple[str, ...]
+
+    def describe(self) -> str:
+        return f"Filter not null({', '.join(self.columns)})"
+
+
+class Aggregate(NamedTuple):
+    input: "Node"
+    spec: AggregateSpec
+    where: Tuple[str, ...] = ()     # Fused not-null filter on the input
+
+    def describe(self) -> str:
+        measures = [f"{name}=sum({column})" for name, column in self.spec.sums]
+        measures += [f"{self.spec.count}=count()"] if self.spec.count else []
+        measures += [f"{name}=max({column})" for name, column in self.spec.maxes]
+        text = f"Aggregate by {self.spec.key}: {', '.join(measures)}"
+        return text + (f" where not null({', '.join(self.where)})" if self.where else "")
+
+
+class Join(NamedTuple):
+    left: "Node"
+    right: "Node"
+    key: str
+
+    def describe(self) -> str:
+        return f"LeftJoin on {self.key}"
+
+
+class CentsToUnits(NamedTuple):
+    input: "Node"
+    money: Tuple[Tuple[str, str], ...]
+
+    def describe(self) -> str:
+        return "CentsToUnits " + ", ".join(f"{name}={cents}/{CENTS_PER_UNIT}" for name, cents in self.money)
+
+
+class FillNulls(NamedTuple):
+    input: "Node"
+    columns: Tuple[str, ...]
+    value: float
+
+    def describe(self) -> str:
+        return f"FillNulls {self.value} ({', '.join(self.columns)})"
+
+
+class GatherJoin(NamedTuple):
+    """
+    Left join of a frame to a table with unique keys, the zero fill of
+    unmatched rows and the cents conversion, fused: each output column is
+    gathered from the table by row position in a single pass.
+    """
+    left: "Node"
+    right: "Node"
+    key: str
+    fill: float
+    money: Tuple[Tuple[str, str], ...] = ()
+
+    def describe(self) -> str:
+        money = "".join(f", {name}={cents}/{CENTS_PER_UNIT}" for name, cents in self.money)
+        return f"GatherJoin on {self.key} (left, fill {self.fill}{money})"
+
+
+Node = Union[Scan, DropNulls, Aggregate, Join, CentsToUnits, FillNulls, GatherJoin]
+
+
+def _children(node: Node) -> List[Node]:
+    if isinstance(node, Scan):
+        return []
+    if isinstance(node, (Join, GatherJoin)):
+        return [node.left, node.right]
+    return [node.input]
+
+
+def output_columns(node: Node) -> Tuple[str, ...]:
+    """
+    The columns an operator produces, in order.
+    """
+    if isinstance(node, Scan):
+        return tuple(node.frame.columns) if node.columns is None else node.columns
+    if isinstance(node, Aggregate):
+        return (node.spec.key,) + node.spec.outputs()
+    if isinstance(node, (Join, GatherJoin)):
+        left = output_columns(node.left)
+        columns = left + tuple(c for c in output_columns(node.right) if c not in left)
+        if isinstance(node, GatherJoin):
+            columns = _convert_money(columns, node.money)
+        return columns
+    if isinstance(node, CentsToUnits):
+        return _convert_money(output_columns(node.input), node.money)
+    return output_columns(node.input)
+
+
+def _convert_money(columns: Tuple[str, ...], money) -> Tuple[str, ...]:
+    cents = {c for _, c in money}
+    return tuple(c for c in columns if c not in cents) + tuple(name for name, _ in money)
+
+
+# Rewrite rules, applied bottom-up
+
+def _merge_filters(node: Node) -> Node:
+    # Filter(Filter(x, a), b) -> Filter(x, a + b)
+    if isinstance(node, DropNulls) and isinstance(node.input, DropNulls):
+        columns = tuple(dict.fromkeys(node.input.columns + node.columns))
+        return DropNulls(node.input.input, columns)
+    return node
+
+
+def _fuse_filter_into_aggregate(node: Node) -> Node:
+    # The aggregation masks the filtered rows out instead of reading a filtered copy
+    if isinstance(node, Aggregate) and isinstance(node.input, DropNulls):
+        where = tuple(dict.fromkeys(node.where + node.input.columns))
+        return Aggregate(node.input.input, node.spec, where)
+    return node
+
+
+def _fuse_join_fill(node: Node) -> Node:
+    # FillNulls(CentsToUnits(Join)) or FillNulls(Join) -> GatherJoin, when the
+    # right side has one row per key (so every left row matches at most once)
+    if not isinstance(node, FillNulls):
+        return node
+    inner, money = node.input, ()
+    if isinstance(inner, CentsToUnits):
+        inner, money = inner.input, inner.money
+    if not isinstance(inner, Join):
+        return node
+    right = inner.right
+    if not (isinstance(right, Aggregate) and right.spec.key == inner.key
+            or isinstance(right, Scan) and right.unique == inner.key):
+        return node
+    return GatherJoin(inner.left, inner.right, inner.key, node.value, money)
+
+
+_RULES = (_merge_filters, _fuse_filter_into_aggregate, _fuse_join_fill)
+
+
+def _rewrite(node: Node) -> Node:
+    if isinstance(node, Scan):
+        pass
+    elif isinstance(node, (Join, GatherJoin)):
+        node = node._replace(left=_rewrite(node.left), right=_rewrite(node.right))
+    else:
+        node = node._replace(input=_rewrite(node.input))
+    for rule in _RULES:
+        node = rule(node)
+    return node
+
+
+def _prune(node: Node, needed: Optional[Tuple[str, ...]]) -> Node:
+    # Pushes the columns each operator reads down to the scans (None = all)
+    if isinstance(node, Scan):
+        if needed is None:
+            return node
+        return node._replace(columns=tuple(c for c in node.frame.columns if c in needed))
+    if isinstance(node, DropNulls):
+        inner = None if needed is None else tuple(dict.fromkeys(needed + node.columns))
+        return node._replace(input=_prune(node.input, inner))
+    if isinstance(node, Aggregate):
+        return node._replace(input=_prune(node.input, node.spec.inputs() + node.where))
+    if isinstance(node, (Join, GatherJoin)):
+        right = None if needed is None else tuple(c for c in needed if c in output_columns(node.right))
+        if isinstance(node, GatherJoin) and right is not None:
+            right += tuple(c for _, c in node.money)
+        if right is not None:
+            right = tuple(dict.fromkeys((node.key,) + right))
+        left = None if needed is None else tuple(dict.fromkeys((node.key,) + needed))
+        return node._replace(left=_prune(node.left, left), right=_prune(node.right, right))
+    if isinstance(node, CentsToUnits):
+        inner = None if needed is None else needed + tuple(c for _, c in node.money)
+        return node._replace(input=_prune(node.input, inner))
+    return node._replace(input=_prune(node.input, needed))
+
+
+def optimize(node: Node) -> Node:
+    """
+    Fuses filters, joins and fills into as few passes as possible (see the
+    rewrite rules above) and prunes every scan to the columns actually read.
+    """
+    return _prune(_rewrite(node), None)
+
+
+# Execution
+
+def _execute(node: Node) -> pd.DataFrame:
+    if isinstance(node, Scan):
+        return node.frame if node.columns is None else node.frame[list(node.columns)]
+    if isinstance(node, DropNulls):
+        return _execute(node.input).dropna(subset=list(node.columns))
+    if isinstance(node, Aggregate):
+        spec = node.spec._replace(required=tuple(dict.fromkeys(node.spec.required + node.where)))
+        return pandas_aggregate(spec, _execute(node.input))
+    if isinstance(node, Join):
+        return pd.merge(_execute(node.left), _execute(node.right), on=node.key, how="left")
+    if isinstance(node, CentsToUnits):
+        df = _execute(node.input)
+        for name, cents in node.money:
+            df[name] = (df.pop(cents) / CENTS_PER_UNIT).astype("float64")
+        return df
+    if isinstance(node, FillNulls):
+        df = _execute(node.input)
+        df[list(node.columns)] = df[list(node.columns)].fillna(node.value)
+        return df
+    return _gather_join(node, _execute(node.left), _execute(node.right))
+
+
+def _gather_join(node: GatherJoin, left: pd.DataFrame, right: pd.DataFrame) -> pd.DataFrame:
+    positions = key_positions(left[node.key], right[node.key])
+    matched = positions >= 0
+    rows = np.where(matched, positions, 0)
+    cents = {c: name for name, c in node.money}
+    measures, money = {}, {}
+    for column in right.columns:
+        if column in left.columns:
+            continue
+        values = right[column].to_numpy()
+        gathered = values[rows] if len(values) else np.zeros(len(rows), dtype=values.dtype)
+        if column in cents:
+            gathered = gathered / CENTS_PER_UNIT
+        elif not matched.all() and pd.api.types.is_integer_dtype(gathered):
+            # Unmatched integers come out of a left join as float, as with pd.merge
+            gathered = gathered.astype("float64")
+        gathered[~matched] = node.fill
+        if column in cents:
+            money[cents[column]] = gathered
+        else:
+            measures[column] = gathered
+    # The left columns are shared, not copied; money columns come last
+    out = left.reset_index(drop=True)
+    out.attrs = {}
+    for name, values in {**measures, **money}.items():
+        out[name] = values
+    return out
+
+
+class Plan:
+    """
+    A lazily evaluated transform: each method records an operator and returns
+    a new Plan, and nothing is materialized until collect(). The recorded
+    (logical) plan is optimized first, so the null filters run as masks
+    inside the aggregation and the join, its zero fill and the cents
+    conversion are a single gather, instead of a full intermediate frame
+    per step.
+
+    Example:
+        totals = Plan.scan("game_events", game_df).aggregate(USER_TOTALS)
+        plan = Plan.scan("campaigns", campaign_df).join(totals, USER_CAMPAIGN_SUMMARY)
+        plan.explain()
+        final_df = plan.collect()
+    """
+
+    def __init__(self, node: Node):
+        self.node = node
+
+    @classmethod
+    def scan(cls, name: str, frame: pd.DataFrame, unique: Optional[str] = None) -> "Plan":
+        """
+        Starts a plan from an in-memory frame; `unique` names a column known
+        to hold no duplicates (e.g. the key of precomputed aggregates).
+        """
+        return cls(Scan(name, frame, unique=unique))
+
+    def columns(self) -> Tuple[str, ...]:
+        return output_columns(self.node)
+
+    def drop_nulls(self, columns) -> "Plan":
+        return Plan(DropNulls(self.node, tuple(columns)))
+
+    def aggregate(self, spec: AggregateSpec) -> "Plan":
+        # Like the backends, rows with a null in a required column are skipped
+        required = tuple(c for c in spec.required if c in self.columns())
+        node = DropNulls(self.node, required) if required else self.node
+        return Plan(Aggregate(node, spec))
+
+    def join(self, totals: "Plan", spec: JoinSpec) -> "Plan":
+        """
+        Records spec's click filter and left join of this plan to `totals`
+        (see JoinSpec), with the cents converted and unmatched rows zero-filled.
+        """
+        node = Join(self.drop_nulls(spec.click_required).node, totals.node, spec.events.key)
+        if spec.money:
+            node = CentsToUnits(node, spec.money)
+        outputs = tuple(c for c in spec.events.outputs() if c not in {cents for _, cents in spec.money})
+        return Plan(FillNulls(node, outputs + tuple(name for name, _ in spec.money), 0))
+
+    def optimized(self) -> "Plan":
+        return Plan(optimize(self.node))
+
+    def explain(self, optimized: bool = True) -> None:
+        """
+        Prints the plan tree, optimized (as collect runs it) by default.
+        """
+        node = optimize(self.node) if optimized else self.node
+        lines = [f"== {'Optimized' if optimized else 'Logical'} plan =="]
+        stack = [(node, 0)]
+        while stack:
+            node, depth = stack.pop()
+            lines.append("  " * depth + node.describe())
+            stack.extend((child, depth + 1) for child in reversed(_children(node)))
+        print("\n".join(lines))
+
+    def collect(self, optimized: bool = True) -> pd.DataFrame:
+        return _execute(optimize(self.node) if optimized else self.node)
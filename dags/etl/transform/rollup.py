@@ -0,0 +1,137 @@
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Cube dimensions, finest level first; every subset of them is a grouping level
+ROLLUP_DIMENSIONS = ("day", "campaign_name", "source")
+# Output column -> summary column summed into it
+ROLLUP_SUMS = {"total_playtime": "total_playtime", "total_revenue": "total_revenue"}
+
+
+def grouping_id(rolled_up: Iterable[str]) -> int:
+    """
+    SQL GROUPING(day, campaign_name, source) bitmask of a level: the bit of
+    each rolled-up (NULL) dimension is set, the first dimension being the
+    most significant. 0 is the finest level, 7 the grand total.
+    """
+    rolled_up = set(rolled_up)
+    return sum(1 << (len(ROLLUP_DIMENSIONS) - 1 - i) for i, d in enumerate(ROLLUP_DIMENSIONS) if d in rolled_up)
+
+
+def grouping_levels() -> List[Tuple[str, ...]]:
+    """
+    Every grouping level (the dimensions kept), from finest to the grand total.
+    """
+    return [kept for size in range(len(ROLLUP_DIMENSIONS), -1, -1)
+            for kept in combinations(ROLLUP_DIMENSIONS, size)]
+
+
+def _codes(values: pd.Series, labels: Dict[object, int]) -> np.ndarray:
+    # Stable codes across chunks: each new label gets the next code
+    codes, uniques = pd.factorize(values)
+    mapping = np.array([labels.setdefault(label, len(labels)) for label in uniques], dtype=np.int64)
+    return mapping[codes]
+
+
+class RollupBuilder:
+    """
+    Builds the rollup cube of the joined summary (see ROLLUP_DIMENSIONS) in a
+    single pass over its rows, chunk by chunk.
+
+    Each chunk is reduced to its finest (day, campaign, source) cells and to
+    the distinct (cell, user) pairs it contains; only those two small tables
+    are kept. The coarser levels are rolled up from them at the end: the
+    sums and click counts are additive, and distinct users are counted from
+    the projected (coarse cell, user) pairs, so they are exact at every level.
+    """
+
+    def __init__(self):
+        self._labels = {d: {} for d in ROLLUP_DIMENSIONS}
+        self._cells: Optional[pd.DataFrame] = None
+        self._pairs: Optional[pd.DataFrame] = None
+
+    def add(self, df: pd.DataFrame) -> None:
+        df = df.dropna(subset=["user_id", "clicked_at", "campaign_name", "source"])
+        cells = pd.DataFrame({
+            "day": _codes(pd.to_datetime(df["clicked_at"]).dt.floor("D"), self._labels["day"]),
+            "campaign_name": _codes(df["campaign_name"], self._labels["campaign_name"]),
+            "source": _codes(df["source"], self._labels["source"]),
+        })
+        pairs = cells.assign(user_id=df["user_id"].to_numpy("int64")).drop_duplicates()
+        cells["clicks"] = 1
+        for name, column in ROLLUP_SUMS.items():
+            cells[name] = df[column].to_numpy("float64", na_value=0.0)
+
+        if self._cells is not None:
+            cells = pd.concat([self._cells, cells], ignore_index=True)
+            pairs = pd.concat([self._pairs, pairs], ignore_index=True).drop_duplicates()
+        self._cells = cells.groupby(list(ROLLUP_DIMENSIONS), sort=False, as_index=False).sum()
+        self._pairs = pairs
+
+    def result(self) -> pd.DataFrame:
+        """
+        Returns the cube: one row per cell of every grouping level, with the
+        rolled-up dimensions NULL and their bitmask in grouping_id.
+        """
+        dimensions = list(ROLLUP_DIMENSIONS)
+        measures = ["clicks", *ROLLUP_SUMS]
+        cells, pairs = self._cells, self._pairs
+        if cells is None:
+            cells = pd.DataFrame(0, index=[], columns=dimensions + measures)
+            pairs = pd.DataFrame(0, index=[], columns=dimensions + ["user_id"])
+
+        levels = []
+        for kept in grouping_levels():
+            keep = list(kept)
+            if keep:
+                level = cells.groupby(keep, sort=True, as_index=False)[measures].sum()
+                distinct = pairs[keep + ["user_id"]].drop_duplicates().groupby(keep).size()
+                level = level.merge(distinct.rename("unique_users").reset_index(), on=keep, how="left")
+            else:
+                level = cells[measures].sum().to_frame().T
+                level["unique_users"] = pairs["user_id"].nunique()
+            level["grouping_id"] = grouping_id(d for d in ROLLUP_DIMENSIONS if d not in kept)
+            levels.append(level)
+        cube = pd.concat(levels, ignore_index=True)
+
+        # Codes back to labels; rolled-up dimensions stay null
+        for dimension in ROLLUP_DIMENSIONS:
+            labels = np.array(list(self._labels[dimension]), dtype=object)
+            codes = cube[dimension]
+            cube[dimension] = pd.Series(labels[codes.fillna(0).astype(np.int64)] if len(labels) else None,
+                                        index=cube.index).where(codes.notna())
+        cube = cube.astype({"day": "datetime64[ns]", "campaign_name": "string", "source": "string",
+                            "clicks": np.int64, "unique_users": np.int64, "grouping_id": np.int64,
+                            **{name: np.float64 for name in ROLLUP_SUMS}})
+        cube = cube.sort_values(["grouping_id", *dimensions], ignore_index=True)
+        return cube[[*dimensions, "grouping_id", "clicks", "unique_users", *ROLLUP_SUMS]]
+
+
+def build_rollup(chunks: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Rolls the joined summary (transform_and_join's output, whole or in
+    chunks) up into revenue, playtime, clicks and distinct users per day x
+    campaign x source and every coarser grouping level (see RollupBuilder).
+
+    The cube covers the given rows only. Cubes of separate incremental runs
+    add up cell by cell at grouping_id 0, but their coarser rows overlap and
+    their unique_users are distinct within one run, not across runs.
+
+    Parameters:
+        chunks (Iterable[pd.DataFrame]): The joined rows, e.g. [final_df].
+
+    Returns:
+        pd.DataFrame: day, campaign_name, source (NULL when rolled up),
+                      grouping_id, clicks, unique_users, total_playtime,
+                      total_revenue.
+    """
+    builder = RollupBuilder()
+    rows = 0
+    for chunk in chunks:
+        builder.add(chunk)
+        rows += len(chunk)
+    cube = builder.result()
+    print(f"🧊 Rolled {rows} summary rows up into {len(cube)} cube rows.")
+    return cube
@@ -0,0 +1,248 @@
+import os
+from typing import Dict, Iterable, Iterator, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from ..extract.schema import CENTS_PER_UNIT, revenue_cents
+from .backends import not_null_mask
+
+# A gap of more than this between two events of a user starts a new session
+SESSION_TIMEOUT_MINUTES = float(os.getenv("MARKETING_SESSION_TIMEOUT_MINUTES", 30))
+
+# Per-session output (one row per session)
+SESSION_COLUMNS = {
+    "user_id": "int64",
+    "session_id": "string[pyarrow]",
+    "session_start": "datetime64[ns]",
+    "session_end": "datetime64[ns]",
+    "duration_minutes": "float64",
+    "event_count": "int64",
+    "total_playtime": "float64",
+    "total_revenue": "float64",
+}
+
+_NS_PER_MINUTE = 60 * 10 ** 9
+_NS_PER_MS = 10 ** 6
+# Running per-session state: user, start and end (ns), events, playtime, revenue cents
+_SESSION_FIELDS = (("user", np.int64), ("start", np.int64), ("end", np.int64),
+                   ("count", np.int64), ("playtime", np.float64), ("cents", np.int64))
+
+
+def _empty() -> Dict[str, np.ndarray]:
+    return {field: np.empty(0, dtype=dtype) for field, dtype in _SESSION_FIELDS}
+
+
+def _take(sessions: Dict[str, np.ndarray], rows) -> Dict[str, np.ndarray]:
+    return {field: values[rows] for field, values in sessions.items()}
+
+
+def _concat(*parts: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    return {field: np.concatenate([part[field] for part in parts]) for field, _ in _SESSION_FIELDS}
+
+
+def session_ids(users: np.ndarray, starts: np.ndarray, mask: np.ndarray = None) -> pd.arrays.ArrowStringArray:
+    """
+    Session ids "<user_id>-<start in epoch ms>": a session's id only depends
+    on its user and first event, so it is the same however the events were
+    chunked. Rows outside `mask` get a null id.
+    """
+    users = pa.array(users, mask=None if mask is None else ~mask)
+    starts = pa.array(starts // _NS_PER_MS)
+    ids = pc.binary_join_element_wise(pc.cast(users, pa.string()), pc.cast(starts, pa.string()), "-")
+    return pd.arrays.ArrowStringArray(pa.chunked_array([ids]))
+
+
+def session_frame(sessions: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """
+    Turns running session state into SESSION_COLUMNS rows, sorted by user and start.
+    """
+    order = np.lexsort((sessions["start"], sessions["user"]))
+    s = _take(sessions, order)
+    return pd.DataFrame({
+        "user_id": s["user"],
+        "session_id": session_ids(s["user"], s["start"]),
+        "session_start": s["start"].view("datetime64[ns]"),
+        "session_end": s["end"].view("datetime64[ns]"),
+        "duration_minutes": (s["end"] - s["start"]) / _NS_PER_MINUTE,
+        "event_count": s["count"],
+        "total_playtime": s["playtime"],
+        "total_revenue": s["cents"] / CENTS_PER_UNIT,
+    })
+
+
+def _event_times(chunk: pd.DataFrame) -> pd.Series:
+    times = chunk["event_time"]
+    if not pd.api.types.is_datetime64_dtype(times):
+        times = pd.to_datetime(times, errors="coerce")
+    return times.astype("datetime64[ns]")
+
+
+class Sessionizer:
+    """
+    Rebuilds sessions per user_id from event_time gaps: a user's events
+    belong to one session until two consecutive ones are more than
+    `timeout_minutes` apart.
+
+    Each chunk is sorted once by (user_id, event_time); session boundaries
+    are found with a vectorized diff, and per-session duration, playtime and
+    revenue are reduced with np.add.reduceat over the sorted arrays, so there
+    is no per-user Python loop.
+
+    Only each user's latest session can still grow, so that session is kept
+    open across chunks (one small record per user) and is continued when the
+    user's next event arrives within the timeout. Every other session is
+    emitted as soon as it is complete. A user's events may arrive in any
+    order within a chunk, but never earlier than that user's events in a
+    previous chunk (e.g. chunks of an extract ordered by event_time).
+    """
+
+    def __init__(self, timeout_minutes: float = SESSION_TIMEOUT_MINUTES):
+        self.timeout = int(round(timeout_minutes * _NS_PER_MINUTE))
+        self.rows = 0
+        self.sessions = 0
+        self._open = _empty()
+
+    def process(self, chunk: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Assigns session ids to a chunk of events.
+
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame]: The chunk with its session_id
+            column rebuilt (null where user_id or event_time is), in the
+            original row order, and the sessions completed by it (SESSION_COLUMNS).
+        """
+        events, done = self._process(chunk)
+        return events, session_frame(done)
+
+    def _process(self, chunk: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, np.ndarray]]:
+        times = _event_times(chunk)
+        valid = not_null_mask(chunk, ["user_id"]) & times.notna().to_numpy()
+        rows = np.flatnonzero(valid)
+        user = chunk["user_id"].to_numpy("int64", na_value=0)[rows]
+        time = times.to_numpy().view(np.int64)[rows]
+        playtime = pd.to_numeric(chunk["playtime_minutes"], errors="coerce").to_numpy("float64", na_value=np.nan)
+        cents = revenue_cents(chunk).to_numpy("int64", na_value=0)
+
+        # Sort once; a session starts at each user's first event and after each long gap
+        order = np.lexsort((time, user))
+        users, starts_at = user[order], time[order]
+        n = len(users)
+        first_of_user = np.ones(n, dtype=bool)
+        first_of_user[1:] = users[1:] != users[:-1]
+        boundary = first_of_user.copy()
+        boundary[1:] |= np.diff(starts_at) > self.timeout
+        bounds = np.flatnonzero(boundary)
+        segments = {
+            "user": users[bounds],
+            "start": starts_at[bounds],
+            "end": starts_at[np.append(bounds[1:], n) - 1] if n else np.empty(0, dtype=np.int64),
+            "count": np.diff(np.append(bounds, n)),
+            "playtime": np.add.reduceat(np.nan_to_num(playtime[rows][order]), bounds) if n else np.empty(0),
+            "cents": np.add.reduceat(cents[rows][order], bounds) if n else np.empty(0, dtype=np.int64),
+        }
+
+        # Continue the sessions left open by earlier chunks
+        opens_user = first_of_user[bounds]
+        closed_open = self._continue(segments, opens_user)
+        closes_user = np.append(opens_user[1:], True)[:len(opens_user)]
+
+        # Every session but each user's latest is complete
+        done = _concat(_take(self._open, closed_open), _take(segments, ~closes_user))
+        touched = np.isin(self._open["user"], segments["user"])
+        still_open = _concat(_take(self._open, ~touched), _take(segments, closes_user))
+        # Kept sorted by user for the searchsorted lookups of the next chunk
+        self._open = _take(still_open, np.argsort(still_open["user"], kind="stable"))
+
+        # Each row's session start, scattered back to the original row order
+        row_start = np.empty(n, dtype=np.int64)
+        row_start[order] = segments["start"][np.cumsum(boundary) - 1]
+        start = np.zeros(len(chunk), dtype=np.int64)
+        start[rows] = row_start
+        user_all = np.zeros(len(chunk), dtype=np.int64)
+        user_all[rows] = user
+
+        self.rows += len(chunk)
+        self.sessions += len(done["user"])
+        events = chunk.assign(session_id=session_ids(user_all, start, valid))
+        return events, done
+
+    def _continue(self, segments: Dict[str, np.ndarray], opens_user: np.ndarray) -> np.ndarray:
+        # Merges open sessions into their user's first segment when it follows
+        # within the timeout; -> mask of the open sessions closed instead
+        firsts = np.flatnonzero(opens_user)
+        positions = np.searchsorted(self._open["user"], segments["user"][firsts])
+        positions[positions == len(self._open["user"])] = 0
+        found = np.zeros(len(firsts), dtype=bool)
+        if len(self._open["user"]):
+            found = self._open["user"][positions] == segments["user"][firsts]
+        firsts, positions = firsts[found], positions[found]
+        gaps = segments["start"][firsts] - self._open["end"][positions]
+        if (gaps < 0).any():
+            raise ValueError("Events arrived earlier than the same user's events in a previous chunk; "
+                             "chunked sessionization needs each user's events in event_time order")
+        joins = gaps <= self.timeout
+        segment, open_ = firsts[joins], positions[joins]
+        segments["start"][segment] = self._open["start"][open_]
+        for field in ("count", "playtime", "cents"):
+            segments[field][segment] += self._open[field][open_]
+        closed = np.zeros(len(self._open["user"]), dtype=bool)
+        closed[positions[~joins]] = True
+        return closed
+
+    def finish(self) -> pd.DataFrame:
+        """
+        Closes and returns the sessions still open at the end of the stream.
+        """
+        return session_frame(self._finish())
+
+    def _finish(self) -> Dict[str, np.ndarray]:
+        done, self._open = self._open, _empty()
+        self.sessions += len(done["user"])
+        return done
+
+
+def sessionize(game_df: pd.DataFrame,
+               timeout_minutes: float = SESSION_TIMEOUT_MINUTES) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Rebuilds session_id from event_time gaps per user (see Sessionizer).
+
+    Parameters:
+        game_df (pd.DataFrame): Game events with user_id, event_time,
+                                playtime_minutes and revenue (or revenue_cents).
+        timeout_minutes (float): Inactivity gap that ends a session.
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: The events with the rebuilt
+        session_id, and one row per session (SESSION_COLUMNS).
+    """
+    sessionizer = Sessionizer(timeout_minutes)
+    events, done = sessionizer._process(game_df)
+    sessions = session_frame(_concat(done, sessionizer._finish()))
+    print(f"🕒 Rebuilt {len(sessions)} sessions from {len(events)} events "
+          f"({timeout_minutes:g} min inactivity timeout).")
+    return events, sessions
+
+
+def sessionize_chunks(chunks: Iterable[pd.DataFrame], timeout_minutes: float = SESSION_TIMEOUT_MINUTES
+                      ) -> Iterator[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    Streams event chunks through a Sessionizer, carrying each user's open
+    session across chunk boundaries.
+
+    Returns:
+        Iterator[Tuple[pd.DataFrame, pd.DataFrame]]: Per chunk, the events with
+        their session_id and the sessions completed so far; the sessions still
+        open at the end come last, with an empty events frame.
+    """
+    sessionizer = Sessionizer(timeout_minutes)
+    events = None
+    for chunk in chunks:
+        events, sessions = sessionizer.process(chunk)
+        yield events, sessions
+    empty = events.iloc[:0] if events is not None else pd.DataFrame()
+    yield empty, sessionizer.finish()
+    print(f"🕒 Rebuilt {sessionizer.sessions} sessions from {sessionizer.rows} events "
+          f"({timeout_minutes:g} min inactivity timeout).")
@@ -0,0 +1,136 @@
+import math
+import os
+import shutil
+import tempfile
+from typing import Callable, Iterable, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+
+from .parallel import partition_frame
+
+
+def memory_budget() -> int:
+    """
+    Returns the transform's memory budget in bytes: MARKETING_TRANSFORM_MEMORY_BYTES,
+    or half of the physical memory.
+    """
+    configured = os.getenv("MARKETING_TRANSFORM_MEMORY_BYTES")
+    if configured:
+        return int(configured)
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // 2
+
+
+def spill_partitions(estimated_bytes: int, budget: int) -> int:
+    """
+    Number of on-disk partitions so that one partition, with working space
+    for its aggregation, fits in a quarter of the budget.
+    """
+    return max(2, math.ceil(4 * estimated_bytes / max(budget, 1)))
+
+
+class SpillWriter:
+    """
+    Hash-partitions a stream of chunks on a key into one Arrow IPC stream
+    file per partition, in a scratch directory removed on close.
+
+    Rows keep their stream order within a partition, so a partition read
+    back holds exactly the rows of its keys, in the order an in-memory
+    frame would have them.
+    """
+
+    def __init__(self, key: str, partitions: int, spill_dir: Optional[str] = None):
+        self.key = key
+        self.partitions = partitions
+        self.directory = tempfile.mkdtemp(prefix="transform_spill_", dir=spill_dir)
+        self.rows = 0
+        self._schema = None
+        self._files = [None] * partitions
+        self._writers = [None] * partitions
+
+    def __enter__(self) -> "SpillWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _path(self, partition: int) -> str:
+        return os.path.join(self.directory, f"part-{partition:04d}.arrows")
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        for partition, part in enumerate(partition_frame(chunk, self.key, self.partitions)):
+            if part.empty:
+                continue
+            table = pa.Table.from_pandas(part, preserve_index=False)
+            if self._schema is None:
+                # The first chunk's pandas metadata restores extension dtypes on read
+                self._schema = table.schema
+            if self._writers[partition] is None:
+                self._files[partition] = pa.OSFile(self._path(partition), "wb")
+                self._writers[partition] = pa.ipc.new_stream(self._files[partition], self._schema)
+            self._writers[partition].write_table(table.cast(self._schema))
+        self.rows += len(chunk)
+
+    def finish(self) -> None:
+        for writer, sink in zip(self._writers, self._files):
+            if writer is not None:
+                writer.close()
+                sink.close()
+        self._writers = [None] * self.partitions
+        self._files = [None] * self.partitions
+
+    def read(self, partition: int) -> Optional[pd.DataFrame]:
+        """
+        Returns one partition's rows (None if it received none).
+        """
+        path = self._path(partition)
+        if not os.path.exists(path):
+            return None
+        with pa.memory_map(path, "r") as source:
+            return pa.ipc.open_stream(source).read_all().to_pandas()
+
+    def close(self) -> None:
+        self.finish()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def aggregate_spilled(chunks: Iterable[pd.DataFrame], aggregate: Callable[[pd.DataFrame], pd.DataFrame],
+                      key: str, partitions: int, empty: pd.DataFrame,
+                      spill_dir: Optional[str] = None) -> pd.DataFrame:
+    """
+    Aggregates a stream too large for memory by spilling it to disk,
+    hash-partitioned on `key`, then aggregating one partition at a time.
+
+    Every key's rows end up in a single partition in their original order, so
+    `aggregate` (any per-key aggregation, e.g. aggregate_by_key) returns
+    exactly what it would on the whole input; only one partition plus the
+    per-key result is held in memory.
+
+    Parameters:
+        chunks (Iterable[pd.DataFrame]): Input rows, already projected to the
+                                         columns `aggregate` reads.
+        aggregate (callable): Per-key aggregation returning one row per key.
+        key (str): Grouping column, e.g. "user_id".
+        partitions (int): On-disk partitions (see spill_partitions).
+        empty (pd.DataFrame): Zero-row input with the chunks' columns, aggregated
+                              when the stream has no rows.
+        spill_dir (str): Parent of the scratch directory (defaults to the system temp dir).
+
+    Returns:
+        pd.DataFrame: The aggregates, sorted by key.
+    """
+    with SpillWriter(key, partitions, spill_dir) as spill:
+        for chunk in chunks:
+            spill.write(chunk)
+        spill.finish()
+        print(f"💽 Spilled {spill.rows} rows into {partitions} partitions under {spill.directory}")
+
+        results: List[pd.DataFrame] = []
+        for partition in range(partitions):
+            part = spill.read(partition)
+            if part is not None:
+                results.append(aggregate(part))
+
+    if not results:
+        return aggregate(empty)
+    return pd.concat(results, ignore_index=True).sort_values(key, ignore_index=True)
@@ -0,0 +1,313 @@
+import fcntl
+import json
+import os
+import shutil
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ..extract.schema import GAME_EVENTS_SCHEMA, apply_schema, revenue_cents
+from ..extract.watermark import DEFAULT_STATE_DIR
+from .backends import USER_TOTALS, get_backend
+from .kernels import aggregate_by_key
+from .parallel import find_hot_keys, parallel_workers, partition_frame, run_partitions
+from .spill import aggregate_spilled
+
+# Bump when the on-disk layout changes; older stores are rebuilt from scratch
+STATE_FORMAT_VERSION = 1
+# Delta parts a store may hold before a fold compacts them into a single part
+MAX_PARTS = int(os.getenv("MARKETING_STATE_MAX_PARTS", 8))
+
+# Per-user aggregates, one .npy array per column, sorted by user_id
+STATE_COLUMNS = {
+    "user_id": "int64",
+    "total_playtime": "float64",
+    "total_revenue_cents": "int64",
+    "event_count": "int64",
+    "last_event_time": "datetime64[ns]",
+}
+_SUM_COLUMNS = ("total_playtime", "total_revenue_cents", "event_count")
+
+# The per-user totals of transform_and_join, plus the event count and last event time
+USER_STATE = USER_TOTALS._replace(count="event_count", maxes=(("last_event_time", "event_time"),))
+
+
+def project_user_events(game_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Keeps the valid events (same required fields as transform_and_join) and
+    only the columns the per-user aggregations read; used to spill events
+    to disk compactly.
+    """
+    game_df = game_df.dropna(subset=[c for c in USER_STATE.required if c in game_df.columns])
+    return pd.DataFrame({
+        "user_id": game_df["user_id"],
+        "playtime_minutes": game_df["playtime_minutes"],
+        "revenue_cents": revenue_cents(game_df),
+        "event_time": game_df["event_time"],
+    })
+
+
+def aggregate_user_events(game_df: pd.DataFrame, workers: Optional[int] = 1,
+                          backend: str = "pandas") -> pd.DataFrame:
+    """
+    Aggregates typed game events per user into the STATE_COLUMNS layout
+    (revenue in exact integer cents), sorted by user_id.
+
+    With more than one worker (None = CPU count) and a large enough input, the
+    events are hash-partitioned on user_id and aggregated in a process pool;
+    hot users are spread over all partitions and their partials combined here.
+    Other backends (see backends.py) run the USER_STATE spec in-process.
+    """
+    workers = 1 if backend != "pandas" else parallel_workers(len(game_df), workers)
+    if workers > 1:
+        hot_keys = find_hot_keys(game_df["user_id"], workers)
+        parts = partition_frame(game_df, "user_id", workers, hot_keys)
+        partials = pd.concat(run_partitions(aggregate_user_events, [(part,) for part in parts], workers),
+                             ignore_index=True)
+        if len(hot_keys):
+            hot = partials["user_id"].isin(hot_keys)
+            partials = pd.concat([partials[~hot], _merge_parts([partials[hot]])], ignore_index=True)
+        return partials.sort_values("user_id", ignore_index=True)
+
+    agg = get_backend(backend).aggregate(USER_STATE, project_user_events(game_df))
+    return agg.astype(STATE_COLUMNS)
+
+
+class UserAggregates:
+    """
+    Read view of one version of the per-user state: a list of parts, each a
+    set of memory-mapped arrays sorted by user_id. A user's totals are the
+    sum (and latest event time) over the parts that contain them.
+    """
+
+    def __init__(self, root: str, parts: List[str], generation: Optional[str] = None):
+        self.root = root
+        self.parts = list(parts)
+        self.generation = generation
+
+    def _arrays(self, part: str) -> Dict[str, np.ndarray]:
+        directory = os.path.join(self.root, part)
+        return {column: np.load(os.path.join(directory, f"{column}.npy"), mmap_mode="r")
+                for column in STATE_COLUMNS}
+
+    def lookup(self, user_ids) -> pd.DataFrame:
+        """
+        Returns the aggregates of the given users (one row per distinct id
+        found in the state). Only the pages of the arrays holding those users
+        are read from disk.
+        """
+        query = np.unique(pd.Series(user_ids).dropna().to_numpy("int64"))
+        result = {column: np.zeros(len(query), dtype=dtype) for column, dtype in STATE_COLUMNS.items()}
+        result["user_id"] = query
+        result["last_event_time"][:] = np.datetime64("NaT")
+        found = np.zeros(len(query), dtype=bool)
+
+        for part in self.parts:
+            arrays = self._arrays(part)
+            ids = arrays["user_id"]
+            positions = np.searchsorted(ids, query)
+            hit = positions < len(ids)
+            hit[hit] = ids[positions[hit]] == query[hit]
+            rows = positions[hit]
+            for column in _SUM_COLUMNS:
+                result[column][hit] += arrays[column][rows]
+            result["last_event_time"][hit] = np.fmax(result["last_event_time"][hit], arrays["last_event_time"][rows])
+            found |= hit
+
+        return pd.DataFrame({column: values[found] for column, values in result.items()})
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Returns the full state as one DataFrame sorted by user_id.
+        """
+        frames = [pd.DataFrame({column: np.asarray(values) for column, values in self._arrays(part).items()})
+                  for part in self.parts]
+        if not frames:
+            return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in STATE_COLUMNS.items()})
+        return frames[0] if len(frames) == 1 else _merge_parts(frames)
+
+
+def _merge_parts(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    agg = aggregate_by_key(pd.concat(frames, ignore_index=True), "user_id",
+                           sums={column: column for column in _SUM_COLUMNS},
+                           maxes={"last_event_time": "last_event_time"})
+    return agg.astype(STATE_COLUMNS)
+
+
+class UserStateStore:
+    """
+    Persisted per-user running totals (playtime, revenue, event count, last
+    event time), so each run folds in only its new events instead of
+    re-aggregating the whole history.
+
+    The state is a list of parts of .npy arrays sorted by user_id, named in
+    manifest.json. A fold writes the run's delta as a new part and a pending
+    manifest, leaving the current state untouched; commit() makes it current
+    once the run's output is loaded, so a failed or retried run never counts
+    events twice. When a fold would leave more than MAX_PARTS parts, they are
+    compacted into one.
+
+    Folds and commits hold an exclusive lock on the store. A pending version
+    records the generation it was folded on (its base), and only commits if
+    that is still the current one: when runs overlap, the later commit fails
+    instead of dropping the other run's delta, and garbage collection never
+    deletes a part a pending version still references.
+
+    An empty store starts from the events of the first run that folds into
+    it; reset the watermarks along with the store to rebuild it from the full
+    history.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_parts: int = MAX_PARTS):
+        state_dir = os.getenv("MARKETING_STATE_DIR", DEFAULT_STATE_DIR)
+        self.path = path or os.path.join(state_dir, "user_aggregates")
+        self.max_parts = max_parts
+        self._manifest_path = os.path.join(self.path, "manifest.json")
+
+    @contextmanager
+    def _locked(self):
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _pending_path(self, generation: str) -> str:
+        return os.path.join(self.path, f"pending-{generation}.json")
+
+    def _read_manifest(self, manifest_path: str) -> Dict[str, Any]:
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return {"parts": []}
+        if manifest.get("version") != STATE_FORMAT_VERSION:
+            print(f"⚠️ Ignoring user state with format version {manifest.get('version')}")
+            return {"parts": []}
+        return manifest
+
+    def _write_manifest(self, manifest_path: str, parts: List[str], generation: str,
+                        base: Optional[str] = None) -> None:
+        tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+        manifest = {"version": STATE_FORMAT_VERSION, "generation": generation, "base": base, "parts": parts}
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, manifest_path)
+
+    def _write_part(self, df: pd.DataFrame) -> str:
+        part = f"part-{uuid.uuid4().hex}"
+        directory = os.path.join(self.path, part)
+        os.makedirs(directory)
+        for column, dtype in STATE_COLUMNS.items():
+            np.save(os.path.join(directory, f"{column}.npy"), df[column].to_numpy(dtype))
+        return part
+
+    def current(self) -> UserAggregates:
+        """
+        Returns the committed state.
+        """
+        manifest = self._read_manifest(self._manifest_path)
+        return UserAggregates(self.path, manifest["parts"], manifest.get("generation"))
+
+    def fold(self, game_df: pd.DataFrame, workers: Optional[int] = 1,
+             backend: str = "pandas") -> UserAggregates:
+        """
+        Folds new game events into a pending version of the state.
+
+        Parameters:
+            game_df (pd.DataFrame): Typed, de-duplicated game events not yet folded in.
+            workers (int): Processes aggregating the events (see aggregate_user_events).
+            backend (str): Engine aggregating the events (see backends.py).
+
+        Returns:
+            UserAggregates: The pending state; pass its `generation` to commit().
+        """
+        return self._fold_delta(aggregate_user_events(game_df, workers, backend), len(game_df))
+
+    def fold_chunks(self, game_chunks: Iterable[pd.DataFrame], partitions: int,
+                    spill_dir: Optional[str] = None, backend: str = "pandas") -> UserAggregates:
+        """
+        Same as fold() for events too large for memory: the chunks are spilled
+        to disk hash-partitioned on user_id and aggregated one partition at a
+        time, producing exactly the delta fold() would.
+
+        Parameters:
+            game_chunks (Iterable[pd.DataFrame]): Typed, de-duplicated event chunks.
+            partitions (int): On-disk partitions (see spill.spill_partitions).
+            spill_dir (str): Parent of the scratch directory.
+            backend (str): Engine aggregating each spilled partition (see backends.py).
+
+        Returns:
+            UserAggregates: The pending state; pass its `generation` to commit().
+        """
+        rows = 0
+
+        def projected():
+            nonlocal rows
+            for chunk in game_chunks:
+                rows += len(chunk)
+                yield project_user_events(chunk)
+
+        empty = project_user_events(apply_schema(pd.DataFrame(), GAME_EVENTS_SCHEMA))
+        delta = aggregate_spilled(projected(), lambda part: aggregate_user_events(part, backend=backend),
+                                  "user_id", partitions, empty, spill_dir)
+        return self._fold_delta(delta, rows)
+
+    def _fold_delta(self, delta: pd.DataFrame, events: int) -> UserAggregates:
+        with self._locked():
+            current = self._read_manifest(self._manifest_path)
+            parts = current["parts"]
+            if not delta.empty:
+                parts = parts + [self._write_part(delta)]
+            if len(parts) > self.max_parts:
+                merged = UserAggregates(self.path, parts).to_frame()
+                print(f"🗜️ Compacted {len(parts)} user state parts ({len(merged)} users)")
+                parts = [self._write_part(merged)]
+
+            generation = uuid.uuid4().hex
+            self._write_manifest(self._pending_path(generation), parts, generation, current.get("generation"))
+        print(f"📈 Folded {events} events for {len(delta)} users into pending user state {generation}")
+        return UserAggregates(self.path, parts, generation)
+
+    def commit(self, generation: str) -> None:
+        """
+        Makes a pending state current and deletes parts no longer referenced.
+        Committing a generation that is already current does nothing, so a
+        retried commit is safe. A version folded on a state that has been
+        replaced since (by an overlapping run) is rejected.
+        """
+        with self._locked():
+            pending = self._pending_path(generation)
+            current = self._read_manifest(self._manifest_path).get("generation")
+            if os.path.exists(pending):
+                base = self._read_manifest(pending).get("base")
+                if base != current:
+                    raise RuntimeError(f"User state {generation} was folded on {base}, but {current} is now "
+                                       "current; re-run to fold the events into the current state")
+                os.replace(pending, self._manifest_path)
+                print(f"🔖 Committed user state {generation}")
+            elif current != generation:
+                raise RuntimeError(f"User state {generation} is neither pending nor current")
+            self._collect_garbage()
+
+    def _collect_garbage(self) -> None:
+        # Pending versions that can no longer commit (folded on a replaced
+        # state) and parts referenced by neither the current nor a pending version
+        current = self._read_manifest(self._manifest_path)
+        live = set(current["parts"])
+        for name in os.listdir(self.path):
+            if name.startswith("pending-"):
+                path = os.path.join(self.path, name)
+                pending = self._read_manifest(path)
+                if pending.get("base") != current.get("generation"):
+                    os.remove(path)
+                else:
+                    live.update(pending["parts"])
+        for name in os.listdir(self.path):
+            if name.startswith("part-") and name not in live:
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
@@ -0,0 +1,238 @@
+import os
+import struct
+import zlib
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .rollup import ROLLUP_DIMENSIONS, _codes
+
+# t-digest compression (delta): a digest keeps about delta / 2 centroids.
+# Centroids are smallest at the tails (the k1 scale function), so p99 is as
+# accurate as p50: rank errors are well under 1% at the default 100
+DEFAULT_COMPRESSION = int(os.getenv("MARKETING_TDIGEST_COMPRESSION", 100))
+# Per-user values sketched per day x campaign x source: digest column -> summary column
+DIGEST_METRICS = {"revenue_digest": "total_revenue", "playtime_digest": "total_playtime"}
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+_MAGIC = b"TDG1"
+_HEADER = struct.Struct("<Hdd")
+
+
+def _compress(cells: np.ndarray, means: np.ndarray, weights: np.ndarray, compression: int):
+    # Merges the centroids of many digests at once (cells tells them apart):
+    # within each cell, centroids sorted by mean are merged while they fall in
+    # the same unit of k1(q) = delta / (2 pi) * asin(2q - 1), q being the
+    # cell's cumulative weight fraction. -> (cells, means, weights), sorted
+    order = np.lexsort((means, cells))
+    cells, means, weights = cells[order], means[order], weights[order]
+    if not len(cells):
+        return cells, means, weights
+    totals = np.bincount(cells, weights)
+    cumulative = np.cumsum(weights)
+    before = cumulative - weights
+    first = np.flatnonzero(np.r_[True, cells[1:] != cells[:-1]])
+    before -= np.repeat(before[first], np.diff(np.r_[first, len(cells)]))
+    q = np.clip(before / totals[cells], 0.0, 1.0)
+    width = compression // 2 + 2
+    bucket = np.floor(compression / (2 * np.pi) * np.arcsin(2 * q - 1)).astype(np.int64) + width // 2
+    key = cells.astype(np.int64) * width + bucket
+    bounds = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+    merged = np.add.reduceat(weights, bounds)
+    return cells[bounds], np.add.reduceat(means * weights, bounds) / merged, merged
+
+
+class TDigest:
+    """
+    Mergeable t-digest of a numeric distribution: weighted centroids that
+    are small near both tails, plus the exact minimum and maximum.
+
+    Digests of disjoint data merge into a digest of their union (e.g. every
+    day, campaign and source matching a dashboard filter) with the same
+    accuracy, so quantiles never need a sort over the raw rows.
+    """
+
+    def __init__(self, compression: int = DEFAULT_COMPRESSION, means: Optional[np.ndarray] = None,
+                 weights: Optional[np.ndarray] = None, minimum: float = np.inf, maximum: float = -np.inf):
+        self.compression = compression
+        self.means = np.empty(0) if means is None else means
+        self.weights = np.empty(0) if weights is None else weights
+        self.minimum = minimum
+        self.maximum = maximum
+
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum())
+
+    def _update(self, means: np.ndarray, weights: np.ndarray, minimum: float, maximum: float) -> "TDigest":
+        means, weights = np.concatenate([self.means, means]), np.concatenate([self.weights, weights])
+        _, self.means, self.weights = _compress(np.zeros(len(means), dtype=np.int64), means, weights,
+                                                self.compression)
+        self.minimum, self.maximum = min(self.minimum, minimum), max(self.maximum, maximum)
+        return self
+
+    def add(self, values) -> "TDigest":
+        values = pd.Series(values, dtype="float64").dropna().to_numpy()
+        if not len(values):
+            return self
+        return self._update(values, np.ones(len(values)), values.min(), values.max())
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        return self._update(other.means, other.weights, other.minimum, other.maximum)
+
+    def quantile(self, q):
+        """
+        Estimated quantile(s) q in [0, 1], interpolated between centroid
+        centers (NaN for an empty digest).
+        """
+        q = np.asarray(q, dtype=np.float64)
+        if not len(self.weights):
+            return np.full(q.shape, np.nan)[()]
+        centers = np.cumsum(self.weights) - self.weights / 2
+        positions = np.r_[0.0, centers, self.count]
+        values = np.r_[self.minimum, self.means, self.maximum]
+        return np.interp(q * self.count, positions, values)[()]
+
+    def to_bytes(self) -> bytes:
+        header = _HEADER.pack(self.compression, self.minimum, self.maximum)
+        return _MAGIC + header + zlib.compress(self.means.tobytes() + self.weights.tobytes())
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "TDigest":
+        data = bytes(data)
+        if data[:len(_MAGIC)] != _MAGIC:
+            raise ValueError("Not a serialized t-digest")
+        compression, minimum, maximum = _HEADER.unpack_from(data, len(_MAGIC))
+        centroids = np.frombuffer(zlib.decompress(data[len(_MAGIC) + _HEADER.size:]), dtype=np.float64)
+        means, weights = np.split(centroids.copy(), 2)
+        return cls(compression, means, weights, minimum, maximum)
+
+
+def merge_digests(digests: Iterable[bytes], compression: int = DEFAULT_COMPRESSION) -> TDigest:
+    """
+    Merges serialized digests (e.g. a digest column of the rows matching a
+    filter); an empty selection gives an empty digest.
+    """
+    parts = [TDigest.from_bytes(data) for data in digests]
+    if not parts:
+        return TDigest(compression)
+    merged = TDigest(parts[0].compression)
+    return merged._update(np.concatenate([p.means for p in parts]), np.concatenate([p.weights for p in parts]),
+                          min(p.minimum for p in parts), max(p.maximum for p in parts))
+
+
+class DigestBuilder:
+    """
+    Builds one t-digest per DIGEST_METRICS column per day x campaign x source
+    cell of the joined summary, chunk by chunk.
+
+    The summary repeats a user's totals on each of their clicks, so each
+    user's value is added once per cell: the (cell, user) pairs already seen
+    are kept, as in RollupBuilder. The centroids of all cells live in flat
+    arrays and every chunk is merged into them with one vectorized
+    _compress per metric, so there is no per-cell Python loop.
+    """
+
+    def __init__(self, compression: int = DEFAULT_COMPRESSION):
+        self.compression = compression
+        self._labels = {d: {} for d in ROLLUP_DIMENSIONS}
+        self._cells = {}
+        self._seen: Optional[pd.DataFrame] = None
+        self._centroids = {name: (np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)) for name in DIGEST_METRICS}
+        self._minimum = {name: np.empty(0) for name in DIGEST_METRICS}
+        self._maximum = {name: np.empty(0) for name in DIGEST_METRICS}
+
+    def add(self, df: pd.DataFrame) -> None:
+        df = df.dropna(subset=["user_id", "clicked_at", "campaign_name", "source"])
+        day = _codes(pd.to_datetime(df["clicked_at"]).dt.floor("D"), self._labels["day"])
+        campaign = _codes(df["campaign_name"], self._labels["campaign_name"])
+        source = _codes(df["source"], self._labels["source"])
+        campaigns, sources = len(self._labels["campaign_name"]), len(self._labels["source"])
+        inverse, keys = pd.factorize((day * campaigns + campaign) * sources + source)
+        keys = zip(keys // (campaigns * sources), keys // sources % campaigns, keys % sources)
+        rows = np.array([self._cells.setdefault(key, len(self._cells)) for key in keys], dtype=np.int64)
+
+        # Each user's per-user totals once per cell, across chunks too
+        pairs = pd.DataFrame({"cell": rows[inverse], "user_id": df["user_id"].to_numpy("int64")})
+        new = ~pairs.duplicated().to_numpy()
+        if self._seen is not None:
+            new &= ~pd.MultiIndex.from_frame(pairs).isin(pd.MultiIndex.from_frame(self._seen))
+        pairs = pairs[new]
+        self._seen = pairs if self._seen is None else pd.concat([self._seen, pairs], ignore_index=True)
+
+        n = len(self._cells)
+        for name, column in DIGEST_METRICS.items():
+            values = df[column].to_numpy("float64", na_value=np.nan)[new]
+            valid = ~np.isnan(values)
+            cells, values = pairs["cell"].to_numpy()[valid], values[valid]
+            old_cells, old_means, old_weights = self._centroids[name]
+            self._centroids[name] = _compress(np.concatenate([old_cells, cells]),
+                                              np.concatenate([old_means, values]),
+                                              np.concatenate([old_weights, np.ones(len(values))]),
+                                              self.compression)
+            minimum = np.full(n, np.inf)
+            maximum = np.full(n, -np.inf)
+            minimum[:len(self._minimum[name])] = self._minimum[name]
+            maximum[:len(self._maximum[name])] = self._maximum[name]
+            np.minimum.at(minimum, cells, values)
+            np.maximum.at(maximum, cells, values)
+            self._minimum[name], self._maximum[name] = minimum, maximum
+
+    def result(self) -> pd.DataFrame:
+        """
+        Returns day, campaign_name, source and a serialized digest per DIGEST_METRICS column.
+        """
+        labels = {d: list(self._labels[d]) for d in ROLLUP_DIMENSIONS}
+        cells = list(self._cells)
+        result = pd.DataFrame({
+            "day": pd.to_datetime(pd.Series([labels["day"][c[0]] for c in cells], dtype=object)).astype("datetime64[ns]"),
+            "campaign_name": pd.Series([labels["campaign_name"][c[1]] for c in cells], dtype="string"),
+            "source": pd.Series([labels["source"][c[2]] for c in cells], dtype="string"),
+        })
+        for name in DIGEST_METRICS:
+            cell, means, weights = self._centroids[name]
+            bounds = np.searchsorted(cell, np.arange(len(cells) + 1))
+            result[name] = pd.Series([
+                TDigest(self.compression, means[start:stop], weights[start:stop],
+                        self._minimum[name][row], self._maximum[name][row]).to_bytes()
+                for row, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:]))
+            ], index=result.index, dtype=object)
+        return result
+
+
+def build_user_digests(chunks: Iterable[pd.DataFrame], compression: int = DEFAULT_COMPRESSION) -> pd.DataFrame:
+    """
+    Builds mergeable t-digests of revenue-per-user and playtime-per-user per
+    day x campaign x source of the joined summary (transform_and_join's
+    output, whole or in chunks). Merging the digests of any set of cells
+    (merge_digests) estimates the quantiles of their users' totals, each
+    user counted once per cell they clicked in.
+
+    Parameters:
+        chunks (Iterable[pd.DataFrame]): The joined rows, e.g. [final_df].
+        compression (int): t-digest compression (see DEFAULT_COMPRESSION).
+
+    Returns:
+        pd.DataFrame: day, campaign_name, source, revenue_digest, playtime_digest (bytes).
+    """
+    builder = DigestBuilder(compression)
+    rows = 0
+    for chunk in chunks:
+        builder.add(chunk)
+        rows += len(chunk)
+    digests = builder.result()
+    print(f"📐 Sketched per-user revenue and playtime of {rows} summary rows into {len(digests)} t-digest cells.")
+    return digests
+
+
+def digest_quantiles(digests: pd.DataFrame, quantiles: Sequence[float] = DEFAULT_QUANTILES) -> pd.DataFrame:
+    """
+    Quantiles of each DIGEST_METRICS column of `digests`, all rows merged.
+
+    Returns:
+        pd.DataFrame: One row per metric (revenue, playtime), one column per quantile (p50, p90, ...).
+    """
+    rows = {name.replace("_digest", ""): merge_digests(digests[name]).quantile(list(quantiles))
+            for name in DIGEST_METRICS}
+    return pd.DataFrame.from_dict(rows, orient="index", columns=[f"p{q * 100:g}" for q in quantiles])
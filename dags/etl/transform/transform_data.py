@@ -1,6 +1,110 @@
+from typing import Iterable, Iterator, Optional, Sequence
+
+import numpy as np
 import pandas as pd
 
-def transform_and_join(game_df: pd.DataFrame, campaign_df: pd.DataFrame) -> pd.DataFrame:
+from ..extract.pushdown import Pushdown
+from ..extract.schema import CAMPAIGNS_SCHEMA, GAME_EVENTS_SCHEMA, apply_schema, revenue_cents
+from .backends import USER_CAMPAIGN_SUMMARY, USER_TOTALS, get_backend, pandas_aggregate, pandas_join
+from .kernels import aggregate_by_key
+from .plan import Plan
+from .parallel import find_hot_keys, parallel_workers, partition_frame, run_partitions
+from .spill import aggregate_spilled
+from .state_store import UserAggregates, project_user_events
+
+# Raw fields transform_and_join reads, and the keys it drops null rows on.
+# The extract stage applies these while parsing so nothing else is materialized.
+GAME_EVENTS_PUSHDOWN = Pushdown(
+    columns=("user_id", "session_id", "event_time", "playtime_minutes", "revenue"),
+    not_null=("user_id", "session_id", "event_time"),
+)
+# With sessionize, session_id is rebuilt from event_time, so events missing
+# it upstream are kept instead of being rejected while parsing
+SESSIONIZE_PUSHDOWN = GAME_EVENTS_PUSHDOWN._replace(not_null=("user_id", "event_time"))
+CAMPAIGNS_PUSHDOWN = Pushdown(
+    columns=("user_id", "campaign_name", "source", "clicked_at"),
+    not_null=("user_id", "campaign_name", "source", "clicked_at"),
+)
+
+_ORDER = "_campaign_order"
+
+
+def _with_cents(game_df: pd.DataFrame) -> pd.DataFrame:
+    # Revenue is summed in exact integer cents (also from untyped frames)
+    if "revenue_cents" in game_df.columns:
+        return game_df
+    return game_df.assign(revenue_cents=revenue_cents(game_df))
+
+
+def _aggregate_events(game_df: pd.DataFrame) -> pd.DataFrame:
+    return pandas_aggregate(USER_TOTALS, _with_cents(game_df))
+
+
+def _join_user_totals(campaign_df: pd.DataFrame, agg_game: pd.DataFrame) -> pd.DataFrame:
+    # A LEFT JOIN keeps all campaign records; users who clicked but never
+    # played get 0 playtime and revenue (see USER_CAMPAIGN_SUMMARY)
+    return pandas_join(USER_CAMPAIGN_SUMMARY, campaign_df, agg_game)
+
+
+def _join_partition(game_part: pd.DataFrame, campaign_part: pd.DataFrame,
+                    hot_keys: Sequence) -> tuple:
+    # Hot users' events are spread over every partition, so only their partial
+    # totals are returned; the parent combines them and joins their clicks
+    agg_game = _aggregate_events(game_part)
+    hot = agg_game["user_id"].isin(hot_keys)
+    return _join_user_totals(campaign_part, agg_game[~hot]), agg_game[hot]
+
+
+def _partitioned_join(game_df: pd.DataFrame, campaign_df: pd.DataFrame, workers: int) -> pd.DataFrame:
+    hot_keys = find_hot_keys(game_df["user_id"], workers)
+
+    campaign_df = campaign_df.assign(**{_ORDER: np.arange(len(campaign_df))})
+    hot_clicks = campaign_df["user_id"].isin(hot_keys).to_numpy()
+    game_parts = partition_frame(game_df, "user_id", workers, hot_keys)
+    campaign_parts = partition_frame(campaign_df[~hot_clicks], "user_id", workers)
+    results = run_partitions(_join_partition, [(game, campaign, hot_keys)
+                                               for game, campaign in zip(game_parts, campaign_parts)], workers)
+
+    hot_totals = aggregate_by_key(pd.concat([partial for _, partial in results]), "user_id",
+                                  sums={name: name for name, _ in USER_TOTALS.sums})
+    frames = [joined for joined, _ in results] + [_join_user_totals(campaign_df[hot_clicks], hot_totals)]
+    # Restore the campaign order of the single-process join
+    final_df = pd.concat(frames, ignore_index=True)
+    return final_df.sort_values(_ORDER, ignore_index=True).drop(columns=_ORDER)
+
+
+def _lookup_user_totals(user_state: UserAggregates, campaign_df: pd.DataFrame) -> pd.DataFrame:
+    # Only the clicked users' running totals are read from the state store
+    agg_game = user_state.lookup(campaign_df["user_id"])[[USER_TOTALS.key, *USER_TOTALS.outputs()]]
+    agg_game["user_id"] = agg_game["user_id"].astype(campaign_df["user_id"].dtype)
+    return agg_game
+
+
+def transform_plan(game_df: pd.DataFrame, campaign_df: pd.DataFrame,
+                   user_state: Optional[UserAggregates] = None) -> Plan:
+    """
+    Describes transform_and_join's single-process steps as a lazy Plan:
+
+    - Removes invalid/null records from both datasets
+    - Aggregates total playtime and revenue per user from game events
+      (or reads the clicked users' running totals from user_state)
+    - Left-joins campaign clicks with game activity using 'user_id'
+    - Fills in missing values for users with no activity
+
+    Call .explain() to print the optimized plan and .collect() to run it.
+    """
+    if user_state is not None:
+        totals = Plan.scan("user_state", _lookup_user_totals(user_state, campaign_df), unique="user_id")
+    else:
+        totals = (Plan.scan("game_events", _with_cents(game_df))
+                  .drop_nulls(["user_id", "session_id", "event_time"])
+                  .aggregate(USER_TOTALS))
+    return Plan.scan("campaigns", campaign_df).join(totals, USER_CAMPAIGN_SUMMARY)
+
+
+def transform_and_join(game_df: pd.DataFrame, campaign_df: pd.DataFrame,
+                       user_state: Optional[UserAggregates] = None,
+                       workers: Optional[int] = 1, backend: str = "pandas") -> pd.DataFrame:
     """
     Transforms and joins game events with campaign data to produce aggregated insights.
 
@@ -13,32 +117,92 @@ def transform_and_join(game_df: pd.DataFrame, campaign_df: pd.DataFrame) -> pd.D
     Parameters:
         game_df (pd.DataFrame): DataFrame containing raw game event data
         campaign_df (pd.DataFrame): DataFrame containing campaign click data
+        user_state (UserAggregates): Running per-user totals that already include
+                                     game_df (see UserStateStore.fold); when given,
+                                     campaigns are joined against it instead of
+                                     re-aggregating game_df
+        workers (int): Processes for the aggregation and join (None = CPU count).
+                       Large inputs are hash-partitioned on user_id, with hot
+                       users spread over all partitions; the output matches
+                       the single-process join row for row
+        backend (str): Execution engine for the aggregation and join: "pandas",
+                       "polars" or "duckdb" (see backends.py; the latter two
+                       run in-process and use their own threads)
 
     Returns:
         pd.DataFrame: Final joined and cleaned dataset ready for loading to database
     """
-    # Step 1: Drop rows with missing essential fields
-    game_df = game_df.dropna(subset=["user_id", "session_id", "event_time"])
-    campaign_df = campaign_df.dropna(subset=["user_id", "campaign_name", "source", "clicked_at"])
-
-    # Step 2: Aggregate game data by user_id (sum playtime and revenue)
-    agg_game = game_df.groupby("user_id").agg(
-        total_playtime=("playtime_minutes", "sum"),
-        total_revenue=("revenue", "sum")
-    ).reset_index()
-
-    # Step 3: Join campaign data with aggregated game data
-    # We use a LEFT JOIN to keep all campaign records even if no gameplay happened
-    final_df = pd.merge(
-        campaign_df,
-        agg_game,
-        on="user_id",
-        how="left"
-    )
-
-    # Step 4: Fill NaNs with 0 for users who clicked but never played
-    final_df["total_playtime"] = final_df["total_playtime"].fillna(0)
-    final_df["total_revenue"] = final_df["total_revenue"].fillna(0)
+    # Development-mode sampling metadata of the extracts, carried to the output
+    sample = game_df.attrs.get("sample") or campaign_df.attrs.get("sample")
 
+    workers = parallel_workers(len(game_df), workers)
+    if user_state is not None or (backend == "pandas" and workers == 1):
+        # Filtering, aggregation, join and zero fill run as one optimized plan
+        final_df = transform_plan(game_df, campaign_df, user_state).collect()
+    else:
+        # Step 1: Drop rows with missing essential fields (already rejected at
+        # parse time when extracted with the pushdowns above; timestamps coerced to NaT remain)
+        game_df = game_df.dropna(subset=["user_id", "session_id", "event_time"])
+        campaign_df = campaign_df.dropna(subset=["user_id", "campaign_name", "source", "clicked_at"])
+        if backend != "pandas":
+            final_df = get_backend(backend).transform(USER_CAMPAIGN_SUMMARY, _with_cents(game_df), campaign_df)
+        else:
+            final_df = _partitioned_join(game_df, campaign_df, workers)
+
+    if sample:
+        final_df.attrs["sample"] = sample
     print(f"✅ Transformed data: {len(final_df)} records after join and aggregation.")
-    return final_df
\ No newline at end of file
+    return final_df
+
+def _or_empty(chunks: Iterable[pd.DataFrame], empty: pd.DataFrame) -> Iterator[pd.DataFrame]:
+    seen = False
+    for chunk in chunks:
+        seen = True
+        yield chunk
+    if not seen:
+        yield empty
+
+
+def transform_and_join_chunks(game_chunks: Iterable[pd.DataFrame], campaign_chunks: Iterable[pd.DataFrame],
+                              partitions: int, user_state: Optional[UserAggregates] = None,
+                              spill_dir: Optional[str] = None, backend: str = "pandas") -> Iterator[pd.DataFrame]:
+    """
+    Out-of-core transform_and_join for inputs larger than the memory budget.
+
+    Game events are spilled to disk hash-partitioned on user_id and
+    aggregated one partition at a time (see spill.aggregate_spilled); the
+    campaign clicks are then streamed chunk by chunk and joined against the
+    per-user totals. Only one partition, the per-user totals and one chunk
+    are in memory at a time, and the concatenated chunks equal
+    transform_and_join's output row for row.
+
+    Parameters:
+        game_chunks (Iterable[pd.DataFrame]): Game event chunks (ignored when
+                                              user_state is given).
+        campaign_chunks (Iterable[pd.DataFrame]): Campaign click chunks, in order.
+        partitions (int): On-disk partitions for the events (see spill.spill_partitions).
+        user_state (UserAggregates): Running per-user totals (see UserStateStore.fold_chunks).
+        spill_dir (str): Parent of the scratch directory.
+        backend (str): Engine aggregating each spilled partition (see backends.py).
+
+    Returns:
+        Iterator[pd.DataFrame]: The joined rows, in campaign order.
+    """
+    if user_state is None:
+        empty = project_user_events(apply_schema(pd.DataFrame(), GAME_EVENTS_SCHEMA))
+        aggregate = get_backend(backend).aggregate
+        agg_game = aggregate_spilled((project_user_events(chunk) for chunk in game_chunks),
+                                     lambda part: aggregate(USER_TOTALS, part), "user_id", partitions, empty, spill_dir)
+
+    rows = 0
+    # An empty click stream still yields one (empty) frame with the output columns
+    for campaign_df in _or_empty(campaign_chunks, apply_schema(pd.DataFrame(), CAMPAIGNS_SCHEMA)):
+        sample = campaign_df.attrs.get("sample")
+        campaign_df = campaign_df.dropna(subset=["user_id", "campaign_name", "source", "clicked_at"])
+        totals = _lookup_user_totals(user_state, campaign_df) if user_state is not None else agg_game
+        final_df = _join_user_totals(campaign_df, totals)
+        if sample:
+            final_df.attrs["sample"] = sample
+        rows += len(final_df)
+        yield final_df
+    print(f"✅ Transformed data: {rows} records after join and aggregation (out of core).")
@@ -1,21 +1,82 @@
 import sys
 import os
 from datetime import datetime, timedelta
+from functools import partial
+
+import pandas as pd
 
 # Add the root path to the Python path for module imports
 sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
 
 # Airflow imports
 from airflow import DAG
-from airflow.operators.python import PythonOperator
+from airflow.models.param import Param
+from airflow.operators.python import PythonOperator, ShortCircuitOperator
 
 # Import ETL task functions from local modules
+from dags.etl.artifacts import (estimate_memory_bytes, iter_artifact_chunks, prune_artifacts, read_artifact,
+                                remove_run, write_artifact, write_artifact_chunks)
 from dags.etl.extract.extract_game_events import extract_game_events
 from dags.etl.extract.extract_campaigns import extract_campaign_data
-from dags.etl.transform.transform_data import transform_and_join
-from dags.etl.load.load_to_postgres import load_to_postgres
+from dags.etl.extract.object_store import is_object_uri
+from dags.etl.extract.partitions import resolve_input_files
+from dags.etl.extract.sampling import sample_from_config
+from dags.etl.extract.schema import CAMPAIGNS_SCHEMA, GAME_EVENTS_SCHEMA, apply_schema, concat_typed
+from dags.etl.extract.watermark import Watermark, WatermarkStore, extract_incremental
+from dags.etl.transform.attribution import ATTRIBUTION_MODELS, DEFAULT_LOOKBACK_DAYS, attribute
+from dags.etl.transform.dedup import DedupKeyStore, dedup_chunks
+from dags.etl.transform.hll import SketchBuilder
+from dags.etl.transform.rollup import ROLLUP_DIMENSIONS, build_rollup
+from dags.etl.transform.sessionize import sessionize
+from dags.etl.transform.spill import memory_budget, spill_partitions
+from dags.etl.transform.state_store import UserStateStore
+from dags.etl.transform.tdigest import DigestBuilder
+from dags.etl.transform.transform_data import (CAMPAIGNS_PUSHDOWN, GAME_EVENTS_PUSHDOWN, SESSIONIZE_PUSHDOWN,
+                                               transform_and_join, transform_and_join_chunks)
+from dags.etl.load.load_to_postgres import (ATTRIBUTION_COLUMNS, ROLLUP_COLUMNS, SESSION_COLUMNS, SKETCH_COLUMNS,
+                                            SKETCH_DTYPES, SUMMARY_COLUMNS, TableLoad, load_tables_to_postgres,
+                                            read_loaded_clicks)
 from dags.etl.extract.trigger_lambda import trigger_lambda_function
 
+# Raw input locations: a file, glob or partition spec such as
+# "data/raw/game_events/dt=*/hour=*", or an object-store prefix such as
+# "s3://bucket/marketing_raw/game_events/" (override with environment variables)
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+GAME_EVENTS_PATH = os.getenv("MARKETING_GAME_EVENTS_PATH", os.path.join(DATA_DIR, "game_events.json"))
+CAMPAIGNS_PATH = os.getenv("MARKETING_CAMPAIGNS_PATH", os.path.join(DATA_DIR, "campaigns.json"))
+
+# Rows per chunk streamed through the de-duplication stage, and through the
+# transform and load when the inputs exceed the transform's memory budget
+DEDUP_CHUNKSIZE = 500_000
+TRANSFORM_CHUNKSIZE = 500_000
+
+# Processes for the event aggregation and join (None = CPU count); small
+# inputs are transformed in-process (see dags/etl/transform/parallel.py)
+TRANSFORM_WORKERS = int(os.environ["MARKETING_TRANSFORM_WORKERS"]) if os.getenv("MARKETING_TRANSFORM_WORKERS") else None
+
+# Development mode loads here instead, and never advances the watermarks
+SAMPLE_TABLE = "user_campaign_summary_sample"
+
+# Sessions rebuilt from event_time gaps (when the sessionize param is set)
+SESSIONS_TABLE = "game_sessions"
+SESSIONS_SAMPLE_TABLE = "game_sessions_sample"
+
+# Per-click attributed revenue and playtime (when attribution_model is set)
+ATTRIBUTION_TABLE = "campaign_attribution"
+ATTRIBUTION_SAMPLE_TABLE = "campaign_attribution_sample"
+
+# Pre-aggregated day x campaign x source cube of the summary, at every grouping
+# level. Each incremental run appends the cube of its own rows: across runs,
+# sum only the grouping_id 0 cells, and never sum unique_users (a per-run
+# distinct count; merge SKETCH_TABLE's sketches instead)
+ROLLUP_TABLE = "campaign_rollup"
+ROLLUP_SAMPLE_TABLE = "campaign_rollup_sample"
+
+# Mergeable HyperLogLog sketches of user_id and t-digests of revenue and
+# playtime per user, per day x campaign x source
+SKETCH_TABLE = "campaign_user_sketches"
+SKETCH_SAMPLE_TABLE = "campaign_user_sketches_sample"
+
 # Default arguments for the DAG
 default_args = {
     'owner': 'airflow',
@@ -23,6 +84,213 @@ default_args = {
     'retry_delay': timedelta(minutes=5),
 }
 
+
+def input_files(spec):
+    # Object-store prefixes are listed and downloaded by the extractor itself
+    return [spec] if is_object_uri(spec) else resolve_input_files(spec)
+
+
+def run_sample(params):
+    # The development-mode sample selected by the DAG params (None = full run)
+    return sample_from_config(params["sample_method"], params["sample_rate"], params["sample_size"],
+                              params["sample_seed"])
+
+
+# Task outputs are written as Arrow files to a shared run directory; XCom
+# only carries the small artifact handles (see dags/etl/artifacts.py)
+
+
+def extract_events_task(ti, params):
+    # Only read events newer than the stored watermark; the candidate mark is
+    # committed after a successful load
+    # Only the columns and non-null keys the transform needs are parsed, and
+    # sampled runs keep the same users' events as their campaign clicks.
+    # Events without a session_id are kept when sessions are rebuilt
+    pushdown = SESSIONIZE_PUSHDOWN if params.get("sessionize") else GAME_EVENTS_PUSHDOWN
+    df, mark = extract_incremental("game_events", input_files(GAME_EVENTS_PATH),
+                                   partial(extract_game_events, pushdown=pushdown),
+                                   "event_time", GAME_EVENTS_SCHEMA, sample=run_sample(params))
+    ti.xcom_push(key="watermark", value=mark.to_dict())
+    return write_artifact(df, ti.run_id, ti.task_id)
+
+
+def extract_campaigns_task(ti, params):
+    df, mark = extract_incremental("campaigns", input_files(CAMPAIGNS_PATH),
+                                   partial(extract_campaign_data, pushdown=CAMPAIGNS_PUSHDOWN),
+                                   "clicked_at", CAMPAIGNS_SCHEMA, sample=run_sample(params))
+    ti.xcom_push(key="watermark", value=mark.to_dict())
+    return write_artifact(df, ti.run_id, ti.task_id)
+
+
+def dedup_events_task(ti, params):
+    # Lambda retries and overlapping exports repeat sessions; keep the first
+    # row per session_id, streaming the extract in chunks. Sessions kept by
+    # earlier committed runs are dropped too; sampled runs read the whole
+    # source and dedup within the run only
+    chunks = iter_artifact_chunks(ti.xcom_pull(task_ids="extract_game_events"), DEDUP_CHUNKSIZE)
+    if run_sample(params) is None:
+        with DedupKeyStore("game_events") as history:
+            frames = [chunk for chunk in dedup_chunks(chunks, history=history, run_id=ti.run_id)
+                      if not chunk.empty]
+    else:
+        frames = [chunk for chunk in dedup_chunks(chunks) if not chunk.empty]
+    df = concat_typed(frames) if frames else apply_schema(pd.DataFrame(), GAME_EVENTS_SCHEMA)
+    if params.get("sessionize"):
+        # Upstream session ids are often missing or inconsistent; rebuild them
+        # from event_time gaps so those events are no longer dropped. Sessions
+        # are rebuilt within this run's events
+        df, sessions = sessionize(df, params["session_timeout_minutes"])
+        ti.xcom_push(key="sessions", value=write_artifact(sessions, ti.run_id, f"{ti.task_id}_sessions"))
+    return write_artifact(df, ti.run_id, ti.task_id)
+
+
+def has_new_data(ti) -> bool:
+    # Returning False skips every downstream task for this run; the handles
+    # carry row counts, so nothing has to be read here
+    game = ti.xcom_pull(task_ids="dedup_game_events")
+    campaigns = ti.xcom_pull(task_ids="extract_campaign_data")
+    return game["rows"] > 0 or campaigns["rows"] > 0
+
+
+def transform_task(ti, params):
+    backend = params.get("transform_backend", "pandas")
+    game = ti.xcom_pull(task_ids="dedup_game_events")
+    campaigns = ti.xcom_pull(task_ids="extract_campaign_data")
+    # Inputs that would not fit the memory budget are spilled to disk by
+    # user_id hash and streamed through the transform instead
+    estimated = estimate_memory_bytes(game) + estimate_memory_bytes(campaigns)
+    if estimated > memory_budget():
+        return transform_out_of_core(ti, params, game, campaigns, spill_partitions(estimated, memory_budget()), backend)
+
+    game_df = read_artifact(game)
+    campaign_df = read_artifact(campaigns)
+    if run_sample(params) is not None:
+        # Sampled events must never reach the persisted per-user totals
+        df = transform_and_join(game_df, campaign_df, workers=TRANSFORM_WORKERS, backend=backend)
+    else:
+        # Fold only this run's events into the per-user totals; the new state
+        # stays pending until commit_watermarks runs after the load
+        user_state = UserStateStore().fold(game_df, workers=TRANSFORM_WORKERS, backend=backend)
+        ti.xcom_push(key="user_state", value=user_state.generation)
+        df = transform_and_join(game_df, campaign_df, user_state=user_state)
+    return write_artifact(df, ti.run_id, ti.task_id)
+
+
+def rollup_task(ti):
+    # One streaming pass over the joined rows builds the cube, the
+    # distinct-user sketches and the per-user quantile digests; each is small
+    # enough to write at once
+    sketches, digests = SketchBuilder(), DigestBuilder()
+
+    def sketched(chunks):
+        for chunk in chunks:
+            sketches.add(chunk)
+            digests.add(chunk)
+            yield chunk
+
+    chunks = iter_artifact_chunks(ti.xcom_pull(task_ids="transform_data"), TRANSFORM_CHUNKSIZE)
+    cube = build_rollup(sketched(chunks))
+    cells = sketches.result().merge(digests.result(), on=list(ROLLUP_DIMENSIONS))
+    ti.xcom_push(key="sketches", value=write_artifact(cells, ti.run_id, f"{ti.task_id}_sketches"))
+    return write_artifact(cube, ti.run_id, ti.task_id)
+
+
+def attribute_task(ti, params):
+    # Credits each event to the clicks shortly before it (off unless the
+    # attribution_model param is set)
+    model = params.get("attribution_model")
+    if not model:
+        print("⏭️ No attribution model selected; skipping click attribution.")
+        return None
+    game_df = read_artifact(ti.xcom_pull(task_ids="dedup_game_events"))
+    campaign_df = read_artifact(ti.xcom_pull(task_ids="extract_campaign_data"))
+    lookback_days = params["attribution_lookback_days"]
+
+    # Incremental runs only extract new clicks: the lookback window of this
+    # run's events also reaches the clicks loaded by earlier runs
+    event_times = pd.to_datetime(game_df["event_time"]).dropna()
+    with_earlier = run_sample(params) is None and not event_times.empty
+    if with_earlier:
+        earlier = read_loaded_clicks(event_times.min() - pd.Timedelta(days=lookback_days), event_times.max())
+        print(f"🕰️ Attributing to {len(earlier)} clicks loaded by earlier runs as well")
+        campaign_df = pd.concat([campaign_df.assign(earlier_click=False), earlier.assign(earlier_click=True)],
+                                ignore_index=True)
+
+    df = attribute(game_df, campaign_df, model, lookback_days)
+    if with_earlier:
+        # Earlier clicks already have their rows; keep them only where this run credits them
+        earlier_click = df.pop("earlier_click").fillna(False).astype(bool)
+        df = df[~earlier_click | (df["attributed_events"] > 0)].reset_index(drop=True)
+    return write_artifact(df, ti.run_id, ti.task_id)
+
+
+def transform_out_of_core(ti, params, game, campaigns, partitions, backend):
+    print(f"💽 Transform inputs exceed the memory budget; spilling events to {partitions} partitions")
+    game_chunks = iter_artifact_chunks(game, TRANSFORM_CHUNKSIZE)
+    campaign_chunks = iter_artifact_chunks(campaigns, TRANSFORM_CHUNKSIZE)
+    user_state = None
+    if run_sample(params) is None:
+        user_state = UserStateStore().fold_chunks(game_chunks, partitions, backend=backend)
+        ti.xcom_push(key="user_state", value=user_state.generation)
+    chunks = transform_and_join_chunks(game_chunks, campaign_chunks, partitions, user_state=user_state,
+                                       backend=backend)
+    return write_artifact_chunks(chunks, ti.run_id, ti.task_id)
+
+
+def artifact_load(handle, table_name, sampled, columns=SUMMARY_COLUMNS, dtype=None):
+    # Incremental runs carry only new records, so append instead of replacing;
+    # sampled runs replace their own table. The artifact is loaded in chunks so
+    # an out-of-core transform never has to fit in memory here either
+    return TableLoad(table_name, iter_artifact_chunks(handle, TRANSFORM_CHUNKSIZE), sampled, columns, dtype)
+
+
+def load_task(ti, params):
+    sampled = run_sample(params) is not None
+    loads = [
+        artifact_load(ti.xcom_pull(task_ids="transform_data"),
+                      SAMPLE_TABLE if sampled else "user_campaign_summary", sampled),
+        artifact_load(ti.xcom_pull(task_ids="rollup_summary"), ROLLUP_SAMPLE_TABLE if sampled else ROLLUP_TABLE,
+                      sampled, ROLLUP_COLUMNS),
+        artifact_load(ti.xcom_pull(task_ids="rollup_summary", key="sketches"),
+                      SKETCH_SAMPLE_TABLE if sampled else SKETCH_TABLE, sampled, SKETCH_COLUMNS, SKETCH_DTYPES),
+    ]
+
+    sessions = ti.xcom_pull(task_ids="dedup_game_events", key="sessions")
+    if sessions:
+        loads.append(artifact_load(sessions, SESSIONS_SAMPLE_TABLE if sampled else SESSIONS_TABLE, sampled,
+                                   SESSION_COLUMNS))
+
+    attribution = ti.xcom_pull(task_ids="attribute_clicks")
+    if attribution:
+        loads.append(artifact_load(attribution, ATTRIBUTION_SAMPLE_TABLE if sampled else ATTRIBUTION_TABLE, sampled,
+                                   ATTRIBUTION_COLUMNS))
+
+    # One transaction for every table: a failed load leaves nothing behind,
+    # so the Airflow retry cannot append the same rows twice
+    if not load_tables_to_postgres(loads):
+        raise RuntimeError("Loading to PostgreSQL failed; nothing was loaded and watermarks were not advanced")
+
+
+def commit_watermarks_task(ti, params):
+    if run_sample(params) is not None:
+        print("🎲 Sampled run: watermarks, dedup keys and user state left unchanged.")
+        return
+    # The folded user totals, the dedup keys and the watermarks move forward together
+    UserStateStore().commit(ti.xcom_pull(task_ids="transform_data", key="user_state"))
+    with DedupKeyStore("game_events") as history:
+        history.commit(ti.run_id)
+    store = WatermarkStore()
+    for source, task_id in (("game_events", "extract_game_events"),
+                            ("campaigns", "extract_campaign_data")):
+        store.advance(source, Watermark.from_dict(ti.xcom_pull(task_ids=task_id, key="watermark")))
+
+
+def cleanup_artifacts_task(ti):
+    # Artifacts of failed runs are kept for retries and pruned once stale
+    remove_run(ti.run_id)
+    prune_artifacts()
+
+
 # Define the DAG
 with DAG(
     dag_id='marketing_etl_pipeline',
@@ -31,7 +299,22 @@ with DAG(
     start_date=datetime(2024, 1, 1),
     schedule_interval='@daily',  # Run every day
     catchup=False,               # Do not perform backfill
-    tags=['marketing', 'ETL']    # Tag for UI filtering
+    max_active_runs=1,           # Runs fold into and commit the same user state in turn
+    tags=['marketing', 'ETL'],   # Tag for UI filtering
+    params={                     # Development-mode sampling (off by default)
+        'sample_method': Param('hash', enum=['hash', 'reservoir']),
+        'sample_rate': Param(None, type=['null', 'number'], minimum=0, maximum=1),
+        'sample_size': Param(None, type=['null', 'integer'], minimum=1),
+        'sample_seed': Param(0, type='integer'),
+        # Engine for the per-user aggregation and join (polars/duckdb must be installed)
+        'transform_backend': Param('pandas', enum=['pandas', 'polars', 'duckdb']),
+        # Rebuild session_id per user from event_time gaps and load game_sessions
+        'sessionize': Param(False, type='boolean'),
+        'session_timeout_minutes': Param(30, type='number', exclusiveMinimum=0),
+        # Time-aware click attribution into campaign_attribution (off by default)
+        'attribution_model': Param(None, type=['null', 'string'], enum=[None, *ATTRIBUTION_MODELS]),
+        'attribution_lookback_days': Param(DEFAULT_LOOKBACK_DAYS, type='number', exclusiveMinimum=0),
+    },
 ) as dag:
 
     # Trigger AWS Lambda function (e.g., to fetch fresh data into S3)
@@ -40,34 +323,78 @@ with DAG(
         python_callable=trigger_lambda_function
     )
 
-    # Extract game event data from local/API source
+    # Extract game event data newer than the event_time watermark
     extract_events = PythonOperator(
         task_id='extract_game_events',
-        python_callable=extract_game_events
+        python_callable=extract_events_task
     )
 
-    # Extract campaign data from local/API source
+    # Extract campaign data newer than the clicked_at watermark
     extract_campaigns = PythonOperator(
         task_id='extract_campaign_data',
-        python_callable=extract_campaign_data
+        python_callable=extract_campaigns_task
+    )
+
+    # Drop repeated sessions before they inflate revenue and playtime
+    dedup_events = PythonOperator(
+        task_id='dedup_game_events',
+        python_callable=dedup_events_task
+    )
+
+    # Skip transform and load entirely when no new input has arrived
+    check_new_data = ShortCircuitOperator(
+        task_id='check_new_data',
+        python_callable=has_new_data
     )
 
     # Transform and join the extracted datasets
     transform = PythonOperator(
         task_id='transform_data',
-        python_callable=transform_and_join
+        python_callable=transform_task
+    )
+
+    # Roll the summary up by day, campaign and source for the dashboard and
+    # queries, and sketch its distinct users and per-user quantiles per cell
+    rollup = PythonOperator(
+        task_id='rollup_summary',
+        python_callable=rollup_task
+    )
+
+    # Credit event revenue and playtime to the clicks in each event's lookback window
+    attribute_clicks = PythonOperator(
+        task_id='attribute_clicks',
+        python_callable=attribute_task
     )
 
     # Load the final transformed data into PostgreSQL
     load = PythonOperator(
         task_id='load_data',
-        python_callable=load_to_postgres
+        python_callable=load_task
+    )
+
+    # Advance the watermarks and per-user totals only once the new data is safely loaded
+    commit_watermarks = PythonOperator(
+        task_id='commit_watermarks',
+        python_callable=commit_watermarks_task
+    )
+
+    # Delete this run's intermediate artifacts (and stale ones from failed runs)
+    cleanup_artifacts = PythonOperator(
+        task_id='cleanup_artifacts',
+        python_callable=cleanup_artifacts_task
     )
 
     # Define task dependencies:
     # 1. First run the Lambda trigger
-    # 2. Then run both extract tasks
-    # 3. Then transform the merged data
-    # 4. Finally, load to the database
+    # 2. Then run both extract tasks (new records only) and de-duplicate game events
+    # 3. Short-circuit if nothing new arrived
+    # 4. Then transform the merged data and roll it up (and attribute clicks, if enabled)
+    # 5. Load to the database, then advance the watermarks and user state
+    # 6. Finally remove the run's artifacts
 
-    trigger_lambda >> [extract_events, extract_campaigns] >> transform >> load
\ No newline at end of file
+    trigger_lambda >> [extract_events, extract_campaigns]
+    extract_events >> dedup_events
+    [dedup_events, extract_campaigns] >> check_new_data >> [transform, attribute_clicks]
+    transform >> rollup
+    [rollup, attribute_clicks] >> load
+    load >> commit_watermarks >> cleanup_artifacts
@@ -5,8 +5,14 @@ import plotly.express as px
 from sqlalchemy import create_engine
 from dotenv import load_dotenv
 import os
+import sys
 from components.helpers import plot_gauge
 
+# Add root directory to sys.path
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from dags.etl.transform.hll import merge_sketches
+from queries.unique_users import load_user_sketches, sketch_error
+
 # ───── Streamlit Setup ─────
 st.set_page_config(page_title="EA Marketing Dashboard", layout="wide")
 plt.rcParams.update({
@@ -23,7 +29,13 @@ engine = create_engine(conn_str)
 def load_data():
     return pd.read_sql("SELECT * FROM user_campaign_summary", engine)
 
+@st.cache_data
+def load_sketches():
+    # Per day x campaign x source HyperLogLog sketches of user_id (see queries/unique_users.py)
+    return load_user_sketches(engine, columns=("precision", "sketch"))
+
 df = load_data()
+sketches = load_sketches()
 df.rename(columns={"clicked_at": "event_date"}, inplace=True)
 df["event_date"] = pd.to_datetime(df["event_date"], errors="coerce")
 
@@ -45,7 +57,10 @@ st.title("🎯 Marketing Analytics Dashboard")
 k1, k2, k3, k4 = st.columns(4)
 k1.metric("💰 Total Revenue", f"${df_filtered['total_revenue'].sum():,.2f}")
 k2.metric("⏱ Total Playtime", f"{df_filtered['total_playtime'].sum():,.0f} min")
-k3.metric("👥 Unique Users", df_filtered['user_id'].nunique())
+# Union of the selected cells' sketches: no pass over the raw rows
+selected = sketches["campaign_name"].isin(campaigns) & sketches["source"].isin(sources)
+k3.metric("👥 Unique Users", f"~{merge_sketches(sketches.loc[selected, 'sketch']).count():,}",
+          help=f"HyperLogLog estimate, ±{sketch_error(sketches):.1%} standard error")
 k4.metric("🎯 Campaigns Used", df_filtered['campaign_name'].nunique())
 
 # ───── Ratio Indicators ─────
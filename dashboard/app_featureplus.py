@@ -6,8 +6,14 @@ import plotly.express as px
 from sqlalchemy import create_engine
 from dotenv import load_dotenv
 import os
+import sys
 from components.helpers import plot_gauge
 
+# Add root directory to sys.path
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from dags.etl.transform.hll import merge_sketches
+from queries.unique_users import load_user_sketches, sketch_error
+
 
 st.plotly_chart(plot_gauge("Equity Ratio", 0.7538, "#00CC96"))
 st.plotly_chart(plot_gauge("Debt Equity Ratio", 0.011, "#EF553B"))
@@ -33,7 +39,13 @@ engine = create_engine(conn_str)
 def load_data():
     return pd.read_sql("SELECT * FROM user_campaign_summary", engine)
 
+@st.cache_data
+def load_sketches():
+    # Per day x campaign x source HyperLogLog sketches of user_id (see queries/unique_users.py)
+    return load_user_sketches(engine, columns=("precision", "sketch"))
+
 df = load_data()
+sketches = load_sketches()
 
 # ✅ Rename clicked_at → event_date for consistency
 df.rename(columns={"clicked_at": "event_date"}, inplace=True)
@@ -54,7 +66,10 @@ st.title("🎯 Marketing Analytics Dashboard")
 kpi1, kpi2, kpi3, kpi4 = st.columns(4)
 kpi1.metric("💰 Total Revenue", f"${filtered_df['total_revenue'].sum():,.2f}")
 kpi2.metric("⏱ Total Playtime", f"{filtered_df['total_playtime'].sum():,.0f} min")
-kpi3.metric("👥 Unique Users", filtered_df['user_id'].nunique())
+# Union of the selected cells' sketches: no pass over the raw rows
+selected = sketches["campaign_name"].isin(campaigns) & sketches["source"].isin(sources)
+kpi3.metric("👥 Unique Users", f"~{merge_sketches(sketches.loc[selected, 'sketch']).count():,}",
+            help=f"HyperLogLog estimate, ±{sketch_error(sketches):.1%} standard error")
 kpi4.metric("🎯 Campaigns Used", filtered_df['campaign_name'].nunique())
 
 
@@ -4,6 +4,12 @@ import matplotlib.pyplot as plt
 from sqlalchemy import create_engine
 from dotenv import load_dotenv
 import os
+import sys
+
+# Add root directory to sys.path
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from dags.etl.transform.hll import merge_sketches
+from queries.unique_users import load_user_sketches, sketch_error
 
 # ───── Load environment and DB connection ─────
 load_dotenv()
@@ -20,7 +26,13 @@ def load_data():
     query = "SELECT * FROM user_campaign_summary"
     return pd.read_sql(query, engine)
 
+@st.cache_data
+def load_sketches():
+    # Per day x campaign x source HyperLogLog sketches of user_id (see queries/unique_users.py)
+    return load_user_sketches(engine, columns=("precision", "sketch"))
+
 df = load_data()
+sketches = load_sketches()
 
 # ───── Sidebar Filters ─────
 st.sidebar.image("https://upload.wikimedia.org/wikipedia/commons/e/e1/EA_Sports_monogram_logo.svg", width=100)
@@ -35,7 +47,10 @@ st.title("🎯 Marketing Analytics Dashboard")
 kpi1, kpi2, kpi3, kpi4 = st.columns(4)
 kpi1.metric("💰 Total Revenue", f"${filtered_df['total_revenue'].sum():,.2f}")
 kpi2.metric("⏱ Total Playtime", f"{filtered_df['total_playtime'].sum():,.0f} min")
-kpi3.metric("👥 Unique Users", filtered_df['user_id'].nunique())
+# Union of the selected cells' sketches: no pass over the raw rows
+selected = sketches["campaign_name"].isin(selected_campaigns) & sketches["source"].isin(selected_sources)
+kpi3.metric("👥 Unique Users", f"~{merge_sketches(sketches.loc[selected, 'sketch']).count():,}",
+            help=f"HyperLogLog estimate, ±{sketch_error(sketches):.1%} standard error")
 kpi4.metric("🎯 Campaigns Used", filtered_df['campaign_name'].nunique())
 
 kpi_row1, kpi_row2 = st.columns(2)
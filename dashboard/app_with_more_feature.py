@@ -3,8 +3,14 @@ import pandas as pd
 from sqlalchemy import create_engine
 from dotenv import load_dotenv
 import os
+import sys
 import plotly.express as px
 
+# Add root directory to sys.path
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from dags.etl.transform.hll import merge_sketches
+from queries.unique_users import load_user_sketches, sketch_error
+
 # Load environment variables
 load_dotenv()
 db_user = os.getenv("DB_USER")
@@ -23,7 +29,13 @@ def load_data():
     query = "SELECT * FROM user_campaign_summary"
     return pd.read_sql(query, engine)
 
+@st.cache_data
+def load_sketches():
+    # Per day x campaign x source HyperLogLog sketches of user_id (see queries/unique_users.py)
+    return load_user_sketches(engine, columns=("precision", "sketch"))
+
 df = load_data()
+sketches = load_sketches()
 
 # Title
 st.title("📊 Marketing Campaign Dashboard")
@@ -62,6 +74,10 @@ st.plotly_chart(fig)
 
 # 👥 نمودار دایره‌ای تعداد کاربران به تفکیک Source
 st.subheader("👥 User Distribution by Source")
-user_pie_data = filtered_df.groupby("source")["user_id"].nunique().reset_index()
+# Per-source union of the selected cells' sketches: no pass over the raw rows
+selected = sketches[sketches["campaign_name"].isin(campaigns) & sketches["source"].isin(sources)]
+user_pie_data = (selected.groupby("source")["sketch"].agg(lambda s: merge_sketches(s).count())
+                 .rename("user_id").reset_index())
+st.caption(f"HyperLogLog estimates, ±{sketch_error(sketches):.1%} standard error")
 fig2 = px.pie(user_pie_data, values="user_id", names="source", title="User Count by Source")
 st.plotly_chart(fig2)
\ No newline at end of file
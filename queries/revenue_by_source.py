@@ -15,9 +15,14 @@ def revenue_by_source():
     conn_str = f"postgresql+psycopg2://{db_user}:{db_pass}@{db_host}:{db_port}/{db_name}"
     engine = create_engine(conn_str)
 
+    # Read from the pre-aggregated cube. Each run appends its own cube, so
+    # only the finest cells (grouping_id 0) are summed: every run's coarser
+    # rows would repeat them. unique_users is per run and never summed
+    # (distinct users come from the sketches, see unique_users.py)
     query = """
         SELECT source, SUM(total_revenue) AS total_revenue
-        FROM user_campaign_summary
+        FROM campaign_rollup
+        WHERE grouping_id = 0
         GROUP BY source
         ORDER BY total_revenue DESC
     """
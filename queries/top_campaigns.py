@@ -15,9 +15,14 @@ def top_campaigns(limit: int = 5):
     conn_str = f"postgresql+psycopg2://{db_user}:{db_pass}@{db_host}:{db_port}/{db_name}"
     engine = create_engine(conn_str)
 
+    # Read from the pre-aggregated cube. Each run appends its own cube, so
+    # only the finest cells (grouping_id 0) are summed: every run's coarser
+    # rows would repeat them. unique_users is per run and never summed
+    # (distinct users come from the sketches, see unique_users.py)
     query = f"""
-        SELECT campaign_name, COUNT(*) AS clicks, SUM(total_revenue) AS revenue
-        FROM user_campaign_summary
+        SELECT campaign_name, SUM(clicks) AS clicks, SUM(total_revenue) AS revenue
+        FROM campaign_rollup
+        WHERE grouping_id = 0
         GROUP BY campaign_name
         ORDER BY revenue DESC
         LIMIT {limit}
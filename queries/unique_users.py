@@ -0,0 +1,62 @@
+import os
+import sys
+import pandas as pd
+from sqlalchemy import bindparam, create_engine, text
+from dotenv import load_dotenv
+
+# Add root directory to sys.path
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from dags.etl.transform.hll import DEFAULT_PRECISION, merge_sketches
+
+def load_user_sketches(engine, campaigns=None, sources=None, start=None, end=None,
+                       columns=("sketch",)) -> pd.DataFrame:
+    # The day x campaign x source sketches matching a filter (None = no filter)
+    conditions, params = [], {}
+    query = f"SELECT day, campaign_name, source, {', '.join(columns)} FROM campaign_user_sketches"
+    for column, values in (("campaign_name", campaigns), ("source", sources)):
+        if values is not None:
+            conditions.append(f"{column} IN :{column}")
+            params[column] = list(values)
+    if start is not None:
+        conditions.append("day >= :start")
+        params["start"] = pd.Timestamp(start).floor("D")
+    if end is not None:
+        conditions.append("day <= :end")
+        params["end"] = pd.Timestamp(end).floor("D")
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    statement = text(query).bindparams(*(bindparam(c, expanding=True) for c in ("campaign_name", "source")
+                                         if c in params))
+    return pd.read_sql(statement, con=engine, params=params)
+
+def sketch_error(sketches: pd.DataFrame) -> float:
+    # Relative standard error of a union of sketches loaded with the
+    # precision column: 1.04 / sqrt(2^precision)
+    precision = sketches["precision"].max() if len(sketches) else DEFAULT_PRECISION
+    return 1.04 / (2 ** int(precision)) ** 0.5
+
+def unique_users(campaigns=None, sources=None, start=None, end=None) -> int:
+    """
+    Approximate distinct users for any campaign / source / day-range filter:
+    the matching HyperLogLog sketches are unioned instead of running
+    COUNT(DISTINCT user_id) over the summary (1.04 / sqrt(2^precision)
+    standard error, see dags/etl/transform/hll.py). Sketches of every run are merged, so
+    users seen in several runs are counted once.
+    """
+    load_dotenv()
+
+    db_user = os.getenv("DB_USER")
+    db_pass = os.getenv("DB_PASSWORD")
+    db_host = os.getenv("DB_HOST", "localhost")
+    db_port = os.getenv("DB_PORT", "5432")
+    db_name = os.getenv("DB_NAME")
+
+    conn_str = f"postgresql+psycopg2://{db_user}:{db_pass}@{db_host}:{db_port}/{db_name}"
+    engine = create_engine(conn_str)
+
+    sketches = load_user_sketches(engine, campaigns, sources, start, end)
+    return merge_sketches(sketches["sketch"]).count()
+
+if __name__ == "__main__":
+    print(unique_users())
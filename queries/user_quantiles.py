@@ -0,0 +1,37 @@
+import os
+import sys
+import pandas as pd
+from sqlalchemy import create_engine
+from dotenv import load_dotenv
+
+# Add root directory to sys.path
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from dags.etl.transform.tdigest import DEFAULT_QUANTILES, DIGEST_METRICS, digest_quantiles
+from queries.unique_users import load_user_sketches
+
+def user_quantiles(campaigns=None, sources=None, start=None, end=None,
+                   quantiles=DEFAULT_QUANTILES) -> pd.DataFrame:
+    """
+    p50/p90/p99 (by default) of revenue-per-user and playtime-per-user for
+    any campaign / source / day-range filter, from the merged t-digests of
+    the matching cells instead of a sort over the summary (see
+    dags/etl/transform/tdigest.py). A user counts once per cell they clicked in.
+    """
+    load_dotenv()
+
+    db_user = os.getenv("DB_USER")
+    db_pass = os.getenv("DB_PASSWORD")
+    db_host = os.getenv("DB_HOST", "localhost")
+    db_port = os.getenv("DB_PORT", "5432")
+    db_name = os.getenv("DB_NAME")
+
+    conn_str = f"postgresql+psycopg2://{db_user}:{db_pass}@{db_host}:{db_port}/{db_name}"
+    engine = create_engine(conn_str)
+
+    digests = load_user_sketches(engine, campaigns, sources, start, end, columns=list(DIGEST_METRICS))
+    return digest_quantiles(digests, quantiles)
+
+if __name__ == "__main__":
+    df = user_quantiles()
+    print(df)
@@ -0,0 +1,67 @@
+import argparse
+import os
+import pickle
+import sqlite3
+import sys
+import tempfile
+import time
+
+# Add root directory to sys.path
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from dags.etl.artifacts import read_artifact, write_artifact
+from dags.etl.extract.schema import GAME_EVENTS_SCHEMA, apply_schema
+from scripts.synthetic_data import make_game_events
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def xcom_roundtrip(db: sqlite3.Connection, value) -> object:
+    # What XCom does with a returned object: pickle it into a metadata DB row,
+    # then select and unpickle it in the downstream task
+    db.execute("INSERT INTO xcom (value) VALUES (?)", (pickle.dumps(value),))
+    db.commit()
+    blob, = db.execute("SELECT value FROM xcom ORDER BY rowid DESC LIMIT 1").fetchone()
+    return pickle.loads(blob)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Arrow artifact handoff against XCom pickling")
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    args = parser.parse_args()
+
+    df = apply_schema(make_game_events(args.rows), GAME_EVENTS_SCHEMA)
+    print(f"📦 {args.rows:,} typed game event rows, {df.memory_usage(deep=True).sum() / 1e6:,.1f} MB in memory")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["MARKETING_ARTIFACT_DIR"] = os.path.join(tmp, "artifacts")
+
+        for label, value_fn in (
+            ("XCom pickle", lambda: df),
+            ("arrow/lz4 handle", lambda: write_artifact(df, "bench", "arrow_lz4")),
+            ("arrow/zstd handle", lambda: write_artifact(df, "bench", "arrow_zstd", compression="zstd")),
+            ("parquet/zstd handle", lambda: write_artifact(df, "bench", "parquet", "parquet", "zstd")),
+        ):
+            db_path = os.path.join(tmp, f"{label.replace('/', '_').replace(' ', '_')}.db")
+            db = sqlite3.connect(db_path)
+            db.execute("CREATE TABLE xcom (value BLOB)")
+            db.commit()
+            base = os.path.getsize(db_path)
+
+            def handoff():
+                value = xcom_roundtrip(db, value_fn())
+                return value if isinstance(value, type(df)) else read_artifact(value)
+
+            elapsed, out = timed(handoff)
+            assert len(out) == len(df)
+            growth = os.path.getsize(db_path) - base
+            db.close()
+            print(f"{label:<20} {elapsed:8.2f}s handoff  {growth / 1e3:12,.1f} kB metadata DB growth")
+
+
+if __name__ == "__main__":
+    main()
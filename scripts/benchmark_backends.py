@@ -0,0 +1,92 @@
+import argparse
+import importlib.util
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+# Add root directory to sys.path
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from scripts.benchmark_kernels import parse_size
+from scripts.synthetic_data import make_campaigns, make_game_events
+from dags.etl.extract.schema import CAMPAIGNS_SCHEMA, GAME_EVENTS_SCHEMA, apply_schema
+from dags.etl.transform.backends import registered_backends
+from dags.etl.transform.transform_data import transform_and_join
+
+
+def _reset_peak_memory() -> bool:
+    # Writing 5 to clear_refs resets VmHWM (Linux >= 4.0)
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_memory_bytes() -> int:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def run_backend(backend: str, game_df: pd.DataFrame, campaign_df: pd.DataFrame, repeat: int):
+    # Runs in a fresh worker process so each backend's peak memory is its own
+    best, result = float("inf"), None
+    baseline = _peak_memory_bytes()
+    if _reset_peak_memory():
+        baseline = _peak_memory_bytes()
+    for _ in range(repeat):
+        result = None
+        start = time.perf_counter()
+        result = transform_and_join(game_df, campaign_df, backend=backend)
+        best = min(best, time.perf_counter() - start)
+    return best, _peak_memory_bytes() - baseline, result
+
+
+def installed(backend: str) -> bool:
+    return backend == "pandas" or importlib.util.find_spec(backend) is not None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the transform's execution backends on the same inputs")
+    parser.add_argument("--sizes", default="1M,10M", help="Comma-separated event counts")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--clicks-ratio", type=float, default=0.2, help="Campaign clicks per event")
+    parser.add_argument("--backends", default=",".join(registered_backends()))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    backends = [b for b in args.backends.split(",") if installed(b)]
+    skipped = sorted(set(args.backends.split(",")) - set(backends))
+    if skipped:
+        print(f"⚠️ Skipping backends that are not installed: {', '.join(skipped)}")
+
+    print(f"{'events':>12} {'backend':>8} {'seconds':>9} {'peak MB':>9}")
+    for n_rows in map(parse_size, args.sizes.split(",")):
+        game_df = apply_schema(make_game_events(n_rows, args.users), GAME_EVENTS_SCHEMA)
+        campaign_df = apply_schema(make_campaigns(int(n_rows * args.clicks_ratio), args.users), CAMPAIGNS_SCHEMA)
+        expected = None
+        for backend in backends:
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                seconds, peak, result = pool.submit(run_backend, backend, game_df, campaign_df, args.repeat).result()
+            if expected is None:
+                expected = result
+            else:
+                # Every backend must produce the pandas result, row for row
+                pd.testing.assert_frame_equal(result, expected, check_exact=False, rtol=1e-12)
+            print(f"{n_rows:>12,} {backend:>8} {seconds:>8.2f}s {peak / 2 ** 20:>9.0f}")
+        del game_df, campaign_df, expected
+
+
+if __name__ == "__main__":
+    main()
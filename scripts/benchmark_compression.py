@@ -0,0 +1,73 @@
+import argparse
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Add root directory to sys.path
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from dags.etl.extract.compression import open_input
+from dags.etl.extract.extract_game_events import extract_game_events
+from scripts.synthetic_data import make_game_events
+
+# Uncompressed bytes per gzip member / zstd frame, as written by pigz or zstd -T
+MEMBER_BYTES = 4 << 20
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def compress_members(src: str, dst: str, compress) -> None:
+    # Independent members/frames, so the reader can decode them in parallel
+    with open(src, "rb") as f, open(dst, "wb") as out:
+        for block in iter(lambda: f.read(MEMBER_BYTES), b""):
+            out.write(compress(block))
+
+
+def decompress_then_read(path: str, tmp: str):
+    plain_path = os.path.join(tmp, "decompressed.ndjson")
+    with open_input(path, threads=1) as src, open(plain_path, "wb") as dst:
+        shutil.copyfileobj(src, dst, 1 << 20)
+    try:
+        return extract_game_events(plain_path, workers=1, use_staging=False)
+    finally:
+        os.remove(plain_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming decompression against decompress-then-read")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    codecs = [("gzip", ".ndjson.gz", lambda block: gzip.compress(block, compresslevel=6))]
+    try:
+        import zstandard
+        codecs.append(("zstd", ".ndjson.zst", zstandard.ZstdCompressor(level=3).compress))
+    except ImportError:
+        print("⚠️ zstandard is not installed; skipping .zst")
+
+    events = make_game_events(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        ndjson_path = os.path.join(tmp, "game_events.ndjson")
+        events.to_json(ndjson_path, orient="records", lines=True)
+        print(f"📦 {args.rows:,} rows, {os.path.getsize(ndjson_path) / 1e6:,.1f} MB NDJSON")
+
+        for name, suffix, compress in codecs:
+            path = os.path.join(tmp, "game_events" + suffix)
+            compress_members(ndjson_path, path, compress)
+            print(f"{name}: {os.path.getsize(path) / 1e6:,.1f} MB compressed")
+
+            elapsed, df = timed(lambda: decompress_then_read(path, tmp))
+            print(f"  decompress-then-read  {elapsed:8.2f}s  {len(df) / elapsed:12,.0f} rows/s")
+            elapsed, df = timed(lambda: extract_game_events(path, workers=1, use_staging=False))
+            print(f"  streaming             {elapsed:8.2f}s  {len(df) / elapsed:12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add root directory to sys.path
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from dags.etl.transform.kernels import aggregate_by_key
+
+
+def make_typed_events(n_rows: int, n_users: int, sparse: bool, seed: int = 0) -> pd.DataFrame:
+    # Already-typed columns as the extract produces them (see GAME_EVENTS_SCHEMA);
+    # generating them directly keeps 100M-row runs within memory
+    rng = np.random.default_rng(seed)
+    users = rng.integers(100, 100 + n_users, n_rows)
+    if sparse:
+        # Opaque 62-bit ids: too spread out for dense slots, so they are factorized
+        users = pd.util.hash_array(users).astype(np.int64) >> 2
+        user_id = pd.array(users, dtype="Int64")
+    else:
+        user_id = pd.array(users.astype(np.int32), dtype="Int32")
+    return pd.DataFrame({
+        "user_id": user_id,
+        "playtime_minutes": rng.integers(0, 120, n_rows).astype(np.float64),
+        "revenue_cents": pd.array(rng.choice([0, 99, 499, 999, 1999], n_rows), dtype="Int64"),
+        "event_time": np.datetime64("2025-07-01", "ns") + rng.integers(0, 30 * 86400, n_rows).astype("timedelta64[s]"),
+    })
+
+
+def groupby_aggregate(df: pd.DataFrame) -> pd.DataFrame:
+    # The pandas groupby transform_and_join used before the kernel
+    return df.groupby("user_id").agg(
+        total_playtime=("playtime_minutes", "sum"),
+        total_revenue_cents=("revenue_cents", "sum"),
+        event_count=("playtime_minutes", "size"),
+        last_event_time=("event_time", "max"),
+    ).reset_index()
+
+
+def kernel_aggregate(df: pd.DataFrame) -> pd.DataFrame:
+    return aggregate_by_key(df, "user_id",
+                            sums={"total_playtime": "playtime_minutes", "total_revenue_cents": "revenue_cents"},
+                            count="event_count", maxes={"last_event_time": "event_time"})
+
+
+def best_of(fn, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def parse_size(text: str) -> int:
+    text = text.strip().upper()
+    scale = {"K": 1_000, "M": 1_000_000}.get(text[-1], 1)
+    return int(float(text[:-1] if scale > 1 else text) * scale)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bincount aggregation kernel against pandas groupby")
+    parser.add_argument("--sizes", default="1M,10M,100M", help="Comma-separated event counts")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--sparse", action="store_true", help="Use spread-out 62-bit user ids")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'events':>12} {'groupby':>10} {'kernel':>10} {'speedup':>8}")
+    for n_rows in map(parse_size, args.sizes.split(",")):
+        df = make_typed_events(n_rows, args.users, args.sparse)
+        groupby_seconds, expected = best_of(lambda: groupby_aggregate(df), args.repeat)
+        kernel_seconds, result = best_of(lambda: kernel_aggregate(df), args.repeat)
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+        print(f"{n_rows:>12,} {groupby_seconds:>9.2f}s {kernel_seconds:>9.2f}s "
+              f"{groupby_seconds / kernel_seconds:>7.1f}x")
+        del df, expected, result
+
+
+if __name__ == "__main__":
+    main()
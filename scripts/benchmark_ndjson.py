@@ -0,0 +1,46 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+# Add root directory to sys.path
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from dags.etl.extract.ndjson import read_ndjson
+from scripts.synthetic_data import make_game_events
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark NDJSON byte-range parsing against pd.read_json")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    events = make_game_events(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "game_events.json")
+        ndjson_path = os.path.join(tmp, "game_events.ndjson")
+        events.to_json(json_path, orient="records")
+        events.to_json(ndjson_path, orient="records", lines=True)
+        size_mb = os.path.getsize(ndjson_path) / 1e6
+        print(f"📦 {args.rows:,} rows, {size_mb:,.1f} MB NDJSON")
+
+        elapsed, df = timed(lambda: pd.read_json(json_path))
+        print(f"pd.read_json (array)      {elapsed:8.2f}s  {len(df) / elapsed:12,.0f} rows/s")
+
+        for workers in args.workers:
+            elapsed, df = timed(lambda: read_ndjson(ndjson_path, workers=workers, min_range_bytes=1))
+            print(f"read_ndjson workers={workers:<3}   {elapsed:8.2f}s  {len(df) / elapsed:12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
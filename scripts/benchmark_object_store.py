@@ -0,0 +1,69 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Add root directory to sys.path
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from dags.etl.extract.extract_game_events import extract_game_events
+from dags.etl.extract.object_store import LocalObjectStore, iter_object_chunks, iter_objects
+from dags.etl.extract.schema import GAME_EVENTS_SCHEMA, concat_typed
+from scripts.synthetic_data import make_game_events
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def copy_then_read(store: LocalObjectStore, tmp: str):
+    # The old flow: copy every object to local disk, then extract the directory
+    local_dir = os.path.join(tmp, "copied")
+    os.makedirs(local_dir)
+    for obj in iter_objects(store, store.list("marketing_raw/"), threads=1):
+        with open(os.path.join(local_dir, os.path.basename(obj.name)), "wb") as f:
+            f.write(obj.data)
+    try:
+        return extract_game_events(local_dir, workers=1, use_staging=False)
+    finally:
+        shutil.rmtree(local_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent object-store extraction")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--objects", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="Simulated seconds per GET request")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16, 32])
+    args = parser.parse_args()
+
+    events = make_game_events(args.rows)
+    rows_per_object = -(-args.rows // args.objects)
+    with tempfile.TemporaryDirectory() as tmp:
+        bucket = os.path.join(tmp, "bucket")
+        os.makedirs(os.path.join(bucket, "marketing_raw"))
+        for i, start in enumerate(range(0, args.rows, rows_per_object)):
+            events.iloc[start:start + rows_per_object].to_json(
+                os.path.join(bucket, "marketing_raw", f"part-{i:05d}.ndjson.gz"),
+                orient="records", lines=True, compression="gzip")
+        store = LocalObjectStore(bucket, latency=args.latency)
+        size_mb = sum(o.size for o in store.list()) / 1e6
+        print(f"📦 {args.rows:,} rows in {args.objects} objects, {size_mb:,.1f} MB, "
+              f"{args.latency * 1000:.0f} ms per GET")
+
+        elapsed, df = timed(lambda: copy_then_read(store, tmp))
+        print(f"copy-then-read           {elapsed:8.2f}s  {len(df) / elapsed:12,.0f} rows/s")
+
+        for threads in args.threads:
+            elapsed, df = timed(lambda: concat_typed(list(
+                iter_object_chunks("marketing_raw/", GAME_EVENTS_SCHEMA, 100_000, threads, store=store))))
+            print(f"streaming threads={threads:<4}  {elapsed:8.2f}s  {len(df) / elapsed:12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
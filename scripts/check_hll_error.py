@@ -0,0 +1,81 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add root directory to sys.path
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from dags.etl.transform.hll import DEFAULT_PRECISION, HyperLogLog, build_user_sketches, merge_sketches
+from scripts.synthetic_data import make_campaigns
+
+
+def random_filter(rng, sketches: pd.DataFrame):
+    # A dashboard-like selection: some campaigns, some sources, a day range
+    campaigns = sketches["campaign_name"].unique()
+    sources = sketches["source"].unique()
+    days = np.sort(sketches["day"].unique())
+    first = rng.integers(0, len(days))
+    last = rng.integers(first, len(days))
+    return (rng.choice(campaigns, rng.integers(1, len(campaigns) + 1), replace=False),
+            rng.choice(sources, rng.integers(1, len(sources) + 1), replace=False),
+            days[first], days[last])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check HyperLogLog unique-user counts against exact counts")
+    parser.add_argument("--rows", type=int, default=2_000_000, help="Campaign clicks (summary rows)")
+    parser.add_argument("--users", type=int, default=500_000)
+    parser.add_argument("--precision", type=int, default=DEFAULT_PRECISION)
+    parser.add_argument("--filters", type=int, default=200, help="Random filter combinations to check")
+    parser.add_argument("--chunksize", type=int, default=500_000)
+    args = parser.parse_args()
+
+    # The sketches only read user_id, clicked_at, campaign_name and source of the summary
+    summary = make_campaigns(args.rows, args.users)
+    summary["clicked_at"] = pd.to_datetime(summary["clicked_at"])
+    summary["day"] = summary["clicked_at"].dt.floor("D")
+
+    start = time.perf_counter()
+    chunks = (summary.iloc[i:i + args.chunksize] for i in range(0, len(summary), args.chunksize))
+    sketches = build_user_sketches(chunks, args.precision)
+    print(f"Built {len(sketches)} sketches in {time.perf_counter() - start:.2f}s "
+          f"({sketches['sketch'].map(len).sum() / 2 ** 20:.1f} MiB serialized)")
+
+    # Merging is exact: the union of the cell sketches is the sketch of all rows
+    everything = HyperLogLog(args.precision).add(summary["user_id"])
+    merged = merge_sketches(sketches["sketch"], args.precision)
+    assert np.array_equal(merged.registers, everything.registers), "merged sketch differs from a direct sketch"
+
+    error = HyperLogLog(args.precision).relative_error
+    rng = np.random.default_rng(0)
+    errors, merge_seconds = [], 0.0
+    for _ in range(args.filters):
+        campaigns, sources, first, last = random_filter(rng, sketches)
+        cells = (sketches["campaign_name"].isin(campaigns) & sketches["source"].isin(sources)
+                 & sketches["day"].between(first, last))
+        rows = (summary["campaign_name"].isin(campaigns) & summary["source"].isin(sources)
+                & summary["day"].between(first, last))
+        exact = summary.loc[rows, "user_id"].nunique()
+        start = time.perf_counter()
+        estimate = merge_sketches(sketches.loc[cells, "sketch"], args.precision).count()
+        merge_seconds += time.perf_counter() - start
+        errors.append((estimate - exact) / exact if exact else float(estimate))
+    errors = np.abs(errors)
+
+    rms = float(np.sqrt(np.mean(errors ** 2)))
+    print(f"Standard error 1.04/sqrt(2^{args.precision}) = {error:.2%}")
+    print(f"Observed over {args.filters} filters: RMS {rms:.2%}, max {errors.max():.2%}, "
+          f"{np.mean(errors > 2 * error):.1%} beyond 2 standard errors "
+          f"(avg merge + count {merge_seconds / args.filters * 1e3:.2f} ms)")
+    # RMS error should match the standard error, and no count be off by 4 of them
+    if rms > 1.5 * error or errors.max() > 4 * error:
+        sys.exit("❌ HyperLogLog error exceeds its documented bounds")
+    print("✅ HyperLogLog counts are within their documented error bounds")
+
+
+if __name__ == "__main__":
+    main()
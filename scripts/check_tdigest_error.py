@@ -0,0 +1,76 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add root directory to sys.path
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from scripts.check_hll_error import random_filter
+from scripts.synthetic_data import make_campaigns, make_game_events
+from dags.etl.extract.schema import CAMPAIGNS_SCHEMA, GAME_EVENTS_SCHEMA, apply_schema
+from dags.etl.transform.tdigest import (DEFAULT_COMPRESSION, DEFAULT_QUANTILES, DIGEST_METRICS, build_user_digests,
+                                        merge_digests)
+from dags.etl.transform.transform_data import transform_and_join
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check t-digest per-user quantiles against exact quantiles")
+    parser.add_argument("--events", type=int, default=2_000_000)
+    parser.add_argument("--clicks", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--compression", type=int, default=DEFAULT_COMPRESSION)
+    parser.add_argument("--filters", type=int, default=100, help="Random filter combinations to check")
+    parser.add_argument("--chunksize", type=int, default=250_000)
+    parser.add_argument("--max-rank-error", type=float, default=0.01,
+                        help="Fail when an estimate's rank is further than this from its quantile")
+    args = parser.parse_args()
+
+    game_df = apply_schema(make_game_events(args.events, args.users), GAME_EVENTS_SCHEMA)
+    campaign_df = apply_schema(make_campaigns(args.clicks, args.users), CAMPAIGNS_SCHEMA)
+    summary = transform_and_join(game_df, campaign_df)
+    summary["day"] = pd.to_datetime(summary["clicked_at"]).dt.floor("D")
+
+    start = time.perf_counter()
+    chunks = (summary.iloc[i:i + args.chunksize] for i in range(0, len(summary), args.chunksize))
+    digests = build_user_digests(chunks, args.compression)
+    size = sum(digests[name].map(len).sum() for name in DIGEST_METRICS)
+    print(f"Built {len(digests)} digest rows in {time.perf_counter() - start:.2f}s "
+          f"({size / 2 ** 20:.1f} MiB serialized)")
+
+    # Exact reference: each user's totals once per cell, as the digests count them
+    per_cell = summary.drop_duplicates(["day", "campaign_name", "source", "user_id"])
+    rng = np.random.default_rng(0)
+    worst = {name: 0.0 for name in DIGEST_METRICS}
+    merge_seconds = 0.0
+    for _ in range(args.filters):
+        campaigns, sources, first, last = random_filter(rng, digests)
+        cells = (digests["campaign_name"].isin(campaigns) & digests["source"].isin(sources)
+                 & digests["day"].between(first, last))
+        rows = (per_cell["campaign_name"].isin(campaigns) & per_cell["source"].isin(sources)
+                & per_cell["day"].between(first, last))
+        for name, column in DIGEST_METRICS.items():
+            values = np.sort(per_cell.loc[rows, column].dropna().to_numpy("float64"))
+            started = time.perf_counter()
+            estimates = merge_digests(digests.loc[cells, name], args.compression).quantile(list(DEFAULT_QUANTILES))
+            merge_seconds += time.perf_counter() - started
+            # Rank error: how far the estimate's rank range is from q (0 when the estimate is exact)
+            below = np.searchsorted(values, estimates, side="left") / len(values)
+            upto = np.searchsorted(values, estimates, side="right") / len(values)
+            errors = np.maximum(0, np.maximum(below - DEFAULT_QUANTILES, DEFAULT_QUANTILES - upto))
+            worst[name] = max(worst[name], float(errors.max()))
+
+    quantiles = ", ".join(f"p{q * 100:g}" for q in DEFAULT_QUANTILES)
+    print(f"Max rank error of {quantiles} over {args.filters} filters: "
+          + ", ".join(f"{name} {error:.3%}" for name, error in worst.items())
+          + f" (avg merge + quantiles {merge_seconds / args.filters / len(DIGEST_METRICS) * 1e3:.2f} ms)")
+    if max(worst.values()) > args.max_rank_error:
+        sys.exit(f"❌ t-digest rank error exceeds {args.max_rank_error:.1%}")
+    print(f"✅ t-digest quantiles are within {args.max_rank_error:.1%} rank error")
+
+
+if __name__ == "__main__":
+    main()
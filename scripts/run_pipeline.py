@@ -1,33 +1,97 @@
+import argparse
 import sys
 import os
 
 # Add root directory to sys.path
 sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
 
-from etl.extract.extract_campaigns import extract_campaign_data
-from etl.transform.transform_data import transform_and_join
-from etl.load.load_to_postgres import load_to_postgres
+from dags.etl.extract.extract_game_events import extract_game_events
+from dags.etl.extract.extract_campaigns import extract_campaign_data
+from dags.etl.extract.sampling import SAMPLE_METHODS, sample_from_config
+from dags.etl.transform.backends import registered_backends
+from dags.etl.transform.attribution import ATTRIBUTION_MODELS, attribute
+from dags.etl.transform.dedup import dedup_chunks
+from dags.etl.transform.hll import build_user_sketches
+from dags.etl.transform.rollup import ROLLUP_DIMENSIONS, build_rollup
+from dags.etl.transform.sessionize import sessionize
+from dags.etl.transform.tdigest import build_user_digests
+from dags.etl.transform.transform_data import (CAMPAIGNS_PUSHDOWN, GAME_EVENTS_PUSHDOWN, SESSIONIZE_PUSHDOWN,
+                                               transform_and_join, transform_plan)
+from dags.etl.load.load_to_postgres import (ATTRIBUTION_COLUMNS, ROLLUP_COLUMNS, SKETCH_COLUMNS, SKETCH_DTYPES,
+                                            load_to_postgres)
+
+# Sampled runs load here so development never touches the production table
+SAMPLE_TABLE = "user_campaign_summary_sample"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the marketing ETL pipeline locally")
+    parser.add_argument("--game-events", default="data/game_events.json",
+                        help="Game events file, glob, partition spec or object-store prefix")
+    parser.add_argument("--campaigns", default="data/campaigns.json",
+                        help="Campaigns file, glob, partition spec or object-store prefix")
+    parser.add_argument("--sample-method", choices=SAMPLE_METHODS, default="hash",
+                        help="hash: deterministic on user_id (joins stay consistent); "
+                             "reservoir: uniform sample of --sample-size rows")
+    parser.add_argument("--sample-rate", type=float, help="Fraction of users to keep (hash sampling)")
+    parser.add_argument("--sample-size", type=int, help="Rows to keep per extract (reservoir sampling)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int,
+                        help="Processes for the aggregation and join (default: CPU count for large inputs)")
+    parser.add_argument("--backend", choices=registered_backends(), default="pandas",
+                        help="Engine for the aggregation and join")
+    parser.add_argument("--sessionize", type=float, metavar="MINUTES",
+                        help="Rebuild session_id from event_time gaps longer than MINUTES")
+    parser.add_argument("--attribution", choices=ATTRIBUTION_MODELS,
+                        help="Also credit events to the clicks in their lookback window")
+    parser.add_argument("--explain", action="store_true", help="Print the optimized transform plan")
+    parser.add_argument("--no-load", action="store_true", help="Stop after the transform")
+    return parser.parse_args()
+
 
 def main():
-    print("🚀 Starting ETL pipeline...")
+    args = parse_args()
+    sample = sample_from_config(args.sample_method, args.sample_rate, args.sample_size, args.seed)
+    print("🚀 Starting ETL pipeline..." + (f" (sample: {sample.method})" if sample else ""))
 
     # 1. Extract
     print("\n📥 Extracting game event data...")
-    game_df = extract_game_events("data/game_events.json")
+    pushdown = SESSIONIZE_PUSHDOWN if args.sessionize else GAME_EVENTS_PUSHDOWN
+    game_df = extract_game_events(args.game_events, pushdown=pushdown, sample=sample)
+    [game_df] = list(dedup_chunks([game_df]))
+    if args.sessionize:
+        game_df, _ = sessionize(game_df, args.sessionize)
 
     print("\n📥 Extracting campaign data...")
-    campaign_df = extract_campaign_data("data/campaigns.json")
+    campaign_df = extract_campaign_data(args.campaigns, pushdown=CAMPAIGNS_PUSHDOWN, sample=sample)
 
     # 2. Transform
     print("\n🔄 Transforming and joining data...")
-    final_df = transform_and_join(game_df, campaign_df)
+    if args.explain:
+        transform_plan(game_df, campaign_df).explain()
+    final_df = transform_and_join(game_df, campaign_df, workers=args.workers, backend=args.backend)
+    rollup_df = build_rollup([final_df])
+    sketches_df = build_user_sketches([final_df]).merge(build_user_digests([final_df]), on=list(ROLLUP_DIMENSIONS))
+    attributed_df = attribute(game_df, campaign_df, args.attribution) if args.attribution else None
 
     # 3. Load
-    print("\n📦 Loading data into PostgreSQL...")
-    load_to_postgres(final_df)
+    if args.no_load:
+        print(f"\n⏭️ Skipping load ({len(final_df)} rows).")
+    else:
+        print("\n📦 Loading data into PostgreSQL...")
+        if sample is not None:
+            load_to_postgres(final_df, table_name=SAMPLE_TABLE)
+        else:
+            load_to_postgres(final_df)
+        load_to_postgres(rollup_df, table_name="campaign_rollup" + ("_sample" if sample is not None else ""),
+                         columns=ROLLUP_COLUMNS)
+        load_to_postgres(sketches_df, table_name="campaign_user_sketches" + ("_sample" if sample is not None else ""),
+                         columns=SKETCH_COLUMNS, dtype=SKETCH_DTYPES)
+        if attributed_df is not None:
+            table = "campaign_attribution" + ("_sample" if sample is not None else "")
+            load_to_postgres(attributed_df, table_name=table, columns=ATTRIBUTION_COLUMNS)
 
     print("\n✅ ETL pipeline completed successfully.")
 
 if __name__ == "__main__":
     main()
-
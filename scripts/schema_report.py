@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pandas as pd
+
+# Add root directory to sys.path
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from dags.etl.extract.schema import CAMPAIGNS_SCHEMA, GAME_EVENTS_SCHEMA, apply_schema, schema_report
+
+
+def main():
+    for path, schema in (("data/game_events.json", GAME_EVENTS_SCHEMA),
+                         ("data/campaigns.json", CAMPAIGNS_SCHEMA)):
+        raw = pd.read_json(path, convert_dates=False)
+        typed = apply_schema(raw.copy(), schema)
+        print(f"\n📊 {path}: bytes per row before/after typed schema")
+        print(schema_report(raw, typed).to_string(float_format="{:,.1f}".format))
+
+
+if __name__ == "__main__":
+    main()
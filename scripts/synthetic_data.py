@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+CAMPAIGNS = [f"Campaign {i}" for i in range(1, 6)]
+SOURCES = ["Facebook", "Instagram", "TikTok", "Google Ads", "Organic"]
+
+
+def make_game_events(n_rows: int, n_users: int = 100_000, seed: int = 0) -> pd.DataFrame:
+    """
+    Generates synthetic game events shaped like data/game_events.json.
+
+    Parameters:
+        n_rows (int): Number of events.
+        n_users (int): Number of distinct user ids.
+        seed (int): Random seed.
+
+    Returns:
+        pd.DataFrame: user_id, session_id, playtime_minutes, revenue, event_time
+                      (event_time as ISO-8601 strings, like the raw files).
+    """
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2025-07-01T00:00:00")
+    seconds = np.sort(rng.integers(0, 30 * 86400, n_rows))
+    revenue = np.round(rng.choice([0.0, 0.99, 4.99, 9.99, 19.99], n_rows), 2)
+    return pd.DataFrame({
+        "user_id": rng.integers(100, 100 + n_users, n_rows),
+        "session_id": np.char.add("s", np.arange(n_rows).astype(str)),
+        "playtime_minutes": rng.integers(0, 120, n_rows),
+        "revenue": revenue,
+        "event_time": np.datetime_as_string(start + seconds.astype("timedelta64[s]"), unit="s"),
+    })
+
+
+def make_campaigns(n_rows: int, n_users: int = 100_000, seed: int = 1) -> pd.DataFrame:
+    """
+    Generates synthetic campaign clicks shaped like data/campaigns.json.
+
+    Parameters:
+        n_rows (int): Number of clicks.
+        n_users (int): Number of distinct user ids.
+        seed (int): Random seed.
+
+    Returns:
+        pd.DataFrame: user_id, campaign_name, source, clicked_at (ISO-8601 strings).
+    """
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2025-06-28T00:00:00")
+    seconds = np.sort(rng.integers(0, 30 * 86400, n_rows))
+    return pd.DataFrame({
+        "user_id": rng.integers(100, 100 + n_users, n_rows),
+        "campaign_name": rng.choice(CAMPAIGNS, n_rows),
+        "source": rng.choice(SOURCES, n_rows),
+        "clicked_at": np.datetime_as_string(start + seconds.astype("timedelta64[s]"), unit="s"),
+    })
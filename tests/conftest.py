@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Add root directory to sys.path
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
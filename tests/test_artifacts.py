@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from dags.etl.artifacts import (BATCH_ROWS, estimate_memory_bytes, iter_artifact_chunks, read_artifact, write_artifact,
+                                write_artifact_chunks)
+
+
+@pytest.fixture
+def artifact_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("MARKETING_ARTIFACT_DIR", str(tmp_path))
+    return tmp_path
+
+
+def make_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "user_id": rng.integers(0, 1_000_000, rows),
+        "total_playtime": rng.random(rows),
+        "total_revenue": rng.random(rows),
+        "clicked_at": np.datetime64("2025-07-01", "ns") + rng.integers(0, 10 ** 15, rows).astype("timedelta64[ns]"),
+    })
+
+
+@pytest.mark.parametrize("format", ["arrow", "parquet"])
+def test_chunks_round_trip(artifact_dir, format):
+    df = make_frame(3 * BATCH_ROWS + 123)
+    df.attrs = {"sample": {"method": "hash"}}
+    handle = write_artifact(df, "run", "summary", format=format)
+
+    chunks = list(iter_artifact_chunks(handle, 50_000))
+    assert [len(c) for c in chunks[:-1]] == [50_000] * (len(chunks) - 1)
+    assert all(c.attrs == df.attrs for c in chunks)
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), df)
+    pd.testing.assert_frame_equal(read_artifact(handle), df)
+
+
+def test_reading_a_chunk_only_decompresses_its_batches(artifact_dir):
+    # 2M rows x 32 bytes = 64 MB uncompressed: reading the first 10k rows (or
+    # estimating the memory from them) must not decompress the whole table
+    df = make_frame(2_000_000)
+    handle = write_artifact(df, "run", "summary")
+    del df
+
+    baseline = pa.total_allocated_bytes()
+    chunks = iter_artifact_chunks(handle, 10_000)
+    head = next(chunks)
+    assert len(head) == 10_000
+    assert pa.total_allocated_bytes() - baseline < 4 * BATCH_ROWS * 32
+    chunks.close()
+
+    baseline = pa.total_allocated_bytes()
+    assert estimate_memory_bytes(handle) == pytest.approx(2_000_000 * 32, rel=0.01)
+    assert pa.total_allocated_bytes() - baseline < 4 * BATCH_ROWS * 32
+
+
+@pytest.mark.parametrize("format", ["arrow", "parquet"])
+def test_chunks_with_different_categories(artifact_dir, format):
+    chunks = [
+        pd.DataFrame({"campaign_name": pd.Categorical(["summer", "winter"]), "user_id": [1, 2]}),
+        pd.DataFrame({"campaign_name": pd.Categorical(["spring", "summer", None]), "user_id": [3, 4, 5]}),
+    ]
+    handle = write_artifact_chunks(iter(chunks), "run", "summary", format=format)
+
+    df = read_artifact(handle)
+    assert isinstance(df["campaign_name"].dtype, pd.CategoricalDtype)
+    expected = pd.concat(chunks, ignore_index=True)
+    assert df["campaign_name"].tolist() == expected["campaign_name"].tolist()
+    assert df["user_id"].tolist() == [1, 2, 3, 4, 5]
+    streamed = pd.concat(iter_artifact_chunks(handle, 2), ignore_index=True)
+    assert streamed["campaign_name"].astype(object).tolist() == expected["campaign_name"].tolist()
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dags.etl.transform.attribution import ATTRIBUTION_MODELS, attribute
+
+
+def naive_attribution(game_df, campaign_df, model, lookback_days, half_life_days):
+    # Event by event, click by click reference of attribute()
+    clicks = campaign_df.reset_index(drop=True)
+    credit = np.zeros((len(clicks), 3))
+    lookback = pd.Timedelta(days=lookback_days)
+    for event in game_df.itertuples():
+        window = clicks[(clicks["user_id"] == event.user_id) & (clicks["clicked_at"] <= event.event_time)
+                        & (clicks["clicked_at"] >= event.event_time - lookback)]
+        if window.empty:
+            continue
+        window = window.sort_values("clicked_at", kind="stable")
+        if model == "last_click":
+            shares = pd.Series(0.0, index=window.index)
+            shares.iloc[-1] = 1.0
+        elif model == "first_click":
+            shares = pd.Series(0.0, index=window.index)
+            shares.iloc[0] = 1.0
+        elif model == "linear":
+            shares = pd.Series(1.0 / len(window), index=window.index)
+        else:
+            age = (window["clicked_at"].max() - window["clicked_at"]) / pd.Timedelta(days=half_life_days)
+            weights = np.exp2(-age)
+            shares = weights / weights.sum()
+        for click, share in shares.items():
+            credit[click] += share * np.array([1.0, event.playtime_minutes, event.revenue])
+    return credit
+
+
+@pytest.mark.parametrize("model", ATTRIBUTION_MODELS)
+def test_tied_click_times_match_naive_loop(model):
+    # Whole-minute click times: most users have several clicks at the same instant
+    rng = np.random.default_rng(0)
+    n_clicks, n_events, users = 300, 400, 20
+    start = pd.Timestamp("2025-07-01")
+    campaign_df = pd.DataFrame({
+        "user_id": rng.integers(0, users, n_clicks),
+        "campaign_name": rng.choice(["A", "B", "C"], n_clicks),
+        "source": rng.choice(["x", "y"], n_clicks),
+        "clicked_at": start + pd.to_timedelta(rng.integers(0, 60, n_clicks), unit="min"),
+    })
+    game_df = pd.DataFrame({
+        "user_id": rng.integers(0, users, n_events),
+        "session_id": [f"s{i}" for i in range(n_events)],
+        "event_time": start + pd.to_timedelta(rng.integers(0, 90, n_events), unit="min"),
+        "playtime_minutes": rng.integers(0, 120, n_events).astype(float),
+        "revenue": rng.choice([0.0, 0.99, 4.99], n_events),
+    })
+
+    result = attribute(game_df, campaign_df, model, lookback_days=1 / 48, half_life_days=1 / 96)
+    expected = naive_attribution(game_df, campaign_df, model, 1 / 48, 1 / 96)
+
+    measures = ["attributed_events", "attributed_playtime", "attributed_revenue"]
+    actual = result[measures].iloc[:len(campaign_df)].to_numpy()
+    assert np.isfinite(actual).all()
+    # When several tied clicks are all the last (or first) click, the
+    # naive loop and attribute() may credit different ones: compare per user
+    # and click time, where tied clicks are interchangeable
+    keys = [campaign_df["user_id"], campaign_df["clicked_at"]]
+    np.testing.assert_allclose(pd.DataFrame(actual).groupby(keys).sum().to_numpy(),
+                               pd.DataFrame(expected).groupby(keys).sum().to_numpy(), rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(actual.sum(axis=0), expected.sum(axis=0), rtol=1e-9)
+
+
+@pytest.mark.parametrize("model", ATTRIBUTION_MODELS)
+def test_unattributed_events_reconcile_with_event_totals(model):
+    start = pd.Timestamp("2025-07-01")
+    campaign_df = pd.DataFrame({
+        "user_id": [1, 1, 2],
+        "campaign_name": ["A", "B", "A"],
+        "source": ["x", "y", "x"],
+        "clicked_at": [start, start + pd.Timedelta(hours=1), start + pd.Timedelta(days=3)],
+    })
+    game_df = pd.DataFrame({
+        "user_id": [1, 1, 2, 2, 3],
+        "session_id": ["a", "b", "c", "d", "e"],
+        # User 2's first event precedes their click; user 3 never clicked
+        "event_time": [start + pd.Timedelta(hours=2), start + pd.Timedelta(days=30), start,
+                       start + pd.Timedelta(days=3, hours=1), start],
+        "playtime_minutes": [10.0, 20.0, 30.0, 40.0, 50.0],
+        "revenue": [1.0, 2.0, 4.0, 8.0, 16.0],
+    })
+
+    result = attribute(game_df, campaign_df, model, lookback_days=7)
+    assert len(result) == len(campaign_df) + 3
+    unattributed = result.iloc[len(campaign_df):]
+    assert unattributed["campaign_name"].isna().all() and unattributed["source"].isna().all()
+    assert unattributed["user_id"].tolist() == [1, 2, 3]
+    assert unattributed["attributed_revenue"].tolist() == [2.0, 4.0, 16.0]
+    assert result["attributed_events"].sum() == pytest.approx(len(game_df))
+    assert result["attributed_playtime"].sum() == pytest.approx(game_df["playtime_minutes"].sum())
+    assert result["attributed_revenue"].sum() == pytest.approx(game_df["revenue"].sum())
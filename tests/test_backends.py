@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+
+from dags.etl.extract.schema import CAMPAIGNS_SCHEMA, GAME_EVENTS_SCHEMA, apply_schema
+from dags.etl.transform.backends import USER_CAMPAIGN_SUMMARY, USER_TOTALS, AggregateSpec, get_backend
+from dags.etl.transform.transform_data import _with_cents
+
+ENGINES = ["polars", "duckdb"]
+
+SESSION_STATS = AggregateSpec(
+    key="user_id",
+    required=("user_id", "event_time"),
+    sums=(("total_playtime", "playtime_minutes"),),
+    count="events",
+    maxes=(("last_seen", "event_time"),),
+)
+
+
+def _events(rows):
+    columns = list(GAME_EVENTS_SCHEMA)
+    return _with_cents(apply_schema(pd.DataFrame(rows, columns=columns), GAME_EVENTS_SCHEMA))
+
+
+def _clicks(rows):
+    columns = list(CAMPAIGNS_SCHEMA)
+    return apply_schema(pd.DataFrame(rows, columns=columns), CAMPAIGNS_SCHEMA)
+
+
+EVENTS = [
+    (1, "a", 10, 1.5, "2025-07-01T00:00:00"),
+    (1, "b", 5, None, "2025-07-01T01:00:00"),
+    (2, "c", None, 2.25, "2025-07-01T02:00:00"),
+    (None, "d", 7, 3.0, "2025-07-01T03:00:00"),
+    (3, None, 8, 4.0, "2025-07-01T04:00:00"),
+    (3, "e", 1, 0.1, None),
+]
+CLICKS = [
+    (2, "summer", "ads", "2025-07-01T00:30:00"),
+    (1, "summer", "social", "2025-07-01T00:10:00"),
+    (4, "winter", "ads", "2025-07-01T00:20:00"),
+    (None, "winter", "ads", "2025-07-01T00:40:00"),
+    (1, None, "ads", "2025-07-01T00:50:00"),
+    (3, "summer", "ads", "2025-07-01T01:10:00"),
+]
+
+
+@pytest.fixture(params=ENGINES)
+def backend(request):
+    pytest.importorskip(request.param)
+    return get_backend(request.param)
+
+
+@pytest.mark.parametrize("spec", [USER_TOTALS, SESSION_STATS])
+@pytest.mark.parametrize("rows", [EVENTS, []], ids=["events", "empty"])
+def test_aggregate_matches_pandas(backend, spec, rows):
+    events = _events(rows)
+    expected = get_backend("pandas").aggregate(spec, events)
+    pd.testing.assert_frame_equal(backend.aggregate(spec, events).reset_index(drop=True),
+                                  expected.reset_index(drop=True))
+
+
+@pytest.mark.parametrize("events, clicks", [(EVENTS, CLICKS), ([], CLICKS), (EVENTS, []), ([], [])],
+                         ids=["both", "no-events", "no-clicks", "empty"])
+def test_transform_matches_pandas(backend, events, clicks):
+    events, clicks = _events(events), _clicks(clicks)
+    expected = get_backend("pandas").transform(USER_CAMPAIGN_SUMMARY, events, clicks)
+    pd.testing.assert_frame_equal(backend.transform(USER_CAMPAIGN_SUMMARY, events, clicks).reset_index(drop=True),
+                                  expected.reset_index(drop=True))
@@ -0,0 +1,84 @@
+import gzip
+
+import numpy as np
+import pytest
+
+from dags.etl.extract import compression as compression_module
+from dags.etl.extract.compression import InMemoryFile, _iter_decompressed, open_input
+from dags.etl.extract.extract_campaigns import extract_campaign_data
+from dags.etl.extract.extract_game_events import extract_game_events
+from dags.etl.transform.transform_data import CAMPAIGNS_PUSHDOWN, GAME_EVENTS_PUSHDOWN
+
+EVENT = (b'{"user_id": 1, "session_id": "s", "playtime_minutes": 5, "revenue": 1.0, '
+         b'"event_time": "2025-07-01T00:00:00"}\n')
+CLICK = b'{"user_id": 1, "campaign_name": "summer", "source": "ads", "clicked_at": "2025-07-01T00:00:00"}\n'
+
+
+@pytest.mark.parametrize("name", ["events.ndjson.gz", "events.json.zst"])
+def test_zero_length_compressed_file_reads_empty(tmp_path, name):
+    path = tmp_path / name
+    path.write_bytes(b"")
+    with open_input(str(path)) as fp:
+        assert fp.read() == b""
+    with open_input(InMemoryFile(name, b"")) as fp:
+        assert fp.read() == b""
+
+
+@pytest.mark.parametrize("name", ["data.json", "data.ndjson.gz", "data.csv.zst"])
+@pytest.mark.parametrize("pushdown", [None, "pushdown"])
+def test_zero_length_file_extracts_typed_empty_frame(tmp_path, name, pushdown):
+    path = tmp_path / name
+    path.write_bytes(b"")
+    reference = tmp_path / "reference.ndjson"
+
+    reference.write_bytes(EVENT)
+    events_pushdown = GAME_EVENTS_PUSHDOWN if pushdown else None
+    df = extract_game_events(str(path), use_staging=False, pushdown=events_pushdown)
+    expected = extract_game_events(str(reference), use_staging=False, pushdown=events_pushdown)
+    assert df.empty
+    assert df.dtypes.astype(str).to_dict() == expected.dtypes.astype(str).to_dict()
+
+    reference.write_bytes(CLICK)
+    campaigns_pushdown = CAMPAIGNS_PUSHDOWN if pushdown else None
+    df = extract_campaign_data(str(path), use_staging=False, pushdown=campaigns_pushdown)
+    expected = extract_campaign_data(str(reference), use_staging=False, pushdown=campaigns_pushdown)
+    assert df.empty
+    assert df.dtypes.astype(str).to_dict() == expected.dtypes.astype(str).to_dict()
+
+
+def test_zero_length_file_among_partitions(tmp_path):
+    (tmp_path / "a.ndjson.gz").write_bytes(b"")
+    (tmp_path / "b.ndjson.gz").write_bytes(gzip.compress(EVENT))
+    df = extract_game_events(str(tmp_path / "*.ndjson.gz"), use_staging=False, workers=1)
+    assert df["user_id"].tolist() == [1]
+
+
+def _members(sizes):
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 16, size, dtype=np.uint8).tobytes() for size in sizes]
+
+
+@pytest.mark.parametrize("compression", ["gzip", "zstd"])
+@pytest.mark.parametrize("sizes", [[1000] * 20, [1000, 50_000, 1000]], ids=["small", "oversized"])
+def test_members_decode_in_bounded_pieces(monkeypatch, compression, sizes):
+    if compression == "zstd":
+        zstandard = pytest.importorskip("zstandard")
+        compress = zstandard.ZstdCompressor().compress
+    else:
+        compress = gzip.compress
+    monkeypatch.setattr(compression_module, "PARALLEL_MEMBER_BYTES", 10_000)
+    monkeypatch.setattr(compression_module, "_STREAM_BUFFER_SIZE", 4096)
+    members = _members(sizes)
+    data = b"".join(compress(member) for member in members)
+
+    pieces = list(_iter_decompressed(data, compression, threads=4))
+    assert b"".join(pieces) == b"".join(members)
+    assert max(len(piece) for piece in pieces) <= 10_000
+
+
+def test_false_gzip_boundary_falls_back_to_serial():
+    members = _members([5000, 5000])
+    # A payload holding the gzip magic makes a false member boundary inside the first member
+    members[0] = members[0][:100] + gzip.compress(b"x")[:10] + members[0][100:]
+    data = gzip.compress(members[0], compresslevel=0) + gzip.compress(members[1])
+    assert b"".join(_iter_decompressed(data, "gzip", threads=4)) == b"".join(members)
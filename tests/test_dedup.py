@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dags.etl.transform.dedup import BloomFilter, DedupKeyStore, StreamingDeduplicator
+
+
+def _chunk(*sessions):
+    return pd.DataFrame({"session_id": pd.array(sessions, dtype="string"), "user_id": range(len(sessions))})
+
+
+@pytest.mark.parametrize("max_exact", [100, 1], ids=["exact", "bloom"])
+def test_keeps_the_first_row_per_key(tmp_path, max_exact):
+    with StreamingDeduplicator(max_exact=max_exact, capacity=1_000, spill_dir=str(tmp_path)) as dedup:
+        first = dedup.filter(_chunk("a", "b", "a", None, None))
+        second = dedup.filter(_chunk("b", "c", "d", "c"))
+    assert first["session_id"].tolist() == ["a", "b", pd.NA, pd.NA]
+    assert second["session_id"].tolist() == ["c", "d"]
+    assert dedup.stats.duplicates == 3
+    assert dedup.stats.mode == ("exact" if max_exact == 100 else "bloom")
+
+
+def test_bloom_false_positive_is_resolved_on_disk(tmp_path, monkeypatch):
+    # Every key looks present to the Bloom filter; the SQLite check keeps the new ones
+    monkeypatch.setattr(BloomFilter, "contains", lambda self, keys: np.ones(len(keys), dtype=bool))
+    with StreamingDeduplicator(max_exact=1, capacity=1_000, spill_dir=str(tmp_path)) as dedup:
+        dedup.filter(_chunk("a", "b"))
+        kept = dedup.filter(_chunk("a", "c", "d"))
+    assert kept["session_id"].tolist() == ["c", "d"]
+    assert dedup.stats.duplicates == 1
+    assert dedup.stats.bloom_false_positives == 2
+
+
+def test_keys_of_committed_runs_are_dropped_in_later_runs(tmp_path, monkeypatch):
+    def run(run_id, *sessions):
+        with DedupKeyStore(path=str(tmp_path / "dedup"), capacity=1_000) as history, \
+                StreamingDeduplicator(history=history, run_id=run_id) as dedup:
+            return dedup.filter(_chunk(*sessions))["session_id"].tolist(), dedup.stats
+
+    assert run("run-1", "a", "b")[0] == ["a", "b"]
+    # Not committed yet: a retry of the same run keeps its records
+    assert run("run-1", "a", "b")[0] == ["a", "b"]
+    with DedupKeyStore(path=str(tmp_path / "dedup"), capacity=1_000) as history:
+        history.commit("run-1")
+
+    kept, stats = run("run-2", "b", "c")
+    assert kept == ["c"]
+    assert stats.earlier_run_duplicates == 1
+
+    # run-2 never committed, so c still counts as new; a Bloom false positive
+    # on it is resolved by the SQLite check
+    monkeypatch.setattr(BloomFilter, "contains", lambda self, keys: np.ones(len(keys), dtype=bool))
+    kept, stats = run("run-3", "a", "c")
+    assert kept == ["c"]
+    assert stats.bloom_false_positives == 1
+
+
+def test_history_bloom_filter_grows_past_its_capacity(tmp_path):
+    path = str(tmp_path / "dedup")
+    for i in range(3):
+        with DedupKeyStore(path=path, capacity=4) as history:
+            with StreamingDeduplicator(history=history, run_id=f"run-{i}") as dedup:
+                dedup.filter(_chunk(*(f"{i}-{j}" for j in range(5))))
+            history.commit(f"run-{i}")
+
+    with DedupKeyStore(path=path, capacity=4) as history:
+        seen, _ = history.existing(np.array([f"{i}-{j}" for i in range(3) for j in range(5)] + ["new"],
+                                            dtype=object))
+        assert history._load_bloom().capacity >= 15
+    assert seen.tolist() == [True] * 15 + [False]
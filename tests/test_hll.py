@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dags.etl.transform.hll import HyperLogLog, build_user_sketches, merge_sketches
+
+
+def _summary(rows, users, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "user_id": rng.integers(0, users, rows),
+        "campaign_name": rng.choice(["summer", "winter"], rows),
+        "source": rng.choice(["ads", "social"], rows),
+        "clicked_at": pd.Timestamp("2025-07-01") + pd.to_timedelta(rng.integers(0, 3 * 86400, rows), unit="s"),
+    })
+
+
+@pytest.mark.parametrize("users", [50, 2_000, 100_000])
+def test_count_within_error_of_nunique(users):
+    ids = np.random.default_rng(users).integers(0, users * 10, users * 2)
+    sketch = HyperLogLog().add(ids)
+    exact = pd.Series(ids).nunique()
+    # 4 standard errors: hashing is deterministic, so this never flakes
+    assert abs(sketch.count() - exact) <= 4 * sketch.relative_error * exact
+
+
+def test_merged_cells_equal_direct_sketch():
+    summary = _summary(20_000, 5_000)
+    sketches = build_user_sketches([summary.iloc[:7_000], summary.iloc[7_000:]])
+    assert len(sketches) == 3 * 2 * 2
+
+    merged = merge_sketches(sketches["sketch"])
+    np.testing.assert_array_equal(merged.registers, HyperLogLog().add(summary["user_id"]).registers)
+
+    summer = merge_sketches(sketches.loc[sketches["campaign_name"] == "summer", "sketch"])
+    direct = HyperLogLog().add(summary.loc[summary["campaign_name"] == "summer", "user_id"])
+    np.testing.assert_array_equal(summer.registers, direct.registers)
+
+
+def test_bytes_round_trip():
+    sketch = HyperLogLog(precision=10).add(np.arange(3_000))
+    restored = HyperLogLog.from_bytes(sketch.to_bytes())
+    assert restored.precision == 10
+    np.testing.assert_array_equal(restored.registers, sketch.registers)
+    assert restored.count() == sketch.count()
+    assert HyperLogLog.from_bytes(HyperLogLog().to_bytes()).count() == 0
+    with pytest.raises(ValueError):
+        HyperLogLog.from_bytes(b"nope")
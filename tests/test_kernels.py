@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dags.etl.transform.kernels import DENSE_SPAN_MIN, aggregate_by_key, key_positions
+
+SUMS = {"playtime": "playtime_minutes", "revenue_cents": "revenue_cents"}
+MAXES = {"last_seen": "event_time"}
+
+
+def _events(user_ids, seed=0):
+    rng = np.random.default_rng(seed)
+    n = len(user_ids)
+    playtime = rng.integers(0, 120, n).astype("float64")
+    playtime[rng.random(n) < 0.1] = np.nan
+    event_time = pd.Series(pd.Timestamp("2025-07-01") + pd.to_timedelta(rng.integers(0, 86400, n), unit="s"))
+    event_time[rng.random(n) < 0.1] = pd.NaT
+    return pd.DataFrame({
+        "user_id": pd.array(user_ids, dtype="Int32"),
+        "playtime_minutes": playtime,
+        "revenue_cents": pd.array(np.where(rng.random(n) < 0.1, None, rng.integers(0, 10_000, n)), dtype="Int64"),
+        "event_time": event_time.astype("datetime64[ns]"),
+    })
+
+
+def _groupby(df, where=None):
+    if where is not None:
+        df = df[where]
+    grouped = df.groupby("user_id", sort=True)
+    return pd.DataFrame({
+        "playtime": grouped["playtime_minutes"].sum(),
+        "revenue_cents": grouped["revenue_cents"].sum().astype("int64"),
+        "events": grouped.size().astype("int64"),
+        "last_seen": grouped["event_time"].max(),
+    }).reset_index()
+
+
+CASES = {
+    "dense": [3, 1, 2, 3, 1, 7, 2, 2],
+    "sparse": [5, 2 ** 30, 5, 2 ** 30 + DENSE_SPAN_MIN * 3, 17, 17],
+    "null-keys": [1, None, 2, None, 1, 4],
+    "empty": [],
+}
+
+
+@pytest.mark.parametrize("user_ids", CASES.values(), ids=CASES.keys())
+@pytest.mark.parametrize("filtered", [False, True], ids=["all", "where"])
+def test_aggregate_by_key_matches_groupby(user_ids, filtered):
+    df = _events(user_ids)
+    where = df["event_time"].notna().to_numpy() if filtered else None
+    out = aggregate_by_key(df, "user_id", sums=SUMS, count="events", maxes=MAXES, where=where)
+    pd.testing.assert_frame_equal(out, _groupby(df, where))
+
+
+def test_key_positions():
+    table = pd.Series([2, 5, 2 ** 30], dtype="Int32")
+    keys = pd.Series([5, 3, 2 ** 30, 2, 99], dtype="Int32")
+    np.testing.assert_array_equal(key_positions(keys, table), [1, -1, 2, 0, -1])
+    np.testing.assert_array_equal(key_positions(keys, table.iloc[:0]), [-1] * 5)
+    with_null = pd.Series([5, None], dtype="Int32")
+    np.testing.assert_array_equal(key_positions(with_null, table), [1, -1])
@@ -0,0 +1,52 @@
+import pandas as pd
+import pytest
+
+from dags.etl.extract.schema import CAMPAIGNS_SCHEMA, GAME_EVENTS_SCHEMA, apply_schema
+from dags.etl.transform.kernels import DENSE_SPAN_MIN
+from dags.etl.transform.transform_data import transform_plan
+
+SPARSE = 2 ** 30 + DENSE_SPAN_MIN * 3
+
+EVENTS = [
+    (1, "a", 10, 1.5, "2025-07-01T00:00:00"),
+    (1, "b", 5, None, "2025-07-01T01:00:00"),
+    (2, "c", None, 2.25, "2025-07-01T02:00:00"),
+    (None, "d", 7, 3.0, "2025-07-01T03:00:00"),
+    (3, None, 8, 4.0, "2025-07-01T04:00:00"),
+    (SPARSE, "e", 1, 0.1, "2025-07-01T05:00:00"),
+    (SPARSE, "f", 2, None, None),
+]
+CLICKS = [
+    (2, "summer", "ads", "2025-07-01T00:30:00"),
+    (1, "summer", "social", "2025-07-01T00:10:00"),
+    (4, "winter", "ads", "2025-07-01T00:20:00"),
+    (None, "winter", "ads", "2025-07-01T00:40:00"),
+    (1, None, "ads", "2025-07-01T00:50:00"),
+    (SPARSE, "summer", "ads", "2025-07-01T01:10:00"),
+    (3, "summer", "ads", "2025-07-01T01:20:00"),
+]
+
+
+def _frame(rows, schema):
+    return apply_schema(pd.DataFrame(rows, columns=list(schema)), schema)
+
+
+@pytest.mark.parametrize("events, clicks", [
+    (EVENTS, CLICKS),
+    ([row for row in EVENTS if row[0] is not None], CLICKS),
+    (EVENTS, [row for row in CLICKS if row[0] in (4, None)]),
+    ([], CLICKS),
+    (EVENTS, []),
+    ([], []),
+], ids=["all", "no-null-keys", "unmatched", "no-events", "no-clicks", "empty"])
+def test_optimized_plan_matches_logical_plan(events, clicks):
+    plan = transform_plan(_frame(events, GAME_EVENTS_SCHEMA), _frame(clicks, CAMPAIGNS_SCHEMA))
+    expected = plan.collect(optimized=False).reset_index(drop=True)
+    pd.testing.assert_frame_equal(plan.collect(), expected)
+
+
+def test_plan_totals():
+    out = transform_plan(_frame(EVENTS, GAME_EVENTS_SCHEMA), _frame(CLICKS, CAMPAIGNS_SCHEMA)).collect()
+    assert out["user_id"].tolist() == [2, 1, 4, SPARSE, 3]
+    assert out["total_playtime"].tolist() == [0.0, 15.0, 0.0, 1.0, 0.0]
+    assert out["total_revenue"].tolist() == [2.25, 1.5, 0.0, 0.1, 0.0]
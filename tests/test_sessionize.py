@@ -0,0 +1,24 @@
+import json
+
+from dags.etl.extract.extract_game_events import extract_game_events
+from dags.etl.transform.sessionize import sessionize
+from dags.etl.transform.transform_data import GAME_EVENTS_PUSHDOWN, SESSIONIZE_PUSHDOWN
+
+
+def test_events_without_session_id_reach_sessionize(tmp_path):
+    events = [
+        {"user_id": 1, "session_id": "a", "playtime_minutes": 3, "revenue": 1.0, "event_time": "2025-07-01T00:00:00"},
+        {"user_id": 1, "session_id": None, "playtime_minutes": 4, "revenue": 0.0, "event_time": "2025-07-01T00:05:00"},
+        {"user_id": 2, "playtime_minutes": 5, "revenue": 2.5, "event_time": "2025-07-01T01:00:00"},
+    ]
+    path = tmp_path / "game_events.json"
+    path.write_text(json.dumps(events))
+
+    assert len(extract_game_events(str(path), use_staging=False, pushdown=GAME_EVENTS_PUSHDOWN)) == 1
+    df = extract_game_events(str(path), use_staging=False, pushdown=SESSIONIZE_PUSHDOWN)
+    assert len(df) == 3
+
+    events, sessions = sessionize(df, timeout_minutes=30)
+    assert events["session_id"].notna().all()
+    assert sessions["event_count"].tolist() == [2, 1]
+    assert sessions["total_playtime"].tolist() == [7.0, 5.0]
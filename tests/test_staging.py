@@ -0,0 +1,53 @@
+import json
+import os
+
+import pandas as pd
+
+from dags.etl.extract.staging import StagingCache, staged_chunks
+
+SCHEMA = {"user_id": "Int64", "source": "category"}
+
+
+def _write_raw(path, text):
+    path.write_text(text)
+    return str(path)
+
+
+def _staged(cache, file_path, parsed):
+    def parse():
+        parsed.append(file_path)
+        yield pd.DataFrame({"user_id": pd.array([1, 2], dtype="Int64"),
+                            "source": pd.Categorical(["ads", "social"])})
+
+    return pd.concat(staged_chunks(file_path, "game_events", SCHEMA, parse(), chunksize=10, cache=cache),
+                     ignore_index=True)
+
+
+def test_hit_miss_and_eviction(tmp_path):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    a = _write_raw(raw / "a.csv", "a")
+    b = _write_raw(raw / "b.csv", "b")
+    cache = StagingCache(str(tmp_path / "cache"))
+    parsed = []
+
+    # Miss: parsed and staged; hit: served from the staged entry, categoricals restored
+    first = _staged(cache, a, parsed)
+    second = _staged(cache, a, parsed)
+    assert parsed == [a]
+    pd.testing.assert_frame_equal(second, first)
+    assert isinstance(second["source"].dtype, pd.CategoricalDtype)
+
+    # Room for a single entry: staging b evicts a, and the index forgets it
+    cache.max_bytes = os.path.getsize(cache._path(cache.key(a, "game_events", SCHEMA)))
+    _staged(cache, b, parsed)
+    key_a, key_b = cache.key(a, "game_events", SCHEMA), cache.key(b, "game_events", SCHEMA)
+    assert not cache.contains(key_a) and cache.contains(key_b)
+    cache.evict()
+    with open(os.path.join(cache.cache_dir, "index.json")) as f:
+        index = json.load(f)
+    assert list(index["entries"]) == [key_b]
+    assert [fingerprint.split(":")[0] for fingerprint in index["files"]] == [os.path.abspath(b)]
+
+    _staged(cache, a, parsed)
+    assert parsed == [a, b, a]
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dags.etl.extract.schema import GAME_EVENTS_SCHEMA, apply_schema
+from dags.etl.transform.state_store import UserStateStore
+
+
+def events(users, revenue, start="2025-07-01"):
+    return apply_schema(pd.DataFrame({
+        "user_id": users,
+        "session_id": [f"{start}-{i}" for i in range(len(users))],
+        "event_time": pd.Timestamp(start) + pd.to_timedelta(np.arange(len(users)), unit="min"),
+        "playtime_minutes": np.ones(len(users)),
+        "revenue": revenue,
+    }), GAME_EVENTS_SCHEMA)
+
+
+def test_fold_sums_revenue_from_raw_revenue(tmp_path):
+    store = UserStateStore(str(tmp_path))
+    df = events([1, 1, 2], [0.99, 4.99, 1.5])
+    store.commit(store.fold(df).generation)
+    state = store.current().to_frame()
+    assert state["total_revenue_cents"].tolist() == [598, 150]
+    assert state["event_count"].tolist() == [2, 1]
+
+
+def test_overlapping_runs_never_drop_a_delta(tmp_path):
+    store = UserStateStore(str(tmp_path))
+    store.commit(store.fold(events([1], [1.0])).generation)
+
+    # Two runs fold on the same committed state
+    first = store.fold(events([2], [2.0], "2025-07-02"))
+    second = store.fold(events([3], [3.0], "2025-07-03"))
+    store.commit(first.generation)
+    # The other run's pending parts survived the first commit's garbage collection...
+    assert second.parts[-1] not in first.parts
+    # ...but it was folded on a replaced state, so it must not commit over it
+    with pytest.raises(RuntimeError):
+        store.commit(second.generation)
+    assert store.current().to_frame()["user_id"].tolist() == [1, 2]
+
+    # A retried commit of the current generation is a no-op
+    store.commit(first.generation)
+    assert store.current().generation == first.generation
+
+
+def test_pending_parts_survive_another_commit(tmp_path):
+    store = UserStateStore(str(tmp_path))
+    base = store.fold(events([1], [1.0]))
+    store.commit(base.generation)
+    pending = store.fold(events([2], [2.0], "2025-07-02"))
+    # A retried commit of the current generation collects garbage, but keeps
+    # the parts of pending versions that can still commit
+    store.commit(base.generation)
+    assert pending.lookup([2])["total_revenue_cents"].tolist() == [200]
+    store.commit(pending.generation)
+    assert store.current().to_frame()["total_revenue_cents"].tolist() == [100, 200]
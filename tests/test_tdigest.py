@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dags.etl.transform.tdigest import DEFAULT_QUANTILES, TDigest, build_user_digests, merge_digests
+
+MAX_RANK_ERROR = 0.01
+
+
+def _rank_error(values, estimates):
+    # How far each estimate's rank range is from its quantile (0 when exact)
+    values = np.sort(values)
+    below = np.searchsorted(values, estimates, side="left") / len(values)
+    upto = np.searchsorted(values, estimates, side="right") / len(values)
+    return np.maximum(0, np.maximum(below - DEFAULT_QUANTILES, DEFAULT_QUANTILES - upto))
+
+
+@pytest.mark.parametrize("size", [200, 20_000])
+def test_rank_error_at_p50_p90_p99(size):
+    values = np.random.default_rng(size).lognormal(1.0, 1.5, size)
+    estimates = TDigest().add(values).quantile(list(DEFAULT_QUANTILES))
+    assert _rank_error(values, estimates).max() <= MAX_RANK_ERROR
+
+
+def test_merged_digest_matches_direct_digest():
+    values = np.random.default_rng(1).lognormal(1.0, 1.5, 20_000)
+    parts = np.array_split(values, 7)
+    direct = TDigest().add(values)
+    merged = merge_digests(TDigest().add(part).to_bytes() for part in parts)
+
+    assert merged.count == direct.count == len(values)
+    assert (merged.minimum, merged.maximum) == (values.min(), values.max())
+    assert _rank_error(values, merged.quantile(list(DEFAULT_QUANTILES))).max() <= MAX_RANK_ERROR
+    incremental = TDigest()
+    for part in parts:
+        incremental.merge(TDigest().add(part))
+    assert _rank_error(values, incremental.quantile(list(DEFAULT_QUANTILES))).max() <= MAX_RANK_ERROR
+
+
+def test_cell_digests_merge_to_per_user_quantiles():
+    rng = np.random.default_rng(2)
+    users = pd.DataFrame({"user_id": np.arange(3_000), "total_revenue": rng.lognormal(0, 2, 3_000),
+                          "total_playtime": rng.gamma(2.0, 30.0, 3_000)})
+    # Each user clicks up to three times, in one day x campaign x source cell
+    clicks = users.loc[rng.integers(0, len(users), 9_000)].assign(
+        campaign_name=lambda df: np.where(df["user_id"] % 2, "summer", "winter"),
+        source="ads",
+        clicked_at=lambda df: pd.Timestamp("2025-07-01") + pd.to_timedelta(df["user_id"] % 3, unit="D"),
+    )
+    digests = build_user_digests([clicks.iloc[:4_000], clicks.iloc[4_000:]])
+    assert len(digests) == 6
+
+    clicked = users[users["user_id"].isin(clicks["user_id"])]
+    for name, column in (("revenue_digest", "total_revenue"), ("playtime_digest", "total_playtime")):
+        merged = merge_digests(digests[name])
+        assert merged.count == len(clicked)
+        errors = _rank_error(clicked[column].to_numpy(), merged.quantile(list(DEFAULT_QUANTILES)))
+        assert errors.max() <= MAX_RANK_ERROR
+
+
+def test_bytes_round_trip():
+    digest = TDigest(compression=50).add(np.random.default_rng(3).normal(size=1_000))
+    restored = TDigest.from_bytes(digest.to_bytes())
+    assert restored.compression == 50
+    np.testing.assert_array_equal(restored.means, digest.means)
+    np.testing.assert_array_equal(restored.weights, digest.weights)
+    assert (restored.minimum, restored.maximum) == (digest.minimum, digest.maximum)
+    assert np.isnan(merge_digests([]).quantile(0.5))